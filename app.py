@@ -1,7 +1,17 @@
 
+import time
+_import_started = time.perf_counter()  # Cold-start timing, see utils.startup
 import streamlit as st
-from utils.data_loader import load_data
-from datetime import datetime
+from utils.aggregates import get_summary
+from utils.data_loader import get_dataset
+from utils.data_version import dataset_version, get_watcher, refresh_data
+from utils.export import export_button
+from utils.instrumentation import instrumented_page
+from utils.partitions import has_partitions
+from utils.query import district_filter, get_index, sitting_filter
+from utils.refresh import update_badge
+from utils.startup import record_cold_start
+_import_seconds = time.perf_counter() - _import_started
 
 
 st.set_page_config(
@@ -10,37 +20,37 @@ st.set_page_config(
     layout="wide"
 )
 
-@st.cache_resource(ttl=300)  # Refresh data every 5 minutes
-def get_data():
-    """Cached data loading with refresh capability"""
+def get_data(year, exam, districts):
+    """Selected districts of a sitting: only their partitions from the store, else an index slice"""
     try:
-        return load_data()
+        if has_partitions():
+            return get_dataset(year, exam, districts).view()  # Cached per selection
+        return get_index().select(districts)
     except Exception as e:
         st.error(f"Data loading failed: {str(e)}")
         st.stop()
 
+@instrumented_page("Home")
 def main():
-    # Load data with progress indicator
-    with st.spinner("Loading latest school data..."):
-        df = get_data()
-    
+    record_cold_start(_import_seconds)
+
     # Sidebar - Data freshness indicator
-    st.sidebar.markdown(f"**Data last loaded:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    watcher = get_watcher()
+    st.sidebar.markdown(f"**Data version:** `{watcher.version}`  \n"
+                        f"**Last changed:** {watcher.changed_at.strftime('%Y-%m-%d %H:%M:%S')}")
     if st.sidebar.button("🔄 Refresh Data Now"):
-        st.cache_data.clear()
+        refresh_data()
         st.rerun()
+    update_badge()
     
     # Sidebar filters
     st.sidebar.title("Filters")
-    selected_districts = st.sidebar.multiselect(
-        "Select Districts",
-        options=sorted(df['DistrictName'].unique()),
-        default=sorted(df['DistrictName'].unique()),
-        help="Filter schools by district"
-    )
+    year, exam = sitting_filter()
+    selected_districts = district_filter(list(get_summary(year, exam).districts.index))
     
-    # Filter data
-    filtered_df = df[df['DistrictName'].isin(selected_districts)]
+    # Slice the selection out of the published snapshot; new data is built in the background
+    filtered_df = get_data(year, exam, selected_districts)
+    selection = get_summary(year, exam).for_districts(selected_districts)
     
     # Main content
     st.title("🏫 NORTHERN UGANDA SCHOOLS ANALYSIS (2024 UNEB RESULTS)")
@@ -52,12 +62,12 @@ def main():
     # Overview metrics with error handling
     try:
         col1, col2, col3 = st.columns(3)
-        col1.metric("Total Schools", len(filtered_df), 
+        col1.metric("Total Schools", selection.schools, 
                    help="Number of schools in selected districts")
-        col2.metric("Total Students", f"{filtered_df['Total'].sum():,}",
+        col2.metric("Total Students", f"{selection.students:,}",
                    help="Combined enrollment across selected schools")
-        col3.metric("Average School Size", f"{filtered_df['Total'].mean():.1f}",
-                   delta=f"Range: {filtered_df['Total'].min()} - {filtered_df['Total'].max()}",
+        col3.metric("Average School Size", f"{selection.mean_size:.1f}",
+                   delta=f"Range: {selection.min_size} - {selection.max_size}",
                    help="Mean student count per school")
     except Exception as e:
         st.warning(f"Could not display metrics: {str(e)}")
@@ -68,7 +78,9 @@ def main():
     - [🏠 Overview](#)
     - [📊 Enrollment](#)
     - [🎓 Performance](#)
-    - [🌍 Madi Sub-Region](#)
+    - [🌍 Sub-Regions](#)
+    - [🗺️ District Map](#)
+    - [🔎 Find a School](#)
     """)
     
     # Data summary
@@ -76,11 +88,12 @@ def main():
         st.dataframe(filtered_df.head(10), 
                     use_container_width=True,
                     hide_index=True)
-        st.download_button(
+        export_button(
             "📥 Download Current Data",
-            filtered_df.to_csv(index=False),
-            "filtered_schools_data.csv",
-            "text/csv"
+            filtered_df,
+            "filtered_schools_data",
+            filters=[exam, year, *selected_districts],
+            version=dataset_version(year, exam)
         )
 
 if __name__ == "__main__":
@@ -0,0 +1,439 @@
+"""Timings and memory peaks for the data and analytics hot paths.
+
+Each size gets a synthetic dataset (see benchmarks.synthetic) in a scratch
+directory, and every case runs against it: loading (CSV parse, warm
+Feather read, partitioned store), filtering, aggregation, ranking, name
+search, year-over-year trends, chart building and export. A case is timed `--repeat` times and then run once
+more under tracemalloc for its peak Python-heap allocation. Nothing needs
+the network or a Streamlit server.
+
+    python -m benchmarks.suite --sizes 10000 100000
+    python -m benchmarks.suite --sizes 1000000 --only load filter --repeat 3
+    python -m benchmarks.suite --compare benchmarks/results/A.json benchmarks/results/B.json
+
+Results are written to benchmarks/results/<timestamp>-<commit>.json.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import warnings
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+os.environ.setdefault('MPLBACKEND', 'Agg')  # Chart cases run headless
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import synthetic
+from utils import data_loader, partitions, visualizations
+from utils.aggregates import summarize
+from utils.data_loader import DATA_EXAM, DATA_YEAR, GRADE_COLUMNS, DistrictRunningStats, read_dataset
+from utils.export import write_export
+from utils.profile import profile_frame
+from utils.query import DistrictIndex
+from utils.ranking import SchoolRanking
+from utils.render_cache import serialise_figure
+from utils.search import SEARCH_COLUMNS, SearchIndex
+from utils.subregions import load_registry
+from utils.trends import TREND_COLUMNS, TrendCube
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+SIZES = [10_000, 100_000]
+YEARS = 3  # Years written to the partitioned store per size
+REPEAT = 5
+REGRESSION = 1.10  # Median ratio above which --compare flags a case
+SELECTION_STEP = 3  # Every third district, so the selection is not one contiguous run
+SEARCH_QUERIES = 20  # Centre names per search case, half of them misspelt
+
+
+@dataclass
+class Workload:
+    """One synthetic dataset and the objects the cases run against"""
+    size: int
+    workdir: Path
+    csv_path: Path
+    partition_root: Path
+    frame: pd.DataFrame  # Cleaned, compact schema
+    districts: list  # Sidebar-style selection
+    index: DistrictIndex
+    selection: pd.DataFrame
+    summary: object
+    ranking: SchoolRanking
+    search: SearchIndex
+    years: pd.DataFrame  # Every year of the partitioned store, for the trend cube
+    trends: TrendCube
+
+
+@dataclass(frozen=True)
+class Case:
+    group: str
+    name: str
+    run: object  # run(workload, prepared) -> optional dict of extra numbers
+    setup: object = None  # setup(workload) -> prepared, untimed
+
+
+CASES = []
+
+
+def case(group, name, setup=None):
+    def register(run):
+        CASES.append(Case(group, name, run, setup))
+        return run
+    return register
+
+
+@contextmanager
+def scratch_cache(path):
+    """Point the Feather cache and fingerprint manifest at a scratch directory"""
+    saved = data_loader.CACHE_DIR, data_loader.MANIFEST_PATH
+    data_loader.CACHE_DIR = Path(path)
+    data_loader.MANIFEST_PATH = Path(path) / "manifest.json"
+    try:
+        yield
+    finally:
+        data_loader.CACHE_DIR, data_loader.MANIFEST_PATH = saved
+
+
+def _clear_cache(workload):
+    for cached in data_loader.CACHE_DIR.glob("*.feather"):
+        cached.unlink()
+    data_loader.MANIFEST_PATH.unlink(missing_ok=True)
+
+
+# Load
+
+@case('load', 'csv_parse', setup=_clear_cache)
+def _load_csv(w, _):
+    read_dataset(w.csv_path)
+
+
+@case('load', 'feather_warm')
+def _load_feather(w, _):
+    read_dataset(w.csv_path)
+
+
+@case('load', 'partitions_write')
+def _partitions_write(w, _):
+    partitions.write_partitions(w.frame, DATA_EXAM, DATA_YEAR, root=w.workdir / "partitions-write")
+
+
+@case('load', 'partitions_read_all_years')
+def _partitions_read(w, _):
+    partitions.read_partitions(exam=DATA_EXAM, root=w.partition_root)
+
+
+@case('load', 'partitions_read_selection')
+def _partitions_read_selection(w, _):
+    partitions.read_partitions(exam=DATA_EXAM, districts=w.districts,
+                               columns=['DistrictName', 'CentreName', 'A_Percentage', 'Total'],
+                               root=w.partition_root)
+
+
+# Filter
+
+@case('filter', 'isin_mask')
+def _filter_isin(w, _):
+    w.frame[w.frame['DistrictName'].isin(w.districts)]
+
+
+@case('filter', 'index_build')
+def _filter_index_build(w, _):
+    DistrictIndex(w.frame)
+
+
+@case('filter', 'index_select', setup=lambda w: w.index._memo.clear())
+def _filter_index_select(w, _):
+    w.index.select(w.districts)
+
+
+# Aggregate
+
+@case('aggregate', 'district_stats')
+def _aggregate_districts(w, _):
+    DistrictRunningStats.from_frame(w.frame).district_table()
+
+
+@case('aggregate', 'summarize')
+def _aggregate_summary(w, _):
+    summarize(w.frame)
+
+
+@case('aggregate', 'summarize_selection')
+def _aggregate_selection(w, _):
+    summarize(w.selection)
+
+
+@case('aggregate', 'profile')
+def _aggregate_profile(w, _):
+    profile_frame(w.frame)
+
+
+# Rank
+
+@case('rank', 'build')
+def _rank_build(w, _):
+    SchoolRanking(w.frame)
+
+
+@case('rank', 'top_selection')
+def _rank_top(w, _):
+    w.ranking.top(10, 'composite', w.districts)
+
+
+# Search
+
+def _search_queries(w):
+    names = w.frame['CentreName'].astype(str).sample(SEARCH_QUERIES, random_state=synthetic.SEED).tolist()
+    typos = [name[:len(name) // 2] + name[len(name) // 2 + 1:] for name in names[::2]]  # Drop a letter
+    prefixes = [name[:5] for name in names[1::2]]
+    return typos + prefixes
+
+
+@case('search', 'build')
+def _search_build(w, _):
+    SearchIndex(w.frame[SEARCH_COLUMNS])
+
+
+@case('search', 'query', setup=_search_queries)
+def _search_query(w, queries):
+    for query in queries:
+        w.search.search(query)
+    return {'queries': len(queries)}
+
+
+# Trends
+
+@case('trend', 'cube_build')
+def _trend_build(w, _):
+    cube = TrendCube(w.years, load_registry())
+    return {'centres': len(cube), 'cube_bytes': cube.counts.nbytes}
+
+
+@case('trend', 'most_improved', setup=lambda w: w.trends._values.clear())
+def _trend_most_improved(w, _):
+    for level in ('centre', 'district', 'subregion'):
+        w.trends.most_improved('composite', level, districts=w.districts)
+
+
+@case('trend', 'district_trend')
+def _trend_districts(w, _):
+    w.trends.trend('A_Percentage', 'district', w.districts)
+
+
+# Charts: build and serialise, as the render cache does on a miss
+
+def _chart(fig):
+    kind, payload = serialise_figure(fig)
+    return {'payload_bytes': len(payload)}
+
+
+@case('chart', 'district_enrollment')
+def _chart_enrollment(w, _):
+    return _chart(visualizations.plot_district_enrollment(w.summary.district_enrollment))
+
+
+@case('chart', 'performance_vs_attendance')
+def _chart_scatter(w, _):
+    return _chart(visualizations.plot_performance_vs_attendance(w.selection))
+
+
+@case('chart', 'school_size_distribution')
+def _chart_sizes(w, _):
+    return _chart(visualizations.plot_school_size_distribution(w.selection, w.summary.size_stats['50%']))
+
+
+@case('chart', 'performance_distribution')
+def _chart_boxes(w, _):
+    return _chart(visualizations.plot_performance_distribution(w.selection))
+
+
+@case('chart', 'grade_distribution')
+def _chart_grades(w, _):
+    return _chart(visualizations.plot_grade_distribution(w.summary.districts[GRADE_COLUMNS].sum()))
+
+
+# Export
+
+def _export_case(fmt):
+    def run(w, _):
+        path = write_export(w.selection, w.workdir / "exports" / f"selection.{fmt}", fmt)
+        return {'file_bytes': path.stat().st_size}
+    case('export', fmt.replace('.', '_'))(run)
+
+
+for _fmt in ('csv', 'csv.gz', 'parquet'):
+    _export_case(_fmt)
+
+
+def build_workload(size, workdir, years=YEARS, n_districts=synthetic.N_DISTRICTS, seed=synthetic.SEED):
+    """Generate, load and index one synthetic dataset (untimed)"""
+    workdir = Path(workdir)
+    profile = synthetic.source_profile()
+    raw = synthetic.generate_years(size, range(DATA_YEAR - years + 1, DATA_YEAR + 1), n_districts, seed, profile)
+    csv_path = synthetic.write_csv(raw[DATA_YEAR], workdir / f"synthetic-{size}.csv")
+    frame = read_dataset(csv_path)  # Also leaves the warm Feather cache
+
+    partition_root = workdir / "partitions"
+    for year, rows in raw.items():
+        partitions.write_partitions(data_loader.clean_frame(data_loader.validate_frame(rows)[0]),
+                                    DATA_EXAM, year, root=partition_root)
+
+    index = DistrictIndex(frame)
+    districts = index.districts[::SELECTION_STEP]
+    years = partitions.read_partitions(exam=DATA_EXAM, columns=[*TREND_COLUMNS, 'Year'], root=partition_root)
+    selection = index.select(districts)
+    return Workload(
+        size=size,
+        workdir=workdir,
+        csv_path=csv_path,
+        partition_root=partition_root,
+        frame=frame,
+        districts=districts,
+        index=index,
+        selection=selection,
+        summary=summarize(frame),
+        ranking=SchoolRanking(frame),
+        search=SearchIndex(frame[SEARCH_COLUMNS]),
+        years=years,
+        trends=TrendCube(years, load_registry()),
+    )
+
+
+def time_case(c, workload, repeat=REPEAT):
+    """Wall times for `repeat` runs and the tracemalloc peak of one more"""
+    times, info = [], {}
+    for _ in range(repeat):
+        prepared = c.setup(workload) if c.setup else None
+        start = time.perf_counter()
+        info = c.run(workload, prepared) or {}
+        times.append(time.perf_counter() - start)
+
+    prepared = c.setup(workload) if c.setup else None
+    tracemalloc.start()
+    try:
+        c.run(workload, prepared)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'group': c.group,
+        'case': c.name,
+        'size': workload.size,
+        'times': [round(t, 6) for t in times],
+        'min_s': min(times),
+        'median_s': statistics.median(times),
+        'peak_bytes': peak,
+        **info,
+    }
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=Path(__file__).resolve().parent)
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               capture_output=True, text=True, cwd=Path(__file__).resolve().parent)
+    except OSError:
+        return 'unknown'
+    commit = result.stdout.strip() or 'unknown'
+    return f"{commit}-dirty" if dirty.stdout.strip() else commit
+
+
+def _max_rss_bytes():
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if platform.system() == 'Darwin' else rss * 1024  # Bytes on macOS, KiB elsewhere
+
+
+def environment():
+    return {
+        'commit': _git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def run_suite(sizes=SIZES, groups=None, repeat=REPEAT, years=YEARS, n_districts=synthetic.N_DISTRICTS):
+    """Run every case (or those in `groups`) at each size; returns result rows"""
+    rows = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix=f"bench-{size}-") as workdir, scratch_cache(workdir):
+            workload = build_workload(size, workdir, years, n_districts)
+            for c in CASES:
+                if groups and c.group not in groups:
+                    continue
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    row = time_case(c, workload, repeat)
+                rows.append(row)
+                print(f"{size:>9,} {c.group:<9} {c.name:<28} {row['median_s'] * 1000:>10.1f} ms"
+                      f" {row['peak_bytes'] / 2 ** 20:>9.1f} MiB", flush=True)
+    return rows
+
+
+def save_results(rows, meta, out_dir=RESULTS_DIR):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')
+    path = out_dir / f"{stamp}-{meta['commit']}.json"
+    path.write_text(json.dumps({'meta': meta, 'results': rows}, indent=2))
+    return path
+
+
+def compare(old_path, new_path, threshold=REGRESSION):
+    """Median time and peak memory of two result files side by side"""
+    old, new = (json.loads(Path(p).read_text()) for p in (old_path, new_path))
+    key = ['group', 'case', 'size']
+    table = pd.DataFrame(old['results'])[[*key, 'median_s', 'peak_bytes']].merge(
+        pd.DataFrame(new['results'])[[*key, 'median_s', 'peak_bytes']],
+        on=key, suffixes=('_old', '_new'))
+    table['time_ratio'] = table['median_s_new'] / table['median_s_old']
+    table['memory_ratio'] = table['peak_bytes_new'] / table['peak_bytes_old'].replace(0, np.nan)
+    table['flag'] = np.where(table['time_ratio'] > threshold, 'slower',
+                             np.where(table['time_ratio'] < 1 / threshold, 'faster', ''))
+    return table, old['meta'], new['meta']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the data and analytics hot paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Centres per synthetic dataset")
+    parser.add_argument("--only", nargs="+", choices=sorted({c.group for c in CASES}), default=None)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--years", type=int, default=YEARS)
+    parser.add_argument("--districts", type=int, default=synthetic.N_DISTRICTS)
+    parser.add_argument("--out", type=Path, default=RESULTS_DIR)
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("OLD", "NEW"),
+                        help="Compare two saved result files instead of running")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        table, old, new = compare(*args.compare)
+        print(f"{old['commit']} ({old['timestamp']}) -> {new['commit']} ({new['timestamp']})")
+        print(table[['group', 'case', 'size', 'median_s_old', 'median_s_new', 'time_ratio',
+                     'memory_ratio', 'flag']].to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+        return
+
+    meta = {**environment(), 'repeat': args.repeat, 'years': args.years, 'districts': args.districts}
+    rows = run_suite(args.sizes, args.only, args.repeat, args.years, args.districts)
+    meta['max_rss_bytes'] = _max_rss_bytes()
+    print(f"Saved {save_results(rows, meta, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
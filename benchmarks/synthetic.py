@@ -0,0 +1,160 @@
+"""Synthetic results in the bundled CSV's schema, at any scale.
+
+School sizes, grade mix and absence are fitted from the bundled Northern
+Uganda results (falling back to fixed values if the file is missing), then
+drawn for any number of centres over any number of districts and years.
+Rows reconcile (As+..+Es+Absent == Total) and centre names are unique per
+district, so generated files pass the loader's quality rules unchanged.
+Later years keep the first year's centres, with some churn (see CHURN).
+
+    python -m benchmarks.synthetic --centres 100000 --districts 150 --years 2022 2023 2024 --out bench-data
+"""
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import DATA_PATH, GRADE_COLUMNS, RAW_COLUMNS
+
+SEED = 2024
+N_DISTRICTS = 150
+GRADE_CONCENTRATION = 20  # Dirichlet concentration; lower spreads schools' grade mixes further
+MIN_TOTAL, MAX_TOTAL = 5, 5000
+# Per-year share of centres that close, open, or are renumbered and respelt
+CHURN = {'closed': 0.02, 'opened': 0.02, 'renamed': 0.01}
+
+
+@dataclass(frozen=True)
+class SourceProfile:
+    """What the generator copies from real results"""
+    districts: list
+    log_total_mean: float
+    log_total_std: float
+    grade_shares: np.ndarray  # As..Es, summing to 1
+    absence_rate: float
+
+
+FALLBACK_PROFILE = SourceProfile(
+    districts=['GULU', 'LIRA', 'ARUA', 'KITGUM', 'ADJUMANI'],
+    log_total_mean=6.35,
+    log_total_std=0.81,
+    grade_shares=np.array([0.019, 0.193, 0.499, 0.273, 0.016]),
+    absence_rate=0.007,
+)
+
+
+def source_profile(path=DATA_PATH):
+    """Fit a SourceProfile to a results CSV"""
+    try:
+        df = pd.read_csv(path)
+    except OSError:
+        return FALLBACK_PROFILE
+    df.columns = df.columns.str.strip()
+    log_total = np.log(df['Total'][df['Total'] > 0])
+    grades = df[GRADE_COLUMNS].sum()
+    return SourceProfile(
+        districts=sorted(df['DistrictName'].dropna().str.strip().str.upper().unique()),
+        log_total_mean=float(log_total.mean()),
+        log_total_std=float(log_total.std()),
+        grade_shares=(grades / grades.sum()).to_numpy(),
+        absence_rate=float(df['Absent'].sum() / df['Total'].sum()),
+    )
+
+
+def district_names(n, profile=FALLBACK_PROFILE):
+    """The real district names first, then numbered synthetic ones"""
+    names = list(profile.districts[:n])
+    names += [f"DISTRICT {i:03d}" for i in range(len(names) + 1, n + 1)]
+    return names
+
+
+def generate(n_centres, n_districts=N_DISTRICTS, seed=SEED, profile=None):
+    """Raw results rows (RAW_COLUMNS) for `n_centres` centres"""
+    profile = profile or source_profile()
+    rng = np.random.default_rng(seed)
+    districts = np.array(district_names(n_districts, profile), dtype=object)
+
+    # Skewed district sizes, like real ones; every district gets at least one centre
+    weights = rng.dirichlet(np.full(n_districts, 2.0))
+    codes = np.concatenate([np.arange(min(n_districts, n_centres)),
+                            rng.choice(n_districts, max(n_centres - n_districts, 0), p=weights)])
+    codes = np.sort(codes)
+
+    total = np.exp(rng.normal(profile.log_total_mean, profile.log_total_std, n_centres))
+    total = np.clip(np.rint(total), MIN_TOTAL, MAX_TOTAL).astype(np.int64)
+    absent = rng.binomial(total, profile.absence_rate)
+    shares = rng.dirichlet(profile.grade_shares * GRADE_CONCENTRATION, n_centres)
+    grades = rng.multinomial(total - absent, shares)
+
+    number_in_district = np.arange(n_centres) - np.searchsorted(codes, codes)
+    district = pd.Series(districts[codes])
+    centre = district + " SECONDARY SCHOOL " + pd.Series(number_in_district + 1).astype(str)
+    df = pd.DataFrame({
+        'No': np.arange(1, n_centres + 1, dtype=np.float64),  # Read back as float, like the real file
+        'DistrictName': district,
+        'CentreName': centre,
+        **{col: grades[:, i] for i, col in enumerate(GRADE_COLUMNS)},
+        'Absent': absent,
+        'Total': total,
+    })
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)[RAW_COLUMNS]
+
+
+def generate_years(n_centres, years, n_districts=N_DISTRICTS, seed=SEED, profile=None):
+    """year -> raw rows for the same centres over several years.
+
+    Each year redraws every centre's results. Between years a CHURN share of
+    centres closes, new ones open, and some are renumbered and have their
+    name respelt ("SECONDARY" -> "SEC."), as the results files do.
+    """
+    profile = profile or source_profile()
+    rng = np.random.default_rng(seed)
+    roster = generate(n_centres, n_districts, seed, profile)[['No', 'DistrictName', 'CentreName']]
+    next_no = n_centres + 1
+    rows = {}
+    for i, year in enumerate(years):
+        if i:
+            n = len(roster)
+            roster = roster[rng.random(n) >= CHURN['closed']].reset_index(drop=True)
+            renamed = rng.random(len(roster)) < CHURN['renamed']
+            roster.loc[renamed, 'CentreName'] = roster.loc[renamed, 'CentreName'].str.replace(
+                'SECONDARY', 'SEC.', regex=False)
+            roster.loc[renamed, 'No'] = np.arange(next_no, next_no + renamed.sum())
+            next_no += renamed.sum()
+            opened = generate(int(n * CHURN['opened']) + 1, n_districts, seed + 1000 + i, profile)
+            opened['CentreName'] = opened['CentreName'] + f" ({year})"  # Unique next to the roster
+            opened['No'] = np.arange(next_no, next_no + len(opened))
+            next_no += len(opened)
+            roster = pd.concat([roster, opened[roster.columns]], ignore_index=True)
+        results = generate(len(roster), n_districts, seed + i, profile)
+        rows[year] = pd.concat([roster, results.drop(columns=['No', 'DistrictName', 'CentreName'])],
+                               axis=1)[RAW_COLUMNS]
+    return rows
+
+
+def write_csv(df, path):
+    """Write rows with the bundled file's ' Absent' header"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.rename(columns={'Absent': ' Absent'}).to_csv(path, index=False)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic results CSVs")
+    parser.add_argument("--centres", type=int, default=10_000)
+    parser.add_argument("--districts", type=int, default=N_DISTRICTS)
+    parser.add_argument("--years", type=int, nargs="+", default=[2024])
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--out", type=Path, default=Path("bench-data"))
+    args = parser.parse_args(argv)
+
+    for year, df in generate_years(args.centres, args.years, args.districts, args.seed).items():
+        path = write_csv(df, args.out / f"synthetic-{args.centres}-{year}.csv")
+        print(f"{path}: {len(df):,} centres")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import streamlit as st
+import pandas as pd
+from utils.aggregates import get_summary
+from utils.data_version import sitting_version
+from utils.geo import BOUNDARIES_PATH, ZOOM_LEVELS, boundaries_available, get_boundaries
+from utils.instrumentation import instrumented_page
+from utils.query import district_filter, require_selection, sitting_filter
+from utils.refresh import update_badge
+from utils.render_cache import render_chart
+from utils.visualizations import plot_district_choropleth
+
+MAP_METRICS = {
+    'Total': 'Students Enrolled',
+    'A_mean': 'Average Grade "A" %',
+    'Absenteeism': 'Absenteeism Rate %',
+    'schools': 'Number of Schools',
+}
+
+def district_values(districts):
+    """Map metrics per district from the precomputed district rows"""
+    values = districts[['Total', 'A_mean', 'schools']].copy()
+    values['Absenteeism'] = districts['Absent'] / districts['Total'].where(districts['Total'] > 0) * 100
+    return values
+
+@instrumented_page("Map")
+def main():
+    update_badge()
+    # Shared sidebar sitting and district filters
+    year, exam = sitting_filter()
+    selected_districts = district_filter(list(get_summary(year, exam).districts.index))
+    require_selection(selected_districts)
+
+    summary = get_summary(year, exam, districts=selected_districts)
+    values = district_values(summary.districts)
+
+    st.title("🗺️ DISTRICT MAP")
+    st.markdown("""
+    ### Where the Numbers Are
+    District-level enrollment, performance and absenteeism across Northern Uganda
+    """)
+
+    col1, col2 = st.columns(2)
+    metric = col1.selectbox("Shade districts by", list(MAP_METRICS), format_func=MAP_METRICS.get)
+    level = col2.selectbox("Detail", list(ZOOM_LEVELS), index=1, format_func=str.title,
+                           help="Outlines are simplified ahead of time; finer detail sends more data")
+
+    if not boundaries_available():
+        st.info(f"No district boundaries found. Save a GeoJSON of Uganda's districts as "
+                f"`{BOUNDARIES_PATH.relative_to(BOUNDARIES_PATH.parents[2])}` and run "
+                f"`python -m utils.geo` once to prepare it. Showing the district table instead.")
+        st.dataframe(values[metric].sort_values(ascending=False).to_frame(MAP_METRICS[metric]),
+                     use_container_width=True)
+        return
+
+    boundaries = get_boundaries()
+    matched, missing = boundaries.match(values.index)
+    geojson = boundaries.geojson(matched, level)
+    render_chart(plot_district_choropleth, values.loc[list(matched), metric].dropna(), geojson,
+                 MAP_METRICS[metric], filters=selected_districts, version=sitting_version(year, exam),
+                 key=(metric, level, boundaries.version))
+    if missing:
+        st.caption(f"No boundary found for {len(missing)} district(s): {', '.join(missing)}")
+
+    # District table behind the map
+    st.header("District Values")
+    st.dataframe(
+        pd.DataFrame({label: values[column] for column, label in MAP_METRICS.items()})
+        .sort_values(MAP_METRICS[metric], ascending=False)
+        .style.format({MAP_METRICS['Total']: '{:,}', MAP_METRICS['A_mean']: '{:.1f}%',
+                       MAP_METRICS['Absenteeism']: '{:.1f}%'}),
+        use_container_width=True
+    )
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,87 @@
 import streamlit as st
-from utils.data_loader import load_data
-from utils.visualizations import plot_missing_values
-
-df = load_data()
-
-st.title("🏫 DATASET OVERVIEW")
-st.markdown("""
-### Understanding the Northern Uganda Schools Dataset
-This page provides an overview of the dataset structure, completeness, and basic statistics.
-""")
-
-# Basic info
-st.header("Dataset Structure")
-st.write(f"The dataset contains {len(df)} schools across {df['DistrictName'].nunique()} districts.")
-st.dataframe(df.head())
-
-# Missing values
-st.header("Data Completeness")
-st.markdown("""
-The missing values matrix below shows patterns of data availability. 
-White lines indicate missing values - we want to see as few as possible.
-""")
-st.pyplot(plot_missing_values(df))
-
-# Statistics
-st.header("Key Statistics")
-st.dataframe(df.describe())
-
-st.markdown("""
-**Practical Conclusions:**
-1. The dataset appears to have [describe completeness]
-2. Key metrics like [important columns] show [interesting patterns]
-3. Data quality is [good/needs improvement] for [specific aspects]
-""")
\ No newline at end of file
+import pandas as pd
+from utils.aggregates import get_summary
+from utils.data_loader import memory_report, quality_report
+from utils.data_version import sitting_version
+from utils.instrumentation import instrumented_page
+from utils.profile import get_profile
+from utils.query import district_filter, get_index, require_selection, sitting_filter
+from utils.refresh import update_badge
+from utils.render_cache import render_chart
+from utils.visualizations import plot_column_histogram, plot_missing_values
+
+@instrumented_page("Overview")
+def main():
+    update_badge()
+    # Shared sidebar sitting and district filters
+    year, exam = sitting_filter()
+    selected_districts = district_filter(list(get_summary(year, exam).districts.index))
+    require_selection(selected_districts)
+    version = sitting_version(year, exam)
+
+    df = get_index(year, exam).select(selected_districts)
+    profile = get_profile(year, exam, selected_districts)  # Computed once per version and selection
+
+    st.title("🏫 DATASET OVERVIEW")
+    st.markdown("""
+    ### Understanding the Northern Uganda Schools Dataset
+    This page provides an overview of the dataset structure, completeness, and basic statistics.
+    """)
+
+    # Basic info
+    st.header("Dataset Structure")
+    st.write(f"The dataset contains {profile.n_rows} schools across {profile.distinct['DistrictName']} districts.")
+    st.dataframe(df.head())
+    report = memory_report()
+    if report:
+        st.caption(f"In memory: {report['compact_bytes'] / 1024:,.0f} KB with the compact schema "
+                   f"({report['default_bytes'] / 1024:,.0f} KB with default dtypes, "
+                   f"{report['saved_pct']:.0f}% saved)")
+
+    # Missing values
+    st.header("Data Completeness")
+    st.markdown("""
+    The missing values map below shows patterns of data availability. 
+    Each row is a block of records, shaded by the share of missing values - we want to see as little as possible.
+    """)
+    render_chart(plot_missing_values, profile, filters=selected_districts, version=version)
+    st.caption(f"{profile.complete_pct:.1f}% of cells are filled in.")
+    if profile.null_counts.any():
+        missing = profile.null_counts[profile.null_counts > 0]
+        st.dataframe(profile.null_cooccurrence.loc[missing.index, missing.index],
+                     use_container_width=True)
+        st.caption("Rows where both columns are missing (the diagonal is each column's missing count).")
+
+    # Data quality, as recorded when the dataset was validated on load
+    st.header("Data Quality")
+    quality = quality_report()
+    if quality:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Rows Read", f"{quality['rows_read']:,}")
+        col2.metric("Rows Loaded", f"{quality['rows_loaded']:,}")
+        col3.metric("Rows Quarantined", f"{quality['rows_quarantined']:,}",
+                    help="Rows failing a validation rule are left out of every page")
+        rules = pd.DataFrame.from_dict(quality['rules'], orient='index')
+        rules['action'] = rules.pop('quarantine').map({True: 'Quarantined', False: 'Kept'})
+        st.dataframe(rules[['description', 'action', 'rows']], use_container_width=True)
+        if quality['quarantined']:
+            with st.expander(f"🚧 Quarantined rows ({quality['rows_quarantined']:,})"):
+                st.dataframe(pd.DataFrame(quality['quarantined']))
+        st.caption("Covers the whole bundled results file, whatever sitting and districts are selected.")
+
+    # Statistics
+    st.header("Key Statistics")
+    st.dataframe(profile.summary)
+    histogram_column = st.selectbox("Distribution of", list(profile.histograms))
+    render_chart(plot_column_histogram, profile, histogram_column,
+                 filters=selected_districts, version=version, key=histogram_column)
+
+    st.markdown("""
+    **Practical Conclusions:**
+    1. The dataset appears to have [describe completeness]
+    2. Key metrics like [important columns] show [interesting patterns]
+    3. Data quality is [good/needs improvement] for [specific aspects]
+    """)
+
+if __name__ == "__main__":
+    main()
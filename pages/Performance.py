@@ -1,102 +1,145 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-from utils.data_loader import load_data
+from utils.aggregates import TOP_N, get_summary
+from utils.analytics import performance_metrics
+from utils.data_version import sitting_version
+from utils.export import export_button
+from utils.inference import MIN_DISTRICT_SCHOOLS, get_inference
+from utils.instrumentation import instrumented_page
+from utils.query import PERFORMANCE_COLUMNS, district_filter, get_index, require_selection, sitting_filter
+from utils.ranking import METRICS, get_ranking
+from utils.refresh import update_badge
+from utils.render_cache import render_chart
 from utils.visualizations import plot_performance_vs_attendance
 
-# Load data
-df = load_data()
-
-# Calculate performance statistics
-avg_performance = df['A_Percentage'].mean()
-performance_std = df['A_Percentage'].std()
-performance_range = df['A_Percentage'].max() - df['A_Percentage'].min()
-
-# Calculate correlation between performance and absenteeism
-correlation = df[['A_Percentage', 'Absenteeism_Rate']].corr().iloc[0,1]
-
-# District performance analysis
-district_performance = df.groupby('DistrictName')['A_Percentage'].agg(['mean', 'count']).sort_values('mean', ascending=False)
-top_district = district_performance.index[0]
-bottom_district = district_performance.index[-1]
-district_diff = district_performance['mean'].iloc[0] - district_performance['mean'].iloc[-1]
-
-# Set up page
-st.title("🎓 ACADEMIC PERFORMANCE ANALYSIS")
-st.markdown("""
-### Evidence-Based Insights on School Performance
-Quantitative analysis of Grade "A" achievement patterns across Northern Uganda
-""")
-
-# Performance vs Attendance
-st.header("Performance vs Absenteeism Relationship")
-fig = plot_performance_vs_attendance(df)
-st.plotly_chart(fig)
-
-# Performance Statistics
-st.header("Key Performance Metrics")
-col1, col2, col3 = st.columns(3)
-col1.metric("Average Grade 'A' %", f"{avg_performance:.1f}%")
-col2.metric("Performance Range", f"{performance_range:.1f}%")
-col3.metric("Performance Std Dev", f"{performance_std:.1f}%")
-
-# Top performing schools
-st.header("Top 10 Performing Schools")
-top_schools = df.nlargest(10, 'A_Percentage')[['CentreName', 'DistrictName', 'A_Percentage', 'Total']]
-st.dataframe(
-    top_schools.style.format({'A_Percentage': '{:.1f}%', 'Total': '{:,}'}),
-    height=400
-)
-
-# District performance comparison
-st.header("District Performance Comparison")
-st.dataframe(
-    district_performance.style.format({'mean': '{:.1f}%'}),
-    height=400
-)
-
-# Statistical Conclusions
-st.header("📊 Statistical Findings")
-st.markdown(f"""
-1. **Attendance-Performance Relationship**: 
-   - Correlation coefficient: {correlation:.2f}
-   - {'Strong negative' if correlation < -0.5 else 'Moderate negative' if correlation < -0.3 else 'Weak negative' if correlation < 0 else 'No significant'} correlation between absenteeism and performance
-
-2. **Performance Distribution**:
-   - Average Grade "A" rate: {avg_performance:.1f}% ± {performance_std:.1f}%
-   - Range: {performance_range:.1f}% between highest and lowest performing schools
-
-3. **District Variations**:
-   - Highest performing district: {top_district} ({district_performance['mean'].iloc[0]:.1f}%)
-   - Lowest performing district: {bottom_district} ({district_performance['mean'].iloc[-1]:.1f}%)
-   - Difference: {district_diff:.1f} percentage points
-""")
-
-# Practical Recommendations
-st.header("🎯 Actionable Recommendations")
-st.markdown(f"""
-1. **For High-Performing Schools** ({top_district} district):
-   - Document and share teaching methodologies from {top_schools.iloc[0]['CentreName']} (top performer at {top_schools.iloc[0]['A_Percentage']:.1f}%)
-   - Establish peer learning programs with neighboring schools
-
-2. **For Low-Performing Schools** ({bottom_district} district):
-   - Implement targeted teacher training focusing on core subjects
-   - Address absenteeism in schools showing >20% absentee rate
-   - Pair with mentor schools from {top_district}
-
-3. **Attendance Improvement**:
-   - Prioritize schools where absenteeism >15% and performance <{avg_performance:.1f}%
-   - Investigate transportation barriers in rural schools with high absenteeism
-
-4. **Resource Allocation**:
-   - Direct additional teaching materials to schools below {avg_performance - performance_std:.1f}% Grade "A" rate
-   - Consider redistributing teaching staff to balance experience levels
-""")
-
-# Data Export
-st.download_button(
-    label="📥 Download Performance Data",
-    data=df[['CentreName', 'DistrictName', 'A_Percentage', 'Absenteeism_Rate', 'Total']].to_csv(index=False),
-    file_name='uganda_school_performance.csv',
-    mime='text/csv'
-)
\ No newline at end of file
+@instrumented_page("Performance")
+def main():
+    update_badge()
+    # Shared sidebar sitting and district filters
+    year, exam = sitting_filter()
+    selected_districts = district_filter(list(get_summary(year, exam).districts.index))
+    require_selection(selected_districts)
+    version = sitting_version(year, exam)
+
+    # Load data (only the columns this page uses)
+    index = get_index(year, exam, columns=PERFORMANCE_COLUMNS)
+    df = index.select(selected_districts, columns=PERFORMANCE_COLUMNS)
+    summary = get_summary(year, exam, districts=selected_districts)
+
+    # Performance statistics (precomputed per dataset version)
+    inference = get_inference(year, exam, districts=selected_districts)  # Bootstrap CIs, cached per selection
+    metrics = performance_metrics(summary, inference)
+    avg_performance = metrics['avg_performance']
+    performance_std = metrics['performance_std']
+    performance_range = metrics['performance_range']
+
+    # Correlation between performance and absenteeism
+    correlation = metrics['correlation']
+
+    # District performance analysis
+    district_performance = metrics['district_performance']
+    top_district = metrics['top_district']
+    bottom_district = metrics['bottom_district']
+    district_diff = metrics['district_gap']
+    gap = inference.district_gap
+    if inference.top_district:
+        gap_finding = (f"Among districts with at least {MIN_DISTRICT_SCHOOLS} schools, {inference.top_district} "
+                       f"leads {inference.bottom_district} by {gap.value:.1f} points (95% CI {gap.ci_low:.1f} "
+                       f"to {gap.ci_high:.1f}, permutation p = {gap.p_value:.3f} across all such districts)")
+    else:
+        gap_finding = f"Fewer than two districts have {MIN_DISTRICT_SCHOOLS} or more schools to test the gap"
+
+    # Set up page
+    st.title("🎓 ACADEMIC PERFORMANCE ANALYSIS")
+    st.markdown("""
+    ### Evidence-Based Insights on School Performance
+    Quantitative analysis of Grade "A" achievement patterns across Northern Uganda
+    """)
+
+    # Performance vs Attendance
+    st.header("Performance vs Absenteeism Relationship")
+    ALL_DISTRICTS = "All selected districts"
+    drill_district = st.selectbox("🔎 Drill down to individual schools in",
+                                  [ALL_DISTRICTS, *selected_districts],
+                                  help="Large selections are summarised; pick a district to see every school")
+    chart_df = df if drill_district == ALL_DISTRICTS else index.select([drill_district], columns=PERFORMANCE_COLUMNS)
+    render_chart(plot_performance_vs_attendance, chart_df, filters=selected_districts, version=version,
+                 key=drill_district)
+
+    # Performance Statistics
+    st.header("Key Performance Metrics")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Average Grade 'A' %", f"{avg_performance:.1f}%")
+    col2.metric("Performance Range", f"{performance_range:.1f}%")
+    col3.metric("Performance Std Dev", f"{performance_std:.1f}%")
+
+    # Top performing schools
+    st.header("Top 10 Performing Schools")
+    top_schools = metrics['top_schools']
+    rank_metric = st.selectbox("Rank schools by", list(METRICS), format_func=METRICS.get,
+                               help="Composite blends mean grade points, pass rate and Grade \"A\" %")
+    ranked_schools = get_ranking(year, exam).top(TOP_N, rank_metric, selected_districts)
+    st.dataframe(
+        ranked_schools.style.format({rank_metric: '{:.2f}' if rank_metric == 'grade_points' else '{:.1f}%',
+                                     'Total': '{:,}', 'District_Percentile': '{:.0f}'}),
+        height=400
+    )
+
+    # District performance comparison
+    st.header("District Performance Comparison")
+    st.dataframe(
+        district_performance.style.format({'mean': '{:.1f}%'}),
+        height=400
+    )
+
+    # Statistical Conclusions
+    st.header("📊 Statistical Findings")
+    st.markdown(f"""
+    1. **Attendance-Performance Relationship**: 
+       - Correlation coefficient: {correlation:.2f} (95% CI {inference.correlation.ci_low:.2f} to {inference.correlation.ci_high:.2f}, permutation p = {inference.correlation.p_value:.3f})
+       - {metrics['correlation_strength']} correlation between absenteeism and performance
+       - Holding school size fixed, each extra point of absenteeism goes with {inference.absenteeism_slope.value:+.3f} points of Grade "A" (95% CI {inference.absenteeism_slope.ci_low:+.3f} to {inference.absenteeism_slope.ci_high:+.3f})
+       - Each extra 100 students goes with {inference.size_slope.value:+.3f} points of Grade "A" (95% CI {inference.size_slope.ci_low:+.3f} to {inference.size_slope.ci_high:+.3f})
+
+    2. **Performance Distribution**:
+       - Average Grade "A" rate: {avg_performance:.1f}% ± {performance_std:.1f}%
+       - Range: {performance_range:.1f}% between highest and lowest performing schools
+
+    3. **District Variations**:
+       - Highest performing district: {top_district} ({district_performance['mean'].iloc[0]:.1f}%)
+       - Lowest performing district: {bottom_district} ({district_performance['mean'].iloc[-1]:.1f}%)
+       - Difference: {district_diff:.1f} percentage points
+       - {gap_finding}
+    """)
+
+    # Practical Recommendations
+    st.header("🎯 Actionable Recommendations")
+    st.markdown(f"""
+    1. **For High-Performing Schools** ({top_district} district):
+       - Document and share teaching methodologies from {top_schools.iloc[0]['CentreName']} (top performer at {top_schools.iloc[0]['A_Percentage']:.1f}%)
+       - Establish peer learning programs with neighboring schools
+
+    2. **For Low-Performing Schools** ({bottom_district} district):
+       - Implement targeted teacher training focusing on core subjects
+       - Address absenteeism in schools showing >20% absentee rate
+       - Pair with mentor schools from {top_district}
+
+    3. **Attendance Improvement**:
+       - Prioritize schools where absenteeism >15% and performance <{avg_performance:.1f}%
+       - Investigate transportation barriers in rural schools with high absenteeism
+
+    4. **Resource Allocation**:
+       - Direct additional teaching materials to schools below {avg_performance - performance_std:.1f}% Grade "A" rate
+       - Consider redistributing teaching staff to balance experience levels
+    """)
+
+    # Data Export
+    export_button(
+        label="📥 Download Performance Data",
+        df=df,
+        file_stem='uganda_school_performance',
+        filters=selected_districts,
+        version=version
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import streamlit as st
+import pandas as pd
+from utils.aggregates import TOP_N, get_summary
+from utils.data_loader import GRADE_COLUMNS
+from utils.data_version import sitting_version
+from utils.instrumentation import instrumented_page
+from utils.query import get_index, sitting_filter
+from utils.ranking import METRICS, get_ranking
+from utils.refresh import update_badge
+from utils.render_cache import render_chart
+from utils.search import get_search
+from utils.trends import TREND_METRICS, get_trends
+from utils.visualizations import plot_grade_distribution
+
+RESULTS = 8  # Matches listed per search
+QUERY_KEY = 'school_query'
+
+def result_label(result):
+    return f"📍 {result.name} (district)" if result.kind == 'district' else f"🏫 {result.label}"
+
+def school_detail(centre, year, exam):
+    """One school's results against its district and every other school"""
+    name, district = centre['CentreName'], centre['DistrictName']
+    rows = get_index(year, exam).district(district)
+    school = rows[rows['CentreName'] == name].iloc[0]
+    district_row = get_summary(year, exam).districts.loc[district]
+    ranking = get_ranking(year, exam)
+
+    st.header(name)
+    st.caption(f"{district.title()} district · centre No. {centre['No']}")
+    district_absenteeism = district_row['Absent'] / district_row['Total'] * 100
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Candidates", f"{school['Total']:,}")
+    col2.metric("Grade 'A' %", f"{school['A_Percentage']:.1f}%",
+                delta=f"{school['A_Percentage'] - district_row['A_mean']:+.1f} vs district average")
+    col3.metric("Absenteeism", f"{school['Absenteeism_Rate']:.1f}%",
+                delta=f"{school['Absenteeism_Rate'] - district_absenteeism:+.1f} vs district",
+                delta_color='inverse')
+    rank = ranking.rank_of(name, district, 'composite')
+    col4.metric("Regional Rank", f"#{rank} of {len(ranking)}" if rank else "n/a",
+                help="Among Northern Uganda schools in the sitting, by composite score; see Performance for how it is built")
+
+    # Every ranking metric, across the region and within the district
+    st.subheader("Standing")
+    standing = pd.DataFrame([{
+        'Metric': label,
+        'Score': ranking.score_of(name, district, metric),
+        'Regional Rank': ranking.rank_of(name, district, metric),
+        'District Percentile': ranking.percentile_of(ranking.score_of(name, district, metric), metric, district),
+    } for metric, label in METRICS.items()])
+    st.dataframe(standing.style.format({'Score': '{:.2f}', 'District Percentile': '{:.0f}'}),
+                 hide_index=True, use_container_width=True)
+
+    render_chart(plot_grade_distribution, school[GRADE_COLUMNS], filters=[district, name],
+                 version=sitting_version(year, exam), key='school')
+
+    history = get_trends(exam).centre_trend(name, district)
+    if history is not None and len(history) > 1:
+        st.subheader("Year by Year")
+        st.dataframe(history.rename(columns=TREND_METRICS).style.format('{:.1f}'),
+                     use_container_width=True)
+
+def district_detail(district, year, exam):
+    """A district's headline numbers and its best schools"""
+    district_row = get_summary(year, exam).districts.loc[district]
+
+    st.header(f"{district.title()} District")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Schools", f"{district_row['schools']:,}")
+    col2.metric("Students", f"{district_row['Total']:,}")
+    col3.metric("Average Grade 'A' %", f"{district_row['A_mean']:.1f}%")
+
+    st.subheader(f"Top {TOP_N} Schools")
+    top_schools = get_ranking(year, exam).top(TOP_N, 'composite', [district])
+    st.dataframe(top_schools.style.format({'composite': '{:.1f}', 'Total': '{:,}',
+                                           'District_Percentile': '{:.0f}'}),
+                 hide_index=True, use_container_width=True)
+
+    render_chart(plot_grade_distribution, district_row[GRADE_COLUMNS].astype(int), filters=[district],
+                 version=sitting_version(year, exam), key='district')
+
+@instrumented_page("School")
+def main():
+    update_badge()
+    year, exam = sitting_filter()
+    st.title("🔎 FIND A SCHOOL")
+    st.markdown("""
+    ### Search by School or District Name
+    Spelling, spacing and punctuation don't need to match exactly
+    """)
+
+    # The query is mirrored in the URL so a search can be shared
+    if QUERY_KEY not in st.session_state:
+        st.session_state[QUERY_KEY] = st.query_params.get('q', '')
+    query = st.text_input("Search", key=QUERY_KEY, placeholder="e.g. st gracious lira",
+                          label_visibility='collapsed')
+    if not query.strip():
+        st.info("Type part of a school or district name to search.")
+        st.stop()
+    st.query_params['q'] = query
+
+    search = get_search(year, exam)  # Built once per dataset version
+    results = search.search(query, limit=RESULTS)
+    if not results:
+        st.warning(f"⚠️ No school or district matches \"{query}\"")
+        st.stop()
+    result = st.radio("Matches", results, format_func=result_label)
+
+    if result.kind == 'district':
+        district_detail(result.name, year, exam)
+    else:
+        school_detail(search.centre(result.row), year, exam)
+
+if __name__ == "__main__":
+    main()
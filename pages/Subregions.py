@@ -0,0 +1,152 @@
+import streamlit as st
+from utils.aggregates import get_summary
+from utils.data_version import sitting_version
+from utils.export import export_button
+from utils.instrumentation import instrumented_page
+from utils.query import district_filter, get_index, sitting_filter
+from utils.refresh import update_badge
+from utils.render_cache import render_chart
+from utils.subregions import get_subregion_summaries
+from utils.visualizations import (plot_enrollment_by_district, plot_grade_distribution,
+                                  plot_performance_distribution)
+
+def safe_load_data(year, exam, districts):
+    """Wrapper with error handling for data loading"""
+    try:
+        return get_index(year, exam).select(districts)
+    except Exception as e:
+        st.error(f"❌ Data loading failed: {str(e)}")
+        st.stop()
+    return None
+
+def district_list(districts):
+    """'Adjumani', 'Adjumani and Moyo', 'Adjumani, Moyo and Obongi'"""
+    names = [d.title() for d in districts]
+    return names[0] if len(names) == 1 else f"{', '.join(names[:-1])} and {names[-1]}"
+
+@instrumented_page("Subregions")
+def main():
+    update_badge()
+    st.title("SUB-REGION ANALYSIS")
+
+    # Every subregion is summarized once per dataset version
+    year, exam = sitting_filter()
+    version = sitting_version(year, exam)
+    subregions = get_subregion_summaries(year, exam)
+    if not subregions:
+        st.warning("⚠️ None of the configured sub-regions have districts in the data")
+        st.stop()
+    selected_districts = district_filter(list(get_summary(year, exam).districts.index))
+    name = st.selectbox("🌍 Sub-region", list(subregions),
+                        help="Sub-regions are configured in config/subregions.json")
+
+    # Limit the subregion to the districts kept by the sidebar filter
+    summary = subregions[name].restrict(selected_districts)
+    if summary is None:
+        st.warning(f"⚠️ No {name} sub-region districts found in data or in the district filter")
+        st.stop()
+    available_districts = summary.district_names
+    st.markdown(f"### Focused Analysis of {district_list(available_districts)} "
+                f"District{'s' if len(available_districts) > 1 else ''}")
+
+    # Load only this subregion's districts safely
+    region_df = safe_load_data(year, exam, available_districts)  # Copy-on-write view; no defensive copy
+
+    # Validate data structure
+    required_columns = {'DistrictName', 'Total'}
+    if not required_columns.issubset(region_df.columns):
+        missing = required_columns - set(region_df.columns)
+        st.error(f"Missing required columns: {', '.join(missing)}")
+        st.stop()
+
+    # Key metrics from the cached subregion summary
+    district_rows = summary.districts
+    top_school = summary.top_school
+
+    # Overview metrics
+    with st.container():
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Total Schools", summary.schools)
+        col2.metric("Total Students", f"{summary.students:,}")
+        col3.metric("Avg School Size", f"{summary.mean_size:.1f}")
+
+    # District comparison tabs
+    tab1, tab2 = st.tabs(["📊 Enrollment", "🏆 Performance"])
+
+    with tab1:
+        # Enrollment analysis
+        enrollment_by_district = district_rows[['Total', 'schools', 'mean_size', 'share']].reset_index()
+        render_chart(plot_enrollment_by_district, enrollment_by_district, filters=available_districts,
+                     version=version)
+
+        # Enrollment insights
+        st.subheader("Enrollment Insights")
+        lines = [f"- **{row.DistrictName}** has {row.Total:,} students across {row.schools} schools "
+                 f"({row.share:.1f}% of the sub-region)"
+                 for row in enrollment_by_district.itertuples()]
+        if len(enrollment_by_district) > 1:
+            lines.append(f"- Average class size differs by {summary.size_gap:.1f} students between districts")
+        st.markdown("\n".join(lines))
+
+    with tab2:
+        if 'A_Percentage' in region_df.columns:
+            # Performance analysis
+            render_chart(plot_performance_distribution, region_df, filters=available_districts, version=version)
+            render_chart(plot_grade_distribution, summary.grade_counts, filters=available_districts,
+                         version=version)
+
+            # Performance insights
+            st.subheader("Performance Insights")
+            district_averages = "\n".join(
+                f"  - {district}: {row.A_mean:.1f}% ({row.A_gap:+.1f} vs sub-region)"
+                for district, row in district_rows.sort_values('A_mean', ascending=False).iterrows())
+            gap = (f"\n- Performance gap between districts: {summary.performance_gap:.1f} percentage points"
+                   if len(district_rows) > 1 else "")
+            st.markdown(
+                f"- **Top Performing School**: {top_school['CentreName']} ({top_school['DistrictName']}) with {top_school['A_Percentage']:.1f}% Grade \"A\"s\n"
+                f"- **District Averages**:\n{district_averages}{gap}"
+            )
+        else:
+            st.warning("Performance data not available")
+
+    # Actionable Recommendations
+    st.header("🎯 Strategic Recommendations")
+    if 'A_Percentage' in region_df.columns:
+        better_district = summary.best_district
+        weaker_district = summary.weakest_district
+
+        st.markdown(f"""
+        1. **Knowledge Transfer Program**:
+           - Establish mentorship between top-performing {better_district} schools and {weaker_district} schools
+           - Focus on {top_school['CentreName']}'s best practices (achieving {top_school['A_Percentage']:.1f}% Grade "A"s)
+
+        2. **Resource Allocation**:
+           - Prioritize teaching materials to schools below {summary.avg_performance:.1f}% Grade "A" rate
+           - Balance teacher distribution (current range: {summary.min_size:,}-{summary.max_size:,} students per school)
+
+        3. **District-Specific Interventions**:
+           - {better_district}: Maintain excellence through advanced teacher training
+           - {weaker_district}: Implement remedial programs targeting core subject weaknesses
+        """)
+    else:
+        st.markdown("""
+        1. **Enrollment-Based Planning**:
+           - Optimize class sizes where enrollment exceeds district average
+           - Consider redistricting for balanced school populations
+
+        2. **Infrastructure Development**:
+           - Prioritize expansions in schools nearing capacity
+           - Upgrade facilities in oldest/most crowded schools first
+        """)
+
+    # Data download
+    export_button(
+        f"📥 Download {name} Region Data",
+        region_df,
+        f"{name.lower().replace(' ', '_')}_schools_data",
+        filters=available_districts,
+        version=version
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Precomputed dataset aggregates shared by every page.
+
+`summarize` makes one pass over the school-level frame and keeps only
+district-level tables and a handful of scalars, so pages render in
+O(districts) instead of re-scanning every school on each rerun.
+"""
+from dataclasses import dataclass
+
+import pandas as pd
+
+from utils import partitions
+from utils.data_loader import DistrictRunningStats, get_dataset, get_ingestor
+from utils.data_version import current_version, dataset_version
+from utils.instrumentation import cache_resource, timed
+from utils.query import get_index
+
+LARGE_SCHOOL = 500  # Students; "overcrowded" threshold used across pages
+SMALL_SCHOOL = 100  # Students; consolidation candidates
+HIGH_ABSENTEEISM = 15  # Percent
+TOP_N = 10
+
+
+@dataclass(frozen=True)
+class SelectionSummary:
+    """Headline numbers for a set of districts, derived from district rows"""
+    schools: int
+    students: int
+    mean_size: float
+    min_size: int
+    max_size: int
+    avg_performance: float
+
+
+@dataclass(frozen=True)
+class DatasetSummary:
+    """Everything the pages read, computed once per dataset version"""
+    n_schools: int
+    total_students: int
+    size_stats: pd.Series  # describe() of Total, with 25/50/75%
+    performance_stats: pd.Series  # describe() of A_Percentage
+    correlation: float  # A_Percentage vs Absenteeism_Rate
+    districts: pd.DataFrame  # One row per district, see DistrictRunningStats.district_table
+    top_schools: pd.DataFrame  # Top N schools by A_Percentage
+    largest_school: pd.Series
+    smallest_school: pd.Series
+    large_schools: int
+    large_school_students: int
+    small_schools: int
+
+    @property
+    def district_enrollment(self):
+        """Total students per district, largest first"""
+        return self.districts['Total'].sort_values(ascending=False)
+
+    @property
+    def district_performance(self):
+        """Mean A_Percentage and school count per district, best first"""
+        return (self.districts[['A_mean', 'schools']]
+                .rename(columns={'A_mean': 'mean', 'schools': 'count'})
+                .sort_values('mean', ascending=False))
+
+    @property
+    def top_performer(self):
+        return self.top_schools.iloc[0]
+
+    @property
+    def high_absenteeism_districts(self):
+        """Districts with at least one school above HIGH_ABSENTEEISM"""
+        return list(self.districts.index[self.districts['max_absenteeism'] > HIGH_ABSENTEEISM])
+
+    def for_districts(self, districts):
+        """Aggregate the district rows for a selection of districts"""
+        rows = self.districts.loc[self.districts.index.intersection(list(districts))]
+        schools = int(rows['schools'].sum())
+        students = int(rows['Total'].sum())
+        return SelectionSummary(
+            schools=schools,
+            students=students,
+            mean_size=students / schools if schools else float('nan'),
+            min_size=int(rows['min_size'].min()) if schools else 0,
+            max_size=int(rows['max_size'].max()) if schools else 0,
+            avg_performance=rows['A_sum'].sum() / schools if schools else float('nan'),
+        )
+
+
+@timed('aggregate.summarize')
+def summarize(df, districts=None, top_n=TOP_N):
+    """Compute the DatasetSummary for a cleaned frame.
+
+    `districts` may be a district table kept up to date incrementally (see
+    DistrictRunningStats); otherwise it is built from `df`.
+    """
+    if districts is None:
+        districts = DistrictRunningStats.from_frame(df).district_table()
+    total = df['Total']
+    large = total > LARGE_SCHOOL
+    return DatasetSummary(
+        n_schools=len(df),
+        total_students=int(total.sum()),
+        size_stats=total.describe(percentiles=[.25, .5, .75]),
+        performance_stats=df['A_Percentage'].describe(),
+        correlation=float(df['A_Percentage'].corr(df['Absenteeism_Rate'])),
+        districts=districts,
+        top_schools=df.nlargest(top_n, 'A_Percentage')[
+            ['CentreName', 'DistrictName', 'A_Percentage', 'Total']],
+        largest_school=df.loc[total.idxmax()],
+        smallest_school=df.loc[total.idxmin()],
+        large_schools=int(large.sum()),
+        large_school_students=int(total[large].sum()),
+        small_schools=int((total < SMALL_SCHOOL).sum()),
+    )
+
+
+@cache_resource('summary', max_entries=2, show_spinner=False)
+def _summary_for_version(version):
+    frame, districts = get_ingestor().snapshot()
+    return summarize(frame, districts=districts)
+
+
+@cache_resource('summary_selection', max_entries=8, show_spinner=False)
+def _summary_for_selection(version, year, exam):
+    return summarize(get_dataset(year=year, exam=exam).view())
+
+
+@cache_resource('summary_districts', max_entries=32, show_spinner=False)
+def _summary_for_districts(version, year, exam, districts):
+    whole = get_summary(year, exam)
+    rows = whole.districts.loc[whole.districts.index.intersection(list(districts))]
+    return summarize(get_index(year, exam).select(districts), districts=rows)
+
+
+def get_summary(year=None, exam=None, districts=None):
+    """Shared, read-only summary for the current dataset version.
+
+    Without arguments this covers the bundled dataset; `year`/`exam` select
+    an exam sitting from the partitioned store instead, and `districts`
+    narrows it to the sidebar selection (memoized per selection).
+    """
+    if (year is None and exam is None) or not partitions.has_partitions():
+        whole = _summary_for_version(current_version())
+    else:
+        whole = _summary_for_selection(current_version(partitions.MANIFEST_PATH), year, exam)
+    if districts is None or set(whole.districts.index) <= set(districts):
+        return whole
+    return _summary_for_districts(dataset_version(year, exam), year, exam,
+                                  tuple(sorted(districts)))
@@ -0,0 +1,144 @@
+"""Page metrics and recommendations as plain Python, with no Streamlit calls.
+
+The dashboard pages and the batch report generator (utils.reports) both
+read their numbers from here, so an offline report for a district says
+exactly what the page would say for the same selection.
+"""
+from dataclasses import dataclass, field
+
+from utils.aggregates import HIGH_ABSENTEEISM, LARGE_SCHOOL, SMALL_SCHOOL, summarize
+from utils.instrumentation import timed
+
+
+def correlation_strength(r, significant=True):
+    """Wording used by the pages for a Pearson correlation.
+
+    `significant` is False when the correlation's confidence interval
+    includes zero (see utils.inference); the size of r is then moot.
+    """
+    if not significant:
+        return 'No significant'
+    if r < -0.5:
+        return 'Strong negative'
+    if r < -0.3:
+        return 'Moderate negative'
+    if r < 0:
+        return 'Weak negative'
+    return 'No significant'
+
+
+@timed('aggregate.enrollment_metrics')
+def enrollment_metrics(summary):
+    """Numbers behind the Enrollment page"""
+    district_enrollment = summary.district_enrollment
+    total = summary.total_students
+    top = district_enrollment.head(3)
+    return {
+        'n_schools': summary.n_schools,
+        'n_districts': len(district_enrollment),
+        'total_students': total,
+        'district_enrollment': district_enrollment,
+        'top_districts': top,
+        'concentration_pct': top.sum() / total * 100,
+        'bottom5_pct': district_enrollment.tail(5).sum() / total * 100,
+        'smallest_district': district_enrollment.index[-1],
+        'size_stats': summary.size_stats,
+        'large_schools': summary.large_schools,
+        'large_share_pct': summary.large_school_students / total * 100,
+        'small_schools': summary.small_schools,
+        'largest_school': summary.largest_school,
+        'smallest_school': summary.smallest_school,
+    }
+
+
+@timed('aggregate.performance_metrics')
+def performance_metrics(summary, inference=None):
+    """Numbers behind the Performance and Insights pages.
+
+    With an InferenceSummary for the same rows, the correlation wording
+    follows its confidence interval.
+    """
+    stats = summary.performance_stats
+    significant = True if inference is None else inference.correlation.significant
+    district_performance = summary.district_performance
+    return {
+        'avg_performance': stats['mean'],
+        'performance_std': stats['std'],
+        'performance_range': stats['max'] - stats['min'],
+        'correlation': summary.correlation,
+        'correlation_strength': correlation_strength(summary.correlation, significant),
+        'district_performance': district_performance,
+        'top_district': district_performance.index[0],
+        'bottom_district': district_performance.index[-1],
+        'district_gap': district_performance['mean'].iloc[0] - district_performance['mean'].iloc[-1],
+        'top_schools': summary.top_schools,
+        'top_performer': summary.top_performer,
+        'high_absenteeism_districts': summary.high_absenteeism_districts,
+    }
+
+
+@dataclass
+class Report:
+    """Metrics and narrative for one scope (all data, a subregion or a district)"""
+    kind: str
+    name: str
+    metrics: dict
+    sections: list = field(default_factory=list)  # [(heading, [bullet, ...]), ...]
+
+
+def build_report(kind, name, df):
+    """Compute the page metrics for `df` and phrase them as report sections"""
+    summary = summarize(df)
+    e = enrollment_metrics(summary)
+    p = performance_metrics(summary)
+    size = e['size_stats']
+    top = p['top_performer']
+
+    sections = [
+        ("Key Figures", [
+            f"{e['n_schools']:,} schools in {e['n_districts']} district(s) with {e['total_students']:,} students",
+            f"Average school size {size['mean']:.1f} students (range {size['min']:.0f}-{size['max']:.0f})",
+            f"Average Grade \"A\" rate {p['avg_performance']:.1f}% ± {p['performance_std']:.1f}%",
+        ]),
+        ("Enrollment Patterns", [
+            f"{e['concentration_pct']:.1f}% of students are in the top {len(e['top_districts'])} "
+            f"district(s) ({', '.join(e['top_districts'].index)})",
+            f"50% of schools have between {size['25%']:.0f}-{size['75%']:.0f} students",
+            f"{e['large_schools']} schools (>{LARGE_SCHOOL} students) account for "
+            f"{e['large_share_pct']:.1f}% of enrollment",
+            f"Largest: {e['largest_school']['Total']:,} students ({e['largest_school']['CentreName']})",
+            f"Smallest: {e['smallest_school']['Total']:,} students ({e['smallest_school']['CentreName']})",
+        ]),
+        ("Academic Performance", [
+            f"Top performer: {top['CentreName']} ({top['DistrictName']}) at {top['A_Percentage']:.1f}% Grade \"A\"",
+            f"{p['correlation_strength']} correlation between absenteeism and performance "
+            f"(r = {p['correlation']:.2f})",
+            f"Highest performing district: {p['top_district']} "
+            f"({p['district_performance']['mean'].iloc[0]:.1f}%); lowest: {p['bottom_district']} "
+            f"({p['district_performance']['mean'].iloc[-1]:.1f}%)",
+        ]),
+        ("Recommendations", [
+            f"Immediate expansion for {e['large_schools']} overcrowded schools (>{LARGE_SCHOOL} students)",
+            f"Evaluate merging possibilities for {e['small_schools']} schools with <{SMALL_SCHOOL} students",
+            f"Document and share teaching methods from {top['CentreName']}",
+            f"Direct additional teaching materials to schools below "
+            f"{p['avg_performance'] - p['performance_std']:.1f}% Grade \"A\" rate",
+            "Target districts with >{}% absenteeism: {}".format(
+                HIGH_ABSENTEEISM, ', '.join(p['high_absenteeism_districts']) or 'none'),
+        ]),
+    ]
+    metrics = {
+        'schools': e['n_schools'],
+        'districts': e['n_districts'],
+        'students': e['total_students'],
+        'mean_school_size': size['mean'],
+        'median_school_size': size['50%'],
+        'large_schools': e['large_schools'],
+        'small_schools': e['small_schools'],
+        'avg_a_percentage': p['avg_performance'],
+        'std_a_percentage': p['performance_std'],
+        'correlation_a_absenteeism': p['correlation'],
+        'top_school': top['CentreName'],
+        'top_school_a_percentage': top['A_Percentage'],
+    }
+    return Report(kind=kind, name=name, metrics=metrics, sections=sections)
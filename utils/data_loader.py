@@ -1,23 +1,727 @@
+import hashlib
+import io
+import json
+import threading
+from dataclasses import dataclass
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
 import streamlit as st
 from pathlib import Path
 
-@st.cache_data(ttl=10)  # Refresh every 10 seconds
-def load_data():
-    """Load data with automatic refresh when file changes"""
-    data_path = Path(__file__).parent.parent / "data" / "northern_uganda_schools.csv"
-    
+from utils.instrumentation import cache_resource, count_cache, timed
+
+if int(pd.__version__.split('.')[0]) < 3:
+    # Shared frames rely on copy-on-write, which is the default from pandas 3
+    pd.set_option('mode.copy_on_write', True)
+
+DATA_PATH = Path(__file__).parent.parent / "data" / "northern_uganda_schools.csv"
+CACHE_DIR = DATA_PATH.parent / ".cache"
+MANIFEST_PATH = CACHE_DIR / "manifest.json"
+DATA_EXAM = 'UCE'  # What the bundled CSV holds
+DATA_YEAR = 2024
+
+# Bump whenever the cleaning steps below change so stale caches are ignored
+CACHE_SCHEMA_VERSION = 3
+
+GRADE_COLUMNS = ['As', 'Bs', 'Cs', 'Ds', 'Es']
+COUNT_COLUMNS = [*GRADE_COLUMNS, 'Absent', 'Total']
+RAW_COLUMNS = ['No', 'DistrictName', 'CentreName', *COUNT_COLUMNS]
+# Compact in-memory schema. Unsigned counts are widened per column if a
+# value doesn't fit (see _fit_unsigned); names are stored once per distinct
+# value as categoricals, which also interns centre names across years.
+COLUMN_DTYPES = {
+    'No': 'UInt32',
+    'DistrictName': 'category',
+    'CentreName': 'category',
+    **{col: 'uint16' for col in GRADE_COLUMNS},
+    'Absent': 'uint16',
+    'Total': 'uint32',
+    'A_Percentage': 'float32',
+    'Absenteeism_Rate': 'float32',
+}
+UNSIGNED_LADDER = ['uint8', 'uint16', 'uint32', 'uint64']
+# Known alternative spellings, mapped after stripping and upper-casing
+DISTRICT_ALIASES = {
+    'MADI OKOLLO': 'MADI-OKOLLO',
+    'NAKAPIRIPIRTI': 'NAKAPIRIPIRIT',
+}
+QUARANTINE_SAMPLE = 500  # Quarantined rows kept in a quality report
+
+_memory_reports = {}
+_quality_reports = {}
+
+
+def _content_digest(path, length=None):
+    """SHA-256 object over a file (or its first `length` bytes), 1 MiB at a time"""
+    digest = hashlib.sha256()
+    remaining = float('inf') if length is None else length
+    with open(path, 'rb') as f:
+        while remaining > 0:
+            block = f.read(int(min(1 << 20, remaining)))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest
+
+
+def _content_hash(path):
+    return _content_digest(path).hexdigest()
+
+
+def _read_manifest():
+    try:
+        return json.loads(MANIFEST_PATH.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(manifest):
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        MANIFEST_PATH.write_text(json.dumps(manifest, indent=2))
+    except OSError:
+        pass  # A read-only checkout just means we re-hash next time
+
+
+def source_fingerprint(path=DATA_PATH):
+    """Return (mtime_ns, size, sha256) for a source file.
+
+    The content hash is only recomputed when mtime or size differ from the
+    manifest entry, so an unchanged file costs a single stat() call.
+    """
+    path = Path(path)
+    stat = path.stat()
+    manifest = _read_manifest()
+    entry = manifest.get(str(path.resolve()))
+    if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+        return stat.st_mtime_ns, stat.st_size, entry['sha256']
+
+    sha256 = _content_hash(path)
+    _record_fingerprint(path, stat.st_mtime_ns, stat.st_size, sha256, manifest)
+    return stat.st_mtime_ns, stat.st_size, sha256
+
+
+def _record_fingerprint(path, mtime_ns, size, sha256, manifest=None):
+    manifest = _read_manifest() if manifest is None else manifest
+    manifest[str(Path(path).resolve())] = {
+        'mtime_ns': mtime_ns,
+        'size': size,
+        'sha256': sha256,
+    }
+    _write_manifest(manifest)
+
+
+def _cache_path(path, sha256):
+    return CACHE_DIR / f"{Path(path).stem}-v{CACHE_SCHEMA_VERSION}-{sha256[:16]}.feather"
+
+
+class SchemaError(ValueError):
+    """Raised when result rows don't match the expected columns or counts"""
+
+
+@dataclass(frozen=True)
+class QualityRule:
+    """A row check over whole columns: `check(df, raw)` is True for failing rows.
+
+    `df` holds the normalised names and numeric counts, `raw` the rows as
+    read. Rows failing a `quarantine` rule are dropped from the dataset and
+    listed in the quality report; other rules are only counted.
+    """
+    name: str
+    description: str
+    check: object
+    quarantine: bool = True
+
+
+def _unreconciled(df, raw):
+    complete = df[COUNT_COLUMNS].notna().all(axis=1)  # Incomplete rows fail non_numeric_count
+    counts = df[COUNT_COLUMNS].fillna(0).astype('int64')  # No unsigned wrap-around in the sum
+    return complete & (counts[[*GRADE_COLUMNS, 'Absent']].sum(axis=1) != counts['Total'])
+
+
+QUALITY_RULES = [
+    QualityRule('missing_name', "District or centre name is missing",
+                lambda df, raw: df['DistrictName'].isna() | df['CentreName'].isna()),
+    QualityRule('non_numeric_count', "A grade, Absent or Total count is missing or not a number",
+                lambda df, raw: df[COUNT_COLUMNS].isna().any(axis=1)),
+    QualityRule('negative_count', "A count is negative",
+                lambda df, raw: (df[COUNT_COLUMNS] < 0).any(axis=1)),
+    QualityRule('zero_total', "Total is zero, so no rate can be computed",
+                lambda df, raw: df['Total'] == 0),
+    QualityRule('unreconciled', "As+Bs+Cs+Ds+Es+Absent does not equal Total", _unreconciled),
+    QualityRule('duplicate_centre', "Centre already listed in the same district",
+                lambda df, raw: df.duplicated(['DistrictName', 'CentreName'], keep='first')),
+    QualityRule('district_renamed', "District name normalised (case, spacing or known alias)",
+                lambda df, raw: df['DistrictName'].notna()
+                & (raw['DistrictName'].map(str, na_action='ignore') != df['DistrictName']),
+                quarantine=False),
+]
+
+
+def _normalise_names(series, aliases=None):
+    names = series.astype(object).map(str, na_action='ignore').str.strip()
+    names = names.mask(names == '')
+    if aliases is not None:
+        names = names.str.upper().str.replace(r'\s+', ' ', regex=True).replace(aliases)
+    return names
+
+
+def centre_keys(df):
+    """(DistrictName, CentreName) of every row, as a set"""
+    return set(zip(df['DistrictName'].astype(str), df['CentreName'].astype(str)))
+
+
+def validate_frame(df, existing=None):
+    """Run QUALITY_RULES over raw result rows in one pass.
+
+    Returns (rows that passed, with normalised names and int64 counts;
+    quality report). Only a missing column fails the whole frame, with
+    SchemaError. `existing` holds the (DistrictName, CentreName) keys of
+    rows already loaded; repeating one fails duplicate_centre, as it would
+    in a full load.
+    """
+    raw = df.rename(columns=lambda col: str(col).strip())
+    missing = [col for col in RAW_COLUMNS if col not in raw.columns]
+    if missing:
+        raise SchemaError(f"Expected columns {RAW_COLUMNS}; missing {missing}")
+
+    prepared = raw[RAW_COLUMNS].assign(
+        **{col: pd.to_numeric(raw[col], errors='coerce') for col in COUNT_COLUMNS},
+        DistrictName=_normalise_names(raw['DistrictName'], DISTRICT_ALIASES),
+        CentreName=_normalise_names(raw['CentreName']),
+    )
+    flags = pd.DataFrame({rule.name: np.asarray(rule.check(prepared, raw), dtype=bool)
+                          for rule in QUALITY_RULES}, index=prepared.index)
+    if existing:
+        keys = zip(prepared['DistrictName'], prepared['CentreName'])
+        flags['duplicate_centre'] |= np.fromiter((key in existing for key in keys), dtype=bool,
+                                                 count=len(prepared))
+    blocking = [rule.name for rule in QUALITY_RULES if rule.quarantine]
+    bad = flags[blocking].any(axis=1)
+
+    quarantined = prepared[bad]
+    failed = flags.loc[bad, blocking]
+    sample = quarantined.head(QUARANTINE_SAMPLE).astype(object)
+    sample = sample.where(sample.notna(), None).assign(
+        row=sample.index.astype(int),
+        rules=[', '.join(failed.columns[row]) for row in failed.head(QUARANTINE_SAMPLE).to_numpy()],
+    )
+    report = {
+        'rows_read': len(prepared),
+        'rows_loaded': int((~bad).sum()),
+        'rows_quarantined': int(bad.sum()),
+        'unexpected_columns': [col for col in raw.columns if col not in RAW_COLUMNS],
+        'rules': {rule.name: {'description': rule.description, 'quarantine': rule.quarantine,
+                              'rows': int(flags[rule.name].sum())} for rule in QUALITY_RULES},
+        'quarantined': sample.to_dict('records'),
+    }
+    kept = prepared[~bad].astype({col: 'int64' for col in COUNT_COLUMNS})
+    return kept, report
+
+
+def quality_report(path=DATA_PATH):
+    """The quality report from the last validation of a source file, if known"""
+    return _quality_reports.get(str(Path(path).resolve()))
+
+
+def _merge_quality_report(path, report):
+    """Fold the report for appended rows into the file's report"""
+    key = str(Path(path).resolve())
+    current = _quality_reports.get(key)
+    if current is None:
+        _quality_reports[key] = report
+        return
+    merged = {
+        'rows_read': current['rows_read'] + report['rows_read'],
+        'rows_loaded': current['rows_loaded'] + report['rows_loaded'],
+        'rows_quarantined': current['rows_quarantined'] + report['rows_quarantined'],
+        'unexpected_columns': current['unexpected_columns'],
+        'rules': {name: {**rule, 'rows': rule['rows'] + report['rules'][name]['rows']}
+                  for name, rule in current['rules'].items()},
+        'quarantined': (current['quarantined'] + report['quarantined'])[:QUARANTINE_SAMPLE],
+    }
+    _quality_reports[key] = merged
+
+
+def _derive_metrics(df):
+    """Strip headers and add the derived percentage columns"""
+    df.columns = df.columns.str.strip()
+
+    # Calculate metrics
+    if 'Total' in df.columns and 'As' in df.columns:
+        df['A_Percentage'] = (df['As'] / df['Total']) * 100
+    if 'Absent' in df.columns and 'Total' in df.columns:
+        df['Absenteeism_Rate'] = (df['Absent'] / df['Total']) * 100
+    return df
+
+
+def _fit_unsigned(series, dtype):
+    """`dtype`, or the next wider unsigned type if the values don't fit"""
+    if series.empty:
+        return dtype
+    if series.min() < 0:
+        return 'int64'  # Left for validation to report rather than wrapping
+    largest = series.max()
+    for candidate in UNSIGNED_LADDER[UNSIGNED_LADDER.index(dtype):]:
+        if largest <= np.iinfo(candidate).max:
+            return candidate
+    return 'int64'
+
+
+def compact_frame(df):
+    """Apply the compact COLUMN_DTYPES schema to a frame"""
+    dtypes = {}
+    for col, dtype in COLUMN_DTYPES.items():
+        if col not in df.columns:
+            continue
+        if dtype in UNSIGNED_LADDER and pd.api.types.is_integer_dtype(df[col]):
+            dtype = _fit_unsigned(df[col], dtype)
+        elif dtype == 'UInt32' and not (df[col].dropna() % 1 == 0).all():
+            dtype = 'float64'  # Non-integral centre numbers; keep them as read
+        dtypes[col] = dtype
+    return df.astype(dtypes)
+
+
+def clean_frame(df):
+    """Strip headers, derive metrics and apply the compact schema"""
+    return compact_frame(_derive_metrics(df))
+
+
+def frame_bytes(df):
+    """Deep in-memory size of a frame, including string payloads"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def memory_report(path=DATA_PATH):
+    """Bytes the cleaned frame takes with default vs compact dtypes, if known"""
+    return _memory_reports.get(str(Path(path).resolve()))
+
+
+def _set_memory_report(path, default_bytes, compact_bytes):
+    report = {
+        'default_bytes': default_bytes,
+        'compact_bytes': compact_bytes,
+        'saved_bytes': default_bytes - compact_bytes,
+        'saved_pct': 100 * (1 - compact_bytes / default_bytes) if default_bytes else 0.0,
+    }
+    _memory_reports[str(Path(path).resolve())] = report
+    return report
+
+
+@timed('load.read_dataset')
+def read_dataset(path=DATA_PATH):
+    """Read the cleaned dataset, going through the columnar cache.
+
+    The cleaned frame is stored as an uncompressed Arrow IPC (Feather) file
+    named after the source content hash, so a warm read is a memory-map
+    rather than a CSV parse.
+    """
+    _, _, sha256 = source_fingerprint(path)
+    cache_file = _cache_path(path, sha256)
+
+    count_cache('feather', cache_file.exists())
+    if cache_file.exists():
+        try:
+            table = feather.read_table(cache_file, memory_map=True)
+            metadata = table.schema.metadata or {}
+            report = json.loads(metadata.get(b'memory_report', b'null'))
+            if report:
+                _set_memory_report(path, report['default_bytes'], report['compact_bytes'])
+            quality = json.loads(metadata.get(b'quality_report', b'null'))
+            if quality:
+                _quality_reports[str(Path(path).resolve())] = quality
+            return table.to_pandas()
+        except Exception:
+            cache_file.unlink(missing_ok=True)  # Corrupt or truncated cache
+
+    df, quality = validate_frame(pd.read_csv(path))
+    _quality_reports[str(Path(path).resolve())] = quality
+    df = _derive_metrics(df)
+    default_bytes = frame_bytes(df)
+    df = compact_frame(df)
+    report = _set_memory_report(path, default_bytes, frame_bytes(df))
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix('.tmp')
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b'memory_report': json.dumps(report).encode(),
+            b'quality_report': json.dumps(quality, default=str).encode(),
+        })
+        feather.write_feather(table, tmp_file, compression='uncompressed')
+        tmp_file.replace(cache_file)
+        stem = Path(path).stem
+        for stale in CACHE_DIR.glob(f"{stem}-v*-*.feather"):
+            # Other CSVs' caches can match the glob ("results-2023" for "results")
+            if stale != cache_file and stale.stem.rsplit('-', 2)[0] == stem:
+                stale.unlink(missing_ok=True)
+    except OSError:
+        pass  # Serve the parsed frame even if the cache can't be written
+    return df
+
+
+def validate_batch(df, existing=None):
+    """Check raw result rows against QUALITY_RULES and return them cleaned.
+
+    Unlike a full load, nothing is quarantined: any failing row (or an
+    unexpected column) rejects the whole batch with SchemaError. `existing`
+    is passed on to validate_frame.
+    """
+    rows, report = validate_frame(df, existing)
+    if report['unexpected_columns']:
+        raise SchemaError(f"Expected columns {RAW_COLUMNS}; unexpected {report['unexpected_columns']}")
+    if report['rows_quarantined']:
+        failed = {name: rule['rows'] for name, rule in report['rules'].items()
+                  if rule['quarantine'] and rule['rows']}
+        first = report['quarantined'][0]['row']
+        raise SchemaError(f"{report['rows_quarantined']} row(s) failed validation {failed} "
+                          f"(first at position {first})")
+    return clean_frame(rows)
+
+
+def append_rows(frame, batch):
+    """Concatenate two compact frames without losing categorical columns.
+
+    New categories are appended to the existing ones, so the codes already
+    in `frame` stay valid and only the batch is re-encoded.
+    """
+    frame, batch = frame.copy(deep=False), batch.copy(deep=False)
+    for col in frame.columns:
+        if isinstance(frame[col].dtype, pd.CategoricalDtype) and col in batch.columns:
+            new = batch[col].astype('category').cat.categories.difference(frame[col].cat.categories)
+            frame[col] = frame[col].cat.add_categories(new)
+            batch[col] = batch[col].astype(frame[col].dtype)
+    return pd.concat([frame, batch])
+
+
+class DistrictRunningStats:
+    """Per-district running aggregates, merged one batch at a time.
+
+    Means and variances use the parallel form of Welford's algorithm, so
+    merging a batch costs O(batch + districts) regardless of how many rows
+    have been seen before.
+    """
+
+    MOMENTS = {'A_Percentage': 'A', 'Total': 'size'}
+
+    def __init__(self):
+        self.table = None
+
+    @classmethod
+    def from_frame(cls, df):
+        stats = cls()
+        stats.update(df)
+        return stats
+
+    @classmethod
+    def _batch_table(cls, df):
+        grouped = df.groupby('DistrictName', observed=True)
+        table = grouped[COUNT_COLUMNS].sum().astype('int64')
+        table.insert(0, 'schools', grouped.size())
+        # Moments in float64 whatever the storage dtype
+        moments = df[list(cls.MOMENTS)].astype('float64').groupby(df['DistrictName'], observed=True)
+        for col, prefix in cls.MOMENTS.items():
+            table[f'{prefix}_mean'] = moments[col].mean()
+            table[f'{prefix}_m2'] = moments[col].var(ddof=0) * table['schools']
+        table['min_size'] = grouped['Total'].min().astype('int64')
+        table['max_size'] = grouped['Total'].max().astype('int64')
+        table['max_absenteeism'] = grouped['Absenteeism_Rate'].max().astype('float64')
+        best = df.loc[grouped['A_Percentage'].idxmax().to_numpy()]
+        table['top_school'] = best['CentreName'].astype(str).to_numpy()
+        table['top_school_A'] = best['A_Percentage'].astype('float64').to_numpy()
+        table.index = table.index.astype(str)
+        return table
+
+    @timed('aggregate.district_stats')
+    def update(self, df):
+        """Fold a cleaned batch of rows into the running aggregates"""
+        if df.empty:
+            return
+        batch = self._batch_table(df)
+        if self.table is None:
+            self.table = batch
+            return
+
+        index = self.table.index.union(batch.index)
+        old, new = self.table.reindex(index), batch.reindex(index)
+        n_old, n_new = old['schools'].fillna(0), new['schools'].fillna(0)
+        n = n_old + n_new
+
+        merged = pd.DataFrame({'schools': n}, index=index)
+        for col in COUNT_COLUMNS:
+            merged[col] = old[col].fillna(0) + new[col].fillna(0)
+        for prefix in self.MOMENTS.values():
+            mean_old, mean_new = old[f'{prefix}_mean'].fillna(0), new[f'{prefix}_mean'].fillna(0)
+            delta = mean_new - mean_old
+            merged[f'{prefix}_mean'] = mean_old + delta * n_new / n
+            merged[f'{prefix}_m2'] = (old[f'{prefix}_m2'].fillna(0) + new[f'{prefix}_m2'].fillna(0)
+                                      + delta ** 2 * n_old * n_new / n)
+        merged['min_size'] = np.fmin(old['min_size'], new['min_size'])
+        merged['max_size'] = np.fmax(old['max_size'], new['max_size'])
+        merged['max_absenteeism'] = np.fmax(old['max_absenteeism'], new['max_absenteeism'])
+        # Ties keep the earlier school, matching idxmax on the full frame
+        take_new = new['top_school_A'] > old['top_school_A'].fillna(-np.inf)
+        merged['top_school'] = old['top_school'].where(~take_new, new['top_school'])
+        merged['top_school_A'] = old['top_school_A'].where(~take_new, new['top_school_A'])
+
+        int_columns = ['schools', *COUNT_COLUMNS, 'min_size', 'max_size']
+        self.table = merged.astype({col: 'int64' for col in int_columns})
+
+    def district_table(self):
+        """One row per district in the layout utils.aggregates expects"""
+        t = self.table
+        return pd.DataFrame({
+            'schools': t['schools'],
+            'Total': t['Total'],
+            'mean_size': t['size_mean'],
+            'size_std': np.sqrt(t['size_m2'] / (t['schools'] - 1)),
+            'min_size': t['min_size'],
+            'max_size': t['max_size'],
+            'Absent': t['Absent'],
+            'A_mean': t['A_mean'],
+            'A_sum': t['A_mean'] * t['schools'],
+            'A_std': np.sqrt(t['A_m2'] / (t['schools'] - 1)),
+            'max_absenteeism': t['max_absenteeism'],
+            **{col: t[col] for col in GRADE_COLUMNS},
+            'top_school': t['top_school'],
+            'top_school_A': t['top_school_A'],
+        }).sort_index()
+
+
+class ResultsIngestor:
+    """Keeps the cleaned frame and district aggregates in step with the CSV.
+
+    Rows appended to the file, by append_results or any other writer, are
+    found by byte offset and parsed on their own. Any other kind of change
+    (rewrite, truncation, edit in the middle) triggers a full reload.
+    """
+
+    PROBE_BYTES = 4096  # Bytes before the offset that must be unchanged
+
+    def __init__(self, path=DATA_PATH):
+        self.path = Path(path)
+        self.frame = None
+        self.stats = None
+        self.offset = 0
+        self._lock = threading.RLock()
+        self._mtime_ns = None
+        self._probe = b''
+        self._header = None
+        self._digest = None
+        self._keys = set()  # (DistrictName, CentreName) of every loaded row
+
+    def _read_range(self, start, end):
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            return f.read(end - start)
+
+    def _reload(self):
+        stat = self.path.stat()
+        data = self._read_range(0, stat.st_size)
+        end = data.rfind(b'\n') + 1  # As in _ingest_tail, a half-written last line waits
+        frame = None
+        if end in (0, len(data)):
+            frame = read_dataset(self.path)
+            after = self.path.stat()
+            if (after.st_size, after.st_mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+                frame = None  # Changed while being read; parse the bytes we hold instead
+        if frame is None:
+            rows, report = validate_frame(pd.read_csv(io.BytesIO(data[:end])))
+            _quality_reports[str(self.path.resolve())] = report
+            frame = clean_frame(rows)
+        self.frame = frame
+        self.stats = DistrictRunningStats.from_frame(self.frame)
+        self._keys = centre_keys(self.frame)
+        self._header = data.split(b'\n', 1)[0].decode('utf-8').rstrip('\r').split(',')
+        self._advance(end or stat.st_size, stat.st_mtime_ns)
+        self._digest = None
+
+    def _advance(self, offset, mtime_ns):
+        self.offset = offset
+        self._mtime_ns = mtime_ns
+        self._probe = self._read_range(max(0, offset - self.PROBE_BYTES), offset)
+
+    @timed('load.ingest_tail')
+    def _ingest_tail(self, size, mtime_ns):
+        tail = self._read_range(self.offset, size)
+        end = tail.rfind(b'\n') + 1  # Leave a half-written last line for later
+        if end == 0:
+            return
+        chunk = tail[:end]
+        if chunk.strip():
+            # Rows from other writers are quarantined like a full load, not rejected
+            rows, report = validate_frame(pd.read_csv(io.BytesIO(chunk), header=None, names=self._header),
+                                          existing=self._keys)
+            _merge_quality_report(self.path, report)
+            if len(rows):
+                batch = clean_frame(rows)
+                batch.index = pd.RangeIndex(len(self.frame), len(self.frame) + len(batch))
+                self.frame = append_rows(self.frame, batch)
+                self.stats.update(batch)
+                self._keys |= centre_keys(batch)
+
+        if self._digest is None:
+            self._digest = _content_digest(self.path, self.offset)
+        self._digest.update(chunk)
+        consumed = self.offset + end
+        if consumed == size:
+            _record_fingerprint(self.path, mtime_ns, size, self._digest.hexdigest())
+        self._advance(consumed, mtime_ns)
+
+    def sync(self):
+        """Bring the frame up to date with the file and return it"""
+        with self._lock:
+            if self.frame is None:
+                self._reload()
+                return self.frame
+            stat = self.path.stat()
+            if stat.st_size == self.offset and stat.st_mtime_ns == self._mtime_ns:
+                return self.frame
+            probe_start = self.offset - len(self._probe)
+            if (stat.st_size > self.offset
+                    and self._read_range(probe_start, self.offset) == self._probe):
+                try:
+                    self._ingest_tail(stat.st_size, stat.st_mtime_ns)
+                except Exception:
+                    self._reload()  # A tail that doesn't parse on its own, e.g. a rewrite in progress
+            else:
+                self._reload()
+            return self.frame
+
+    def snapshot(self):
+        """(frame, district table) taken together after a sync"""
+        with self._lock:
+            frame = self.sync()
+            return frame, self.stats.district_table()
+
+    def append(self, rows):
+        """Validate rows, append them to the CSV and ingest just those rows"""
+        with self._lock:
+            self.sync()
+            batch = validate_batch(pd.DataFrame(rows), existing=self._keys)
+            columns = [col.strip() for col in self._header]
+            text = batch[columns].to_csv(index=False, header=False, lineterminator='\n')
+            with open(self.path, 'ab') as f:
+                if self._probe and not self._probe.endswith(b'\n'):
+                    f.write(b'\n')
+                f.write(text.encode('utf-8'))
+            return self.sync()
+
+
+_ingestors = {}
+_ingestors_lock = threading.Lock()
+
+
+def get_ingestor(path=DATA_PATH):
+    """Return the process-wide ingestor for a source file"""
+    key = str(Path(path).resolve())
+    with _ingestors_lock:
+        if key not in _ingestors:
+            _ingestors[key] = ResultsIngestor(path)
+        return _ingestors[key]
+
+
+def append_results(rows, path=DATA_PATH):
+    """Append a batch of result rows (records or a DataFrame) to the dataset.
+
+    Only the new rows are parsed and validated; the cached frame and the
+    per-district running aggregates are updated in place. Raises SchemaError
+    if any row doesn't fit the results schema or repeats a centre already in
+    the dataset, in which case nothing is written.
+    """
+    return get_ingestor(path).append(rows)
+
+
+class SharedDataset:
+    """One dataset version, shared by reference across sessions and reruns.
+
+    The wrapped frame is never modified after construction, so it can live
+    in st.cache_resource without being pickled or deep-copied per caller.
+    `view()` hands out a shallow copy: with copy-on-write a page that adds
+    or changes columns copies only what it touches and never affects the
+    shared frame or other sessions.
+    """
+
+    def __init__(self, frame, version):
+        self._frame = frame
+        self.version = version
+
+    def __len__(self):
+        return len(self._frame)
+
+    @property
+    def columns(self):
+        return self._frame.columns
+
+    def view(self, columns=None):
+        frame = self._frame if columns is None else self._frame[list(columns)]
+        return frame.copy(deep=False)
+
+
+@cache_resource('dataset', max_entries=2, show_spinner=False)
+def _load_version(version):
+    """Cleaned dataset for one data version; appended rows are ingested alone"""
+    return SharedDataset(get_ingestor(DATA_PATH).sync(), version)
+
+
+@cache_resource('dataset_selection', max_entries=16, show_spinner=False)
+def _load_selection(version, year, exam, districts, columns):
+    """One filtered, column-projected read of the partitioned store"""
+    from utils.partitions import read_partitions
+
+    frame = read_partitions(year=year, exam=exam, districts=districts, columns=columns)
+    return SharedDataset(frame, version)
+
+
+def _select_bundled(dataset, year, exam, districts, columns):
+    """Apply a selection to the bundled single-file dataset"""
+    df = dataset.view()
+    if int(year) != DATA_YEAR or exam != DATA_EXAM:
+        df = df.iloc[0:0]
+    if districts is not None:
+        df = df[df['DistrictName'].isin(districts)]
+    df = df if columns is None else df[list(columns)]
+    return SharedDataset(df, dataset.version)
+
+
+def get_dataset(year=None, exam=None, districts=None, columns=None):
+    """Shared, read-only handle on the dataset for the current data version.
+
+    With no arguments this is the bundled CSV. Otherwise `year` and `exam`
+    (defaulting to the bundled DATA_YEAR/DATA_EXAM) and `districts` pick the
+    partitions to read from the partitioned store, and `columns` limits what
+    is read from each file. Without a built store the same selection is
+    applied to the bundled CSV.
+    """
+    from utils import partitions  # Imported here: partitions imports this module
+    from utils.data_version import current_version
+
+    if year is None and exam is None and districts is None and columns is None:
+        return _load_version(current_version())
+
+    year = DATA_YEAR if year is None else int(year)
+    exam = DATA_EXAM if exam is None else exam
+    districts = None if districts is None else tuple(sorted(districts))
+    columns = None if columns is None else tuple(columns)
+    if partitions.has_partitions():
+        version = current_version(partitions.MANIFEST_PATH)
+        return _load_selection(version, year, exam, districts, columns)
+    return _select_bundled(_load_version(current_version()), year, exam, districts, columns)
+
+
+def load_data(year=None, exam=None, districts=None, columns=None):
+    """Load the dataset for the current data version (see get_dataset).
+
+    Returns a copy-on-write view of the shared frame: cheap to hand out on
+    every rerun and safe to modify. If the source can't be read, or lacks a
+    required column, the error is shown and the page stops.
+    """
     try:
-        df = pd.read_csv(data_path)
-        df.columns = df.columns.str.strip()
-        
-        # Calculate metrics
-        if 'Total' in df.columns and 'As' in df.columns:
-            df['A_Percentage'] = (df['As'] / df['Total']) * 100
-        if 'Absent' in df.columns and 'Total' in df.columns:
-            df['Absenteeism_Rate'] = (df['Absent'] / df['Total']) * 100
-            
-        return df
-    except Exception as e:
+        return get_dataset(year, exam, districts, columns).view()
+    except (OSError, SchemaError, pd.errors.ParserError) as e:
         st.error(f"⚠️ Failed to load data: {str(e)}")
-        return pd.DataFrame()  # Return empty dataframe as fallback
\ No newline at end of file
+        st.stop()
@@ -0,0 +1,195 @@
+"""Dataset versioning driven by a background file watcher.
+
+A single watcher per process tracks the source CSV and publishes a version
+token (the source content hash). Every cache keys on that token, so reruns
+read an in-memory string instead of touching disk, and a changed file is
+picked up by every page at once. The watcher also records whether its file
+exists, so has_partitions() is a flag read rather than a stat() per rerun.
+
+The watcher tells a detected version (`latest`) apart from the published
+one (`version`). Without subscribers a change is published at once; with a
+background refresher subscribed (see utils.refresh) it stays unpublished
+until the refresher has built the caches for it, and pages keep reading
+the previous snapshot meanwhile.
+"""
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import streamlit as st
+
+from utils import partitions
+from utils.data_loader import DATA_PATH, source_fingerprint
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # Fall back to polling
+    FileSystemEventHandler = object
+    Observer = None
+
+POLL_INTERVAL = 2.0  # Seconds between stat() calls when polling
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        paths = {getattr(event, 'src_path', None), getattr(event, 'dest_path', None)}
+        if str(self.watcher.path) in {str(Path(p).resolve()) for p in paths if p}:
+            self.watcher.check_now()
+
+
+class DataWatcher:
+    """Watch one source file and bump its version when the content changes"""
+
+    def __init__(self, path=DATA_PATH, poll_interval=POLL_INTERVAL):
+        self.path = Path(path).resolve()
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._observer = None
+        self._thread = None
+        self._subscribers = []
+        self.version = None  # Published: what every cache keys on
+        self.latest = None  # Detected on disk; ahead of `version` while a refresh runs
+        self.exists = False  # Whether the file was there at the last check
+        self.changed_at = None
+        self.check_now()
+
+    @property
+    def updating(self):
+        return self.latest != self.version
+
+    def subscribe(self, callback):
+        """Call `callback(version)` on changes instead of publishing them directly"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def publish(self, version):
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                self.changed_at = datetime.now()
+
+    def check_now(self):
+        """Re-fingerprint the source and return the (possibly new) detected version"""
+        try:
+            _, _, sha256 = source_fingerprint(self.path)
+        except FileNotFoundError:
+            self.exists = False  # Versions already published keep serving
+            return self.latest
+        except OSError:
+            return self.latest  # Mid-write; keep serving
+        self.exists = True
+        version = sha256[:16]
+        with self._lock:
+            changed = version != self.latest
+            self.latest = version
+            subscribers = list(self._subscribers) if self.version is not None else []
+        if changed and not subscribers:
+            self.publish(version)  # First version, or nobody builds ahead
+        elif changed:
+            for callback in subscribers:
+                callback(version)
+        return version
+
+    def start(self):
+        if Observer is not None:
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_ChangeHandler(self), str(self.path.parent))
+                self._observer.daemon = True
+                self._observer.start()
+                return self
+            except OSError:
+                self._observer = None  # e.g. inotify watch limit reached
+        self._thread = threading.Thread(target=self._poll, name="data-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check_now()
+
+
+_watchers = {}  # Resolved path, and each path as passed in, -> watcher
+_watchers_lock = threading.Lock()
+
+
+def get_watcher(path=DATA_PATH):
+    """Return the process-wide watcher for a source file, starting it once"""
+    watcher = _watchers.get(str(path))  # Resolving a path stat()s it; only done once per spelling
+    if watcher is not None:
+        return watcher
+    key = str(Path(path).resolve())
+    with _watchers_lock:
+        if key not in _watchers:
+            _watchers[key] = DataWatcher(path).start()
+        _watchers[str(path)] = _watchers[key]
+        return _watchers[key]
+
+
+_building = threading.local()
+
+
+@contextmanager
+def building(path, version):
+    """Within this thread, make current_version(path) return an unpublished version.
+
+    The background refresher builds caches this way: the public getters key
+    their entries on the new version while other threads still see the
+    published one.
+    """
+    key = str(Path(path).resolve())
+    versions = getattr(_building, 'versions', {})
+    _building.versions = {**versions, key: version}
+    try:
+        yield
+    finally:
+        _building.versions = versions
+
+
+def current_version(path=DATA_PATH):
+    """Version token for the source file; no disk access on the hot path"""
+    versions = getattr(_building, 'versions', None)
+    if versions:
+        version = versions.get(str(Path(path).resolve()))
+        if version is not None:
+            return version
+    return get_watcher(path).version
+
+
+def dataset_version(year=None, exam=None):
+    """Version of whichever source a (year, exam) selection reads from"""
+    if (year is None and exam is None) or not partitions.has_partitions():
+        return current_version()
+    return current_version(partitions.MANIFEST_PATH)
+
+
+def sitting_version(year=None, exam=None):
+    """dataset_version plus the sitting, for keys that don't otherwise name it.
+
+    Every sitting in the store shares the store's version, so rendered charts
+    and exports keyed on the version alone would collide across sittings.
+    """
+    version = dataset_version(year, exam)
+    if (year is None and exam is None) or not partitions.has_partitions():
+        return version
+    return f"{version}-{exam}{year}"
+
+
+def refresh_data(path=DATA_PATH):
+    """Force a re-check of the source, publish it and drop every Streamlit cache entry"""
+    watcher = get_watcher(path)
+    watcher.publish(watcher.check_now())
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
@@ -0,0 +1,108 @@
+"""Lazy, chunked dataset exports for the download buttons.
+
+Nothing is serialised on a normal rerun: the download button gets a
+callable that Streamlit runs only when the user clicks. The export is then
+written to disk chunk by chunk (so peak memory is one chunk, not a second
+copy of the table) and kept under data/.cache/exports keyed by dataset
+version, filter set, columns, ordering and format, so repeat downloads are
+a file read.
+"""
+import gzip
+import hashlib
+import os
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+from utils.data_loader import CACHE_DIR
+from utils.data_version import dataset_version
+from utils.instrumentation import count_cache, timed
+
+EXPORT_DIR = CACHE_DIR / "exports"
+EXPORT_BUDGET = 256 * 1024 * 1024  # Bytes of finished exports kept on disk
+CHUNK_ROWS = 50_000
+
+# format -> (label, suffix, mime type)
+FORMATS = {
+    'csv': ("CSV", ".csv", "text/csv"),
+    'csv.gz': ("CSV (gzip)", ".csv.gz", "application/gzip"),
+    'parquet': ("Parquet", ".parquet", "application/vnd.apache.parquet"),
+}
+
+
+def _chunks(df, chunk_rows=CHUNK_ROWS):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+@timed('export.write')
+def write_export(df, path, fmt, chunk_rows=CHUNK_ROWS):
+    """Write `df` to `path` in `fmt`, one chunk of rows at a time"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+
+    if fmt == 'parquet':
+        schema = pa.Schema.from_pandas(df.iloc[0:0], preserve_index=False)
+        with pq.ParquetWriter(tmp_path, schema, compression='zstd') as writer:
+            for chunk in _chunks(df, chunk_rows):
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    else:
+        opener = gzip.open if fmt == 'csv.gz' else open
+        with opener(tmp_path, 'wt', encoding='utf-8', newline='') as f:
+            df.iloc[0:0].to_csv(f, index=False, lineterminator='\n')
+            for chunk in _chunks(df, chunk_rows):
+                chunk.to_csv(f, header=False, index=False, lineterminator='\n')
+    tmp_path.replace(path)
+    return path
+
+
+def _prune(budget=EXPORT_BUDGET):
+    """Delete least recently used exports until the directory fits the budget"""
+    finished = (p for p in EXPORT_DIR.glob("*.*") if p.suffix != '.tmp')  # .tmp: still being written
+    files = sorted(finished, key=lambda p: p.stat().st_mtime)
+    total = sum(p.stat().st_size for p in files)
+    for path in files:
+        if total <= budget:
+            break
+        total -= path.stat().st_size
+        path.unlink(missing_ok=True)
+
+
+def export_path(df, fmt, key_parts):
+    """Finished export file for `df`, written on first request only"""
+    digest = hashlib.sha256(repr(key_parts).encode('utf-8')).hexdigest()[:24]
+    path = EXPORT_DIR / f"{digest}{FORMATS[fmt][1]}"
+    count_cache('export', path.exists())
+    if path.exists():
+        os.utime(path)  # Mark as recently used
+        return path
+    write_export(df, path, fmt)
+    _prune()
+    return path
+
+
+def export_button(label, df, file_stem, filters=None, sort_by=None, ascending=True,
+                  version=None, key=None):
+    """Format picker plus a download button that serialises only on click.
+
+    `filters` (with `version`) must identify the rows in `df`; they key the
+    on-disk export cache together with the columns, ordering and format.
+    """
+    key = key or file_stem
+    fmt = st.radio("Export format", list(FORMATS), format_func=lambda f: FORMATS[f][0],
+                   horizontal=True, key=f"{key}_format", label_visibility="collapsed")
+    _, suffix, mime = FORMATS[fmt]
+    key_parts = (
+        dataset_version() if version is None else version,
+        None if filters is None else tuple(sorted(map(str, filters))),
+        tuple(df.columns), sort_by, ascending, fmt,
+    )
+
+    def build():
+        frame = df if sort_by is None else df.sort_values(sort_by, ascending=ascending)
+        return export_path(frame, fmt, key_parts).read_bytes()
+
+    st.download_button(label, data=build, file_name=f"{file_stem}{suffix}", mime=mime, key=key)
@@ -0,0 +1,283 @@
+"""District boundaries for the map view, simplified ahead of time.
+
+Boundaries come from a local GeoJSON file (no network), by default
+data/boundaries/uganda_districts.geojson. The first load simplifies every
+ring with Douglas-Peucker at each zoom level in ZOOM_LEVELS and stores the
+result as one .npz file under data/.cache, named after the source content
+hash. Coordinates are float32 arrays plus polygon and ring offsets, so a
+warm load is a few array reads and no GeoJSON parse.
+
+District names are matched through an index of normalised names (case,
+spacing, punctuation, a trailing "DISTRICT" and DISTRICT_ALIASES), with a
+close-match fallback for remaining spelling variants. The map receives a
+GeoJSON of only the selected districts at one zoom level, with coordinates
+rounded to that level's precision.
+
+Build the cache and check the names against the dataset with:
+
+    python -m utils.geo data/boundaries/uganda_districts.geojson
+"""
+import argparse
+import difflib
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from utils.data_loader import CACHE_DIR, DATA_PATH, DISTRICT_ALIASES, source_fingerprint
+from utils.instrumentation import cache_resource, count_cache, timed
+
+BOUNDARIES_PATH = DATA_PATH.parent / "boundaries" / "uganda_districts.geojson"
+GEO_CACHE_VERSION = 1  # Bump when the simplification or cache layout changes
+# Zoom level -> (Douglas-Peucker tolerance in degrees, decimals sent to the browser)
+ZOOM_LEVELS = {
+    'country': (0.01, 2),
+    'region': (0.003, 3),
+    'district': (0.0005, 4),
+}
+NAME_PROPERTIES = ['DistrictName', 'DISTRICT', 'District', 'district', 'ADM2_EN', 'NAME_2',
+                   'shapeName', 'name', 'NAME']
+MATCH_CUTOFF = 0.85  # difflib ratio for the spelling-variant fallback
+
+
+def normalise_name(name):
+    """Comparable form of a district name: 'Madi Okollo District' -> 'MADIOKOLLO'"""
+    name = re.sub(r'\s+', ' ', str(name).strip().upper())
+    name = re.sub(r'\s+DISTRICT$', '', name)
+    name = DISTRICT_ALIASES.get(name, name)
+    return re.sub(r'[^A-Z0-9]', '', name)
+
+
+def douglas_peucker(points, tolerance):
+    """Simplify a polyline (or closed ring) of (n, 2) points, keeping both ends"""
+    n = len(points)
+    if n <= 4 or tolerance <= 0:
+        return points
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = points[start], points[end]
+        inner = points[start + 1:end]
+        ab = b - a
+        length = np.hypot(*ab)
+        if length == 0:  # Closed ring: both ends are the same point
+            distance = np.hypot(*(inner - a).T)
+        else:
+            distance = np.abs(ab[0] * (inner[:, 1] - a[1]) - ab[1] * (inner[:, 0] - a[0])) / length
+        i = int(np.argmax(distance))
+        if distance[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.extend([(start, split), (split, end)])
+    return points[keep]
+
+
+def _polygons(geometry):
+    """Rings of each polygon of a Polygon/MultiPolygon geometry"""
+    if geometry is None:
+        return []
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    return []
+
+
+def _feature_name(properties):
+    for key in NAME_PROPERTIES:
+        if properties.get(key):
+            return str(properties[key])
+    raise ValueError(f"Feature has no district name; expected one of {NAME_PROPERTIES}")
+
+
+@dataclass(frozen=True)
+class Level:
+    """Every feature at one zoom level: feature -> polygons -> rings -> points"""
+    coords: np.ndarray  # (points, 2) float32 lon/lat
+    ring_offsets: np.ndarray  # Point range of each ring
+    polygon_offsets: np.ndarray  # Ring range of each polygon; the first ring is the exterior
+    feature_offsets: np.ndarray  # Polygon range of each feature
+
+    def feature(self, i, decimals):
+        """GeoJSON MultiPolygon coordinates of feature `i`"""
+        polygons = []
+        for p in range(self.feature_offsets[i], self.feature_offsets[i + 1]):
+            rings = []
+            for r in range(self.polygon_offsets[p], self.polygon_offsets[p + 1]):
+                ring = self.coords[self.ring_offsets[r]:self.ring_offsets[r + 1]]
+                rings.append(np.round(ring.astype(np.float64), decimals).tolist())
+            polygons.append(rings)
+        return polygons
+
+
+def _build_level(features, tolerance):
+    coords, ring_offsets, polygon_offsets, feature_offsets = [], [0], [0], [0]
+    for polygons in features:
+        for rings in polygons:
+            kept = 0
+            for j, ring in enumerate(rings):
+                simplified = douglas_peucker(ring, tolerance)
+                if len(simplified) < 4:
+                    if j > 0:
+                        continue  # Hole smaller than the tolerance
+                    simplified = ring  # Keep tiny exteriors as drawn
+                coords.append(simplified)
+                ring_offsets.append(ring_offsets[-1] + len(simplified))
+                kept += 1
+            polygon_offsets.append(polygon_offsets[-1] + kept)
+        feature_offsets.append(feature_offsets[-1] + len(polygons))
+    return Level(
+        coords=np.concatenate(coords).astype(np.float32) if coords else np.zeros((0, 2), np.float32),
+        ring_offsets=np.asarray(ring_offsets, dtype=np.int64),
+        polygon_offsets=np.asarray(polygon_offsets, dtype=np.int64),
+        feature_offsets=np.asarray(feature_offsets, dtype=np.int64),
+    )
+
+
+class Boundaries:
+    """Simplified district geometries at every zoom level plus a name index"""
+
+    def __init__(self, names, levels, version=None):
+        self.names = list(names)
+        self.levels = levels
+        self.version = version  # Source content hash, for keying rendered maps
+        self._index = {}
+        for i, name in enumerate(self.names):
+            self._index.setdefault(normalise_name(name), i)
+
+    def __len__(self):
+        return len(self.names)
+
+    def lookup(self, name):
+        """Feature index for a district name or spelling variant, or None"""
+        key = normalise_name(name)
+        if key in self._index:
+            return self._index[key]
+        close = difflib.get_close_matches(key, list(self._index), n=1, cutoff=MATCH_CUTOFF)
+        return self._index[close[0]] if close else None
+
+    def match(self, districts):
+        """{district: feature index} for the names found, and the names not found"""
+        matched, missing = {}, []
+        for district in districts:
+            i = self.lookup(district)
+            if i is None:
+                missing.append(district)
+            else:
+                matched[district] = i
+        return matched, missing
+
+    def geojson(self, districts, level='district'):
+        """FeatureCollection of the matched districts, each with id = the dataset's name"""
+        decimals = ZOOM_LEVELS[level][1]
+        matched, _ = self.match(districts)
+        return {
+            'type': 'FeatureCollection',
+            'features': [{'type': 'Feature', 'id': district,
+                          'geometry': {'type': 'MultiPolygon',
+                                       'coordinates': self.levels[level].feature(i, decimals)}}
+                         for district, i in matched.items()],
+        }
+
+    def save(self, path):
+        arrays = {'names': np.asarray(self.names, dtype=str)}
+        for name, level in self.levels.items():
+            for field in ('coords', 'ring_offsets', 'polygon_offsets', 'feature_offsets'):
+                arrays[f'{name}.{field}'] = getattr(level, field)
+        tmp_path = Path(path).with_name(Path(path).name + '.tmp.npz')
+        np.savez_compressed(tmp_path, **arrays)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            levels = {name: Level(*(arrays[f'{name}.{field}'] for field in
+                                    ('coords', 'ring_offsets', 'polygon_offsets', 'feature_offsets')))
+                      for name in ZOOM_LEVELS}
+            return cls(arrays['names'].tolist(), levels, version=Path(path).stem.rsplit('-', 1)[-1])
+
+    @classmethod
+    def from_geojson(cls, path):
+        """Parse a GeoJSON FeatureCollection and simplify it at every zoom level"""
+        collection = json.loads(Path(path).read_text(encoding='utf-8'))
+        names, features = [], []
+        for feature in collection.get('features', []):
+            polygons = [[np.asarray(ring, dtype=np.float64)[:, :2] for ring in rings]
+                        for rings in _polygons(feature.get('geometry'))]
+            if polygons:
+                names.append(_feature_name(feature.get('properties') or {}))
+                features.append(polygons)
+        levels = {name: _build_level(features, tolerance) for name, (tolerance, _) in ZOOM_LEVELS.items()}
+        return cls(names, levels)
+
+
+def _cache_path(sha256):
+    return CACHE_DIR / f"boundaries-v{GEO_CACHE_VERSION}-{sha256[:16]}.npz"
+
+
+@timed('load.boundaries')
+def read_boundaries(path=BOUNDARIES_PATH):
+    """Boundaries for a GeoJSON file, going through the .npz cache"""
+    _, _, sha256 = source_fingerprint(path)
+    cache_file = _cache_path(sha256)
+    count_cache('boundaries_npz', cache_file.exists())
+    if cache_file.exists():
+        try:
+            return Boundaries.load(cache_file)
+        except (OSError, ValueError, KeyError):
+            cache_file.unlink(missing_ok=True)  # Corrupt or from an older layout
+
+    boundaries = Boundaries.from_geojson(path)
+    boundaries.version = sha256[:16]
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        boundaries.save(cache_file)
+        for stale in CACHE_DIR.glob("boundaries-*.npz"):
+            if stale != cache_file:
+                stale.unlink(missing_ok=True)
+    except OSError:
+        pass  # Serve the parsed boundaries even if the cache can't be written
+    return boundaries
+
+
+def boundaries_available(path=BOUNDARIES_PATH):
+    return Path(path).exists()
+
+
+@cache_resource('boundaries', max_entries=2, show_spinner=False)
+def _boundaries_for(path, mtime_ns, size):
+    return read_boundaries(path)
+
+
+def get_boundaries(path=BOUNDARIES_PATH):
+    """Shared Boundaries for the boundaries file as it is on disk"""
+    stat = Path(path).stat()
+    return _boundaries_for(str(Path(path).resolve()), stat.st_mtime_ns, stat.st_size)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simplify and cache district boundaries for the map")
+    parser.add_argument("geojson", type=Path, nargs="?", default=BOUNDARIES_PATH)
+    args = parser.parse_args(argv)
+
+    from utils.data_loader import read_dataset
+
+    boundaries = read_boundaries(args.geojson)
+    print(f"{len(boundaries)} districts in {args.geojson}")
+    for name, level in boundaries.levels.items():
+        print(f"  {name:<9} {len(level.coords):>9,} points")
+    districts = sorted(read_dataset()['DistrictName'].dropna().unique())
+    matched, missing = boundaries.match(districts)
+    print(f"{len(matched)} of {len(districts)} dataset districts matched")
+    for district in missing:
+        print(f"  no boundary for {district}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""Uncertainty for the headline statistics: bootstrap CIs and permutation tests.
+
+Covers the Pearson correlation of A_Percentage with Absenteeism_Rate, an
+OLS regression of A_Percentage on Absenteeism_Rate and school size, and
+the gap between the best and worst district means. Only districts with at
+least MIN_DISTRICT_SCHOOLS schools can be picked as best or worst, and
+the gap is tested as a max-minus-min over every such district, since the
+pair was chosen as the extremes.
+
+Resamples are drawn as (batch, n) index matrices and every statistic is
+computed for a whole batch at once. Batches get independent seeds spawned
+from one SeedSequence in a fixed order, so results depend only on `seed`
+and `n_resamples`, not on how many workers ran them. Large jobs are spread
+over a process pool; small ones run in-process, where the pool would cost
+more than it saves. Results are cached per dataset version and selection;
+the default selection is warmed with N_RESAMPLES by the background
+refresher, other selections use INTERACTIVE_RESAMPLES on the request path.
+"""
+import multiprocessing
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from utils import partitions
+from utils.data_version import dataset_version
+from utils.instrumentation import cache_resource, timed
+from utils.query import get_index
+
+N_RESAMPLES = 10_000
+INTERACTIVE_RESAMPLES = 1_000  # For selections computed on the request path
+MIN_DISTRICT_SCHOOLS = 5  # Smaller districts can't be the best or worst district
+BATCH_SIZE = 500  # Resamples per batch; bounds each batch's index matrix
+CONFIDENCE = 0.95
+SEED = 2024
+PARALLEL_MIN_WORK = 20_000_000  # Resamples x rows above which batches go to the pool
+INFERENCE_COLUMNS = ['DistrictName', 'A_Percentage', 'Absenteeism_Rate', 'Total']
+
+_pool = None
+
+
+@dataclass(frozen=True)
+class Estimate:
+    """A point estimate with a percentile bootstrap interval and optional p-value"""
+    value: float
+    ci_low: float
+    ci_high: float
+    p_value: float = float('nan')
+
+    @property
+    def significant(self):
+        """True when the interval excludes zero"""
+        return not (self.ci_low <= 0 <= self.ci_high)
+
+
+@dataclass(frozen=True)
+class InferenceSummary:
+    n_schools: int
+    n_resamples: int
+    correlation: Estimate  # A_Percentage vs Absenteeism_Rate
+    absenteeism_slope: Estimate  # Grade "A" points per point of absenteeism
+    size_slope: Estimate  # Grade "A" points per 100 students
+    top_district: str  # '' with fewer than two districts of MIN_DISTRICT_SCHOOLS
+    bottom_district: str
+    district_gap: Estimate  # Top minus bottom district mean, percentage points
+
+
+# Kernels: (arrays, seed sequence, batch size) -> statistics for that batch.
+# Bootstraps draw resample counts per school and take weighted sums with one
+# matrix product, rather than gathering every column for every resample.
+
+def _resample_counts(rng, n, size):
+    idx = rng.integers(0, n, (size, n))
+    flat = (idx + np.arange(size)[:, None] * n).ravel()
+    return np.bincount(flat, minlength=size * n).reshape(size, n)
+
+
+def _boot_sums(arrays, seed, size):
+    (moments,) = arrays
+    counts = _resample_counts(np.random.default_rng(seed), len(moments), size)
+    return counts @ moments
+
+
+def _perm_cross(arrays, seed, size):
+    x, y = arrays
+    idx = np.random.default_rng(seed).permuted(np.tile(np.arange(len(y)), (size, 1)), axis=1)
+    return y[idx] @ x
+
+
+def _boot_gap(arrays, seed, size):
+    a, b = arrays
+    rng = np.random.default_rng(seed)
+    return (a[rng.integers(0, len(a), (size, len(a)))].mean(axis=1)
+            - b[rng.integers(0, len(b), (size, len(b)))].mean(axis=1))
+
+
+def _perm_range(arrays, seed, size):
+    values, starts, counts = arrays  # Values grouped by district
+    idx = np.random.default_rng(seed).permuted(np.tile(np.arange(len(values)), (size, 1)), axis=1)
+    means = np.add.reduceat(values[idx], starts, axis=1) / counts
+    return means.max(axis=1) - means.min(axis=1)
+
+
+def _perm_gap(arrays, seed, size):
+    a, b = arrays
+    pooled = np.concatenate([a, b])
+    idx = np.random.default_rng(seed).permuted(np.tile(np.arange(len(pooled)), (size, 1)), axis=1)
+    shuffled = pooled[idx]
+    return shuffled[:, :len(a)].mean(axis=1) - shuffled[:, len(a):].mean(axis=1)
+
+
+def _run_batch(task):
+    kernel, arrays, seed, size = task
+    return kernel(arrays, seed, size)
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # Spawned workers, since forking a threaded server process is unsafe
+        _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                    mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+
+def resample(kernel, arrays, n_resamples=N_RESAMPLES, seed=SEED, rows=None):
+    """Run `kernel` over n_resamples in seeded batches, in parallel when large enough"""
+    sizes = [BATCH_SIZE] * (n_resamples // BATCH_SIZE)
+    if n_resamples % BATCH_SIZE:
+        sizes.append(n_resamples % BATCH_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(kernel, arrays, s, size) for s, size in zip(seeds, sizes)]
+    rows = rows if rows is not None else len(arrays[-1])
+    if n_resamples * rows >= PARALLEL_MIN_WORK and len(tasks) > 1:
+        results = list(_get_pool().map(_run_batch, tasks))
+    else:
+        results = [_run_batch(task) for task in tasks]
+    return np.concatenate(results)
+
+
+def _interval(values, confidence=CONFIDENCE):
+    tail = (1 - confidence) / 2 * 100
+    return np.nanpercentile(values, [tail, 100 - tail], axis=0)
+
+
+def _p_value(null, observed):
+    """Two-sided permutation p-value, with the observed statistic counted once"""
+    extreme = np.sum(np.abs(null) >= abs(observed) - 1e-12)
+    return (extreme + 1) / (len(null) + 1)
+
+
+def _moment_matrix(a, s, y):
+    """Per-school terms whose sums give every mean and covariance needed below"""
+    return np.column_stack([np.ones_like(a), a, s, y, a * a, s * s, a * s, a * y, s * y, y * y])
+
+
+def _from_sums(sums):
+    """Correlation of a with y and OLS slopes of y on (a, s), per row of moment sums"""
+    _, a, s, y, aa, ss, as_, ay, sy, yy = (sums / sums[:, :1]).T
+    var_a, var_s, var_y = aa - a * a, ss - s * s, yy - y * y
+    cov_as, cov_ay, cov_sy = as_ - a * s, ay - a * y, sy - s * y
+    det = var_a * var_s - cov_as ** 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = cov_ay / np.sqrt(var_a * var_y)
+        slope_a = (var_s * cov_ay - cov_as * cov_sy) / det
+        slope_s = (var_a * cov_sy - cov_as * cov_ay) / det
+    return r, slope_a, slope_s
+
+
+def relationships(df, n_resamples=N_RESAMPLES, seed=SEED):
+    """Correlation of A_Percentage with Absenteeism_Rate, and the OLS slopes of
+    A_Percentage on Absenteeism_Rate and school size (per 100 students).
+
+    One bootstrap of moment sums gives the CIs for all three; the correlation
+    also gets a permutation p-value.
+    """
+    a = df['Absenteeism_Rate'].to_numpy(dtype=np.float64)
+    s = df['Total'].to_numpy(dtype=np.float64) / 100
+    y = df['A_Percentage'].to_numpy(dtype=np.float64)
+    a, s, y = a - a.mean(), s - s.mean(), y - y.mean()  # Centred for numerical stability
+    moments = _moment_matrix(a, s, y)
+
+    observed = _from_sums(moments.sum(axis=0)[None])
+    boot = _from_sums(resample(_boot_sums, (moments,), n_resamples, seed))
+    cross = resample(_perm_cross, (a, y), n_resamples, seed + 1)
+    null = cross / len(y) / np.sqrt(a.var() * y.var())
+
+    estimates = []
+    for i, (value, values) in enumerate(zip(observed, boot)):
+        low, high = _interval(values)
+        p_value = _p_value(null, value[0]) if i == 0 else float('nan')
+        estimates.append(Estimate(float(value[0]), float(low), float(high), float(p_value)))
+    return estimates
+
+
+def mean_gap(a, b, n_resamples=N_RESAMPLES, seed=SEED):
+    """Difference of means a - b with a bootstrap CI and a permutation p-value"""
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    gap = a.mean() - b.mean()
+    rows = len(a) + len(b)
+    low, high = _interval(resample(_boot_gap, (a, b), n_resamples, seed, rows=rows))
+    null = resample(_perm_gap, (a, b), n_resamples, seed + 1, rows=rows)
+    return Estimate(float(gap), float(low), float(high), float(_p_value(null, gap)))
+
+
+def district_gap(df, n_resamples=N_RESAMPLES, seed=SEED, min_schools=MIN_DISTRICT_SCHOOLS):
+    """(top, bottom, gap) between the best and worst district mean A_Percentage.
+
+    Only districts with at least `min_schools` schools take part. The CI
+    bootstraps schools within the two districts; the p-value compares the
+    gap with the max-minus-min of district means when schools' district
+    labels are permuted across every eligible district.
+    """
+    sizes = df.groupby('DistrictName', observed=True).size()
+    eligible = sizes.index[sizes >= min_schools]
+    if len(eligible) < 2:
+        return '', '', Estimate(float('nan'), float('nan'), float('nan'))
+    df = df[df['DistrictName'].isin(eligible)].sort_values('DistrictName', kind='stable')
+    grouped = df.groupby('DistrictName', observed=True, sort=True)['A_Percentage']
+    means, counts = grouped.mean(), grouped.size().to_numpy()
+    top, bottom = means.idxmax(), means.idxmin()
+
+    scores = df['A_Percentage'].to_numpy(dtype=np.float64)
+    districts = df['DistrictName'].to_numpy()
+    gap = mean_gap(scores[districts == top], scores[districts == bottom], n_resamples, seed)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    null = resample(_perm_range, (scores, starts, counts.astype(np.float64)), n_resamples, seed + 1,
+                    rows=len(scores))
+    return str(top), str(bottom), Estimate(gap.value, gap.ci_low, gap.ci_high, float(_p_value(null, gap.value)))
+
+
+@timed('inference.analyse')
+def analyse(df, n_resamples=N_RESAMPLES, seed=SEED):
+    """InferenceSummary for a school-level frame"""
+    df = df.dropna(subset=['A_Percentage', 'Absenteeism_Rate'])
+    with warnings.catch_warnings():
+        # One or two schools have no spread; their estimates are NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        correlation, absenteeism_slope, size_slope = relationships(df, n_resamples, seed)
+    top, bottom, gap = district_gap(df, n_resamples, seed)
+    return InferenceSummary(
+        n_schools=len(df),
+        n_resamples=n_resamples,
+        correlation=correlation,
+        absenteeism_slope=absenteeism_slope,
+        size_slope=size_slope,
+        top_district=top,
+        bottom_district=bottom,
+        district_gap=gap,
+    )
+
+
+@cache_resource('inference', max_entries=32, show_spinner="Computing confidence intervals...")
+def _inference_for(version, year, exam, districts, n_resamples, seed):
+    df = get_index(year, exam, columns=INFERENCE_COLUMNS).select(districts, columns=INFERENCE_COLUMNS)
+    return analyse(df, n_resamples, seed)
+
+
+def get_inference(year=None, exam=None, districts=None, n_resamples=None, seed=SEED):
+    """Cached InferenceSummary for a selection of the current dataset version.
+
+    `n_resamples` defaults to N_RESAMPLES for every district (the warmed
+    default view) and to INTERACTIVE_RESAMPLES for narrower selections.
+    """
+    if not partitions.has_partitions():
+        year = exam = None  # Only the bundled dataset exists
+    districts = None if districts is None else tuple(sorted(districts))
+    if n_resamples is None:
+        everything = districts is None or set(get_index(year, exam).districts) <= set(districts)
+        n_resamples = N_RESAMPLES if everything else INTERACTIVE_RESAMPLES
+    return _inference_for(dataset_version(year, exam), year, exam, districts, n_resamples, seed)
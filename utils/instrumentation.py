@@ -0,0 +1,378 @@
+"""Timing spans, cache counters and a metrics export for the running app.
+
+`span(name)` (or the `timed(name)` decorator) times a block of code. Every
+span is added to process-wide totals (count, total and max seconds per
+name) and to the trace of the script run in progress, which the debug
+panel lists in call order. `cache_resource(name, ...)` is st.cache_resource
+plus a hit/miss counter and a `cache.<name>.hit|miss` span, so the time a
+hit takes is the cost of hashing the arguments; the in-process caches
+(district index memo, render cache, export files, Feather cache) count
+through `count_cache`.
+
+Pages wrap their `main()` in `instrumented_page(name)`. At the end of a
+run it records the page span and per-session state size, shows the debug
+panel when enabled (`?debug=1` in the URL, or SCHOOLS_DEBUG=1), and at
+most every FLUSH_INTERVAL seconds writes data/.cache/metrics.json and
+metrics.prom (Prometheus text format, for the node_exporter textfile
+collector). To serve the latter as an HTTP endpoint, or to list hot paths
+from the JSON:
+
+    python -m utils.instrumentation --serve 9108
+    python -m utils.instrumentation --top 20
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+import streamlit as st
+
+METRICS_DIR = Path(__file__).resolve().parent.parent / "data" / ".cache"
+METRICS_PATH = METRICS_DIR / "metrics.json"
+PROMETHEUS_PATH = METRICS_DIR / "metrics.prom"
+FLUSH_INTERVAL = 10.0  # Seconds between metrics file writes
+DEBUG_ENV = 'SCHOOLS_DEBUG'
+MAX_SESSIONS = 100  # Sessions whose state size is kept for export
+PREFIX = 'schools'
+
+_local = threading.local()  # .trace: spans of this thread's script run; .depth
+
+
+class Metrics:
+    """Process-wide span totals, cache counters and gauges"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.spans = {}  # name -> [count, total seconds, max seconds]
+            self.caches = {}  # name -> [hits, misses]
+            self.sessions = {}  # session id -> session_state bytes, most recent last
+            self.gauges = {}
+
+    def record_span(self, name, seconds):
+        with self._lock:
+            entry = self.spans.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def record_cache(self, name, hit):
+        with self._lock:
+            self.caches.setdefault(name, [0, 0])[0 if hit else 1] += 1
+
+    def record_session(self, session_id, nbytes):
+        with self._lock:
+            self.sessions.pop(session_id, None)
+            self.sessions[session_id] = nbytes
+            while len(self.sessions) > MAX_SESSIONS:
+                self.sessions.pop(next(iter(self.sessions)))
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'started': self.started,
+                'written': time.time(),
+                'spans': {name: {'count': c, 'total_s': t, 'max_s': m}
+                          for name, (c, t, m) in self.spans.items()},
+                'caches': {name: {'hits': h, 'misses': m} for name, (h, m) in self.caches.items()},
+                'sessions': dict(self.sessions),
+                'gauges': dict(self.gauges),
+            }
+
+
+metrics = Metrics()
+_last_flush = 0.0
+_flush_lock = threading.Lock()
+
+
+@contextmanager
+def span(name):
+    """Time a block under `name`; the yielded entry's 'span' may be renamed inside"""
+    depth = getattr(_local, 'depth', 0)
+    entry = {'span': name, 'depth': depth, 'ms': float('nan')}
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace.append(entry)  # Appended on entry, so the trace lists spans in call order
+    _local.depth = depth + 1
+    start = time.perf_counter()
+    try:
+        yield entry
+    finally:
+        elapsed = time.perf_counter() - start
+        _local.depth = depth
+        entry['ms'] = elapsed * 1000
+        metrics.record_span(entry['span'], elapsed)
+
+
+def timed(name):
+    """Decorator form of span()"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count_cache(name, hit):
+    metrics.record_cache(name, hit)
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace.append({'cache': name, 'hit': hit, 'depth': getattr(_local, 'depth', 0)})
+
+
+def cache_resource(name, **kwargs):
+    """st.cache_resource(**kwargs) that also counts hits and misses under `name`"""
+    def decorate(func):
+        computed = threading.local()
+
+        @functools.wraps(func)
+        def compute(*args, **kw):
+            computed.flag = True  # Only runs on a miss
+            return func(*args, **kw)
+
+        cached = st.cache_resource(**kwargs)(compute)
+
+        @functools.wraps(func)
+        def lookup(*args, **kw):
+            computed.flag = False
+            with span(f"cache.{name}") as entry:
+                result = cached(*args, **kw)
+                hit = not computed.flag
+                entry['span'] = f"cache.{name}.{'hit' if hit else 'miss'}"
+            count_cache(name, hit)
+            return result
+
+        lookup.clear = cached.clear
+        return lookup
+    return decorate
+
+
+def _deep_size(value):
+    if hasattr(value, 'memory_usage'):  # DataFrame or Series
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+    if isinstance(value, (bytes, bytearray, str)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_deep_size(k) + _deep_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(_deep_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def session_memory():
+    """Approximate bytes held in this session's st.session_state"""
+    return sum(_deep_size(value) for value in st.session_state.to_dict().values())
+
+
+def process_rss():
+    """Current resident set size in bytes, where the platform exposes it"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+
+def debug_enabled():
+    if os.environ.get(DEBUG_ENV, '').lower() in ('1', 'true', 'yes'):
+        return True
+    return st.query_params.get('debug', '').lower() in ('1', 'true', 'yes')
+
+
+def _session_id():
+    if '_metrics_session' not in st.session_state:
+        st.session_state['_metrics_session'] = uuid.uuid4().hex[:12]
+    return st.session_state['_metrics_session']
+
+
+def debug_panel(page, trace, total_s, session_bytes):
+    """Sidebar breakdown of this run: spans, cache lookups and memory"""
+    import pandas as pd
+
+    spans = [e for e in trace if 'span' in e]
+    lookups = [e for e in trace if 'cache' in e]
+    with st.sidebar.expander(f"🛠️ Debug: {page} ({total_s * 1000:,.0f} ms)", expanded=True):
+        if spans:
+            table = pd.DataFrame({'Span': ['  ' * e['depth'] + e['span'] for e in spans],
+                                  'ms': [round(e['ms'], 1) for e in spans]})
+            st.dataframe(table, hide_index=True, use_container_width=True)
+        run = pd.DataFrame(lookups, columns=['cache', 'hit', 'depth'])
+        process = metrics.snapshot()['caches']
+        if process:
+            caches = pd.DataFrame({
+                'Cache': list(process),
+                'Run hits': [int(run.loc[run['cache'] == c, 'hit'].sum()) for c in process],
+                'Run misses': [int((~run.loc[run['cache'] == c, 'hit'].astype(bool)).sum()) for c in process],
+                'Total hits': [v['hits'] for v in process.values()],
+                'Total misses': [v['misses'] for v in process.values()],
+            })
+            st.dataframe(caches, hide_index=True, use_container_width=True)
+        rss = process_rss()
+        st.caption(f"Session state: {session_bytes / 1024:,.1f} KiB"
+                   + (f" · Process RSS: {rss / 2 ** 20:,.0f} MiB" if rss else ""))
+
+
+def instrumented_page(page):
+    """Decorator for a page's main(): page span, session memory, debug panel, export"""
+    def decorate(main):
+        @functools.wraps(main)
+        def wrapper(*args, **kwargs):
+            _local.trace, _local.depth = [], 0
+            start = time.perf_counter()
+            completed = False
+            try:
+                result = main(*args, **kwargs)
+                completed = True
+                return result
+            finally:
+                # st.stop()/st.rerun() raise through here; the run still counts
+                total_s = time.perf_counter() - start
+                trace, _local.trace = _local.trace, None
+                metrics.record_span(f"page.{page}", total_s)
+                session_bytes = session_memory()
+                metrics.record_session(_session_id(), session_bytes)
+                if completed and debug_enabled():
+                    debug_panel(page, trace, total_s, session_bytes)
+                flush()
+        return wrapper
+    return decorate
+
+
+def prometheus_text(snapshot):
+    """Prometheus text exposition of a metrics snapshot"""
+    def label(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+    lines = []
+
+    def family(name, kind, help_text, samples):
+        lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+        for labels, value in samples:
+            labelled = ','.join(f'{k}="{label(v)}"' for k, v in labels.items())
+            lines.append(f"{PREFIX}_{name}{{{labelled}}} {value}" if labelled else f"{PREFIX}_{name} {value}")
+
+    spans = snapshot['spans']
+    family('span_seconds_total', 'counter', "Seconds spent in each instrumented span",
+           [({'span': n}, round(s['total_s'], 6)) for n, s in spans.items()])
+    family('span_calls_total', 'counter', "Times each instrumented span ran",
+           [({'span': n}, s['count']) for n, s in spans.items()])
+    family('span_max_seconds', 'gauge', "Slowest single run of each span",
+           [({'span': n}, round(s['max_s'], 6)) for n, s in spans.items()])
+    family('cache_requests_total', 'counter', "Cache lookups by cache layer and result",
+           [({'cache': n, 'result': r}, c['hits' if r == 'hit' else 'misses'])
+            for n, c in snapshot['caches'].items() for r in ('hit', 'miss')])
+    family('session_state_bytes', 'gauge', "Approximate st.session_state size per session",
+           [({'session': s}, b) for s, b in snapshot['sessions'].items()])
+    for name, value in snapshot['gauges'].items():
+        if value is not None:
+            family(name, 'gauge', name.replace('_', ' ').capitalize(), [({}, value)])
+    family('start_time_seconds', 'gauge', "Unix time the metrics were last reset",
+           [({}, round(snapshot['started'], 3))])
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path, text):
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_text(text, encoding='utf-8')
+    tmp_path.replace(path)
+
+
+def flush(force=False, metrics_path=METRICS_PATH, prometheus_path=PROMETHEUS_PATH):
+    """Write the JSON and Prometheus files, at most every FLUSH_INTERVAL seconds"""
+    global _last_flush
+    now = time.monotonic()
+    with _flush_lock:
+        if not force and now - _last_flush < FLUSH_INTERVAL:
+            return False
+        _last_flush = now
+    from utils.render_cache import render_cache  # Imported here: render_cache imports this module
+
+    metrics.set_gauge('process_resident_bytes', process_rss())
+    metrics.set_gauge('render_cache_bytes', render_cache.nbytes)
+    snapshot = metrics.snapshot()
+    try:
+        Path(metrics_path).parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(Path(metrics_path), json.dumps(snapshot, indent=2))
+        _write_atomic(Path(prometheus_path), prometheus_text(snapshot))
+    except OSError:
+        return False  # Metrics are best effort; a read-only disk must not break a page
+    return True
+
+
+def hot_paths(snapshot, top=15):
+    """Spans ordered by total time, as rows of (span, calls, total_s, mean_ms, max_ms)"""
+    rows = [(name, s['count'], s['total_s'], s['total_s'] / s['count'] * 1000, s['max_s'] * 1000)
+            for name, s in snapshot['spans'].items() if s['count']]
+    return sorted(rows, key=lambda row: row[2], reverse=True)[:top]
+
+
+def serve(port, path=PROMETHEUS_PATH):
+    """Serve the Prometheus file written by the app at http://localhost:<port>/metrics"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            try:
+                body = Path(path).read_bytes()
+            except OSError:
+                self.send_error(503, "No metrics written yet")
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    with ThreadingHTTPServer(('', port), Handler) as server:
+        print(f"Serving {path} at http://localhost:{port}/metrics")
+        server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or serve the app's metrics")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="Serve metrics.prom over HTTP")
+    parser.add_argument("--top", type=int, default=15, help="Hot paths to list")
+    parser.add_argument("--metrics", type=Path, default=METRICS_PATH)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.serve, args.metrics.with_suffix('.prom'))
+        return
+    snapshot = json.loads(args.metrics.read_text())
+    print(f"{'span':<48} {'calls':>7} {'total s':>9} {'mean ms':>9} {'max ms':>9}")
+    for name, calls, total_s, mean_ms, max_ms in hot_paths(snapshot, args.top):
+        print(f"{name:<48} {calls:>7} {total_s:>9.3f} {mean_ms:>9.1f} {max_ms:>9.1f}")
+    for name, c in snapshot['caches'].items():
+        lookups = c['hits'] + c['misses']
+        print(f"cache {name:<42} {lookups:>7} lookups, {100 * c['hits'] / lookups:5.1f}% hits")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Partitioned on-disk results store: one Parquet file per exam/year/district.
+
+Layout (Hive-style, so other tools can read it too):
+
+    data/partitions/exam=UCE/year=2024/district=LIRA/part-0.parquet
+
+Reads walk the directory names to pick only the partitions a selection
+needs and read only the requested columns from each file, so memory and
+load time follow the sidebar selection rather than the national dataset.
+
+Build partitions from a results CSV with:
+
+    python -m utils.partitions data/northern_uganda_schools.csv --exam UCE --year 2024
+"""
+import argparse
+import json
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.data_loader import DATA_EXAM, DATA_PATH, DATA_YEAR, clean_frame, validate_frame
+
+PARTITION_ROOT = DATA_PATH.parent / "partitions"
+MANIFEST_PATH = PARTITION_ROOT / "_manifest.json"
+EXAMS = ('PLE', 'UCE', 'UACE')
+PARTITION_COLUMNS = ['Exam', 'Year']  # Derived from directory names
+
+
+def partition_path(exam, year, district, root=PARTITION_ROOT):
+    return Path(root) / f"exam={exam}" / f"year={year}" / f"district={district}" / "part-0.parquet"
+
+
+def _parse_key(part):
+    return part.split('=', 1)[1]
+
+
+def catalog(root=PARTITION_ROOT):
+    """Table of (Exam, Year, DistrictName, path) for every partition on disk.
+
+    This is a directory listing only; no Parquet file is opened.
+    """
+    rows = [
+        {'Exam': _parse_key(f.parts[-4]), 'Year': int(_parse_key(f.parts[-3])),
+         'DistrictName': _parse_key(f.parts[-2]), 'path': f}
+        for f in Path(root).glob("exam=*/year=*/district=*/part-0.parquet")
+    ]
+    return pd.DataFrame(rows, columns=['Exam', 'Year', 'DistrictName', 'path'])
+
+
+def has_partitions(root=PARTITION_ROOT):
+    """Whether a store has been built; for the default root, the manifest watcher's flag"""
+    if Path(root) != PARTITION_ROOT:
+        return Path(root).joinpath(MANIFEST_PATH.name).exists()
+    from utils.data_version import get_watcher  # Imported here: data_version imports this module
+
+    watcher = get_watcher(MANIFEST_PATH)
+    return watcher.exists and watcher.version is not None
+
+
+def write_partitions(df, exam, year, root=PARTITION_ROOT):
+    """Write a cleaned frame for one exam/year as one file per district"""
+    if exam not in EXAMS:
+        raise ValueError(f"Unknown exam {exam!r}; expected one of {EXAMS}")
+    root = Path(root)
+    # Drop districts that are no longer in this exam/year's results
+    year_dir = partition_path(exam, year, 'x', root).parent.parent
+    keep = {f"district={d}" for d in df['DistrictName'].unique()}
+    for stale in year_dir.glob("district=*"):
+        if stale.name not in keep:
+            shutil.rmtree(stale)
+
+    written = []
+    for district, group in df.groupby('DistrictName', observed=True, sort=True):
+        path = partition_path(exam, year, district, root)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        # Keep only this district's categories so each file's dictionary stays small
+        group = group.reset_index(drop=True).apply(
+            lambda col: col.cat.remove_unused_categories()
+            if isinstance(col.dtype, pd.CategoricalDtype) else col)
+        table = pa.Table.from_pandas(group, preserve_index=False)
+        pq.write_table(table, tmp_path, compression='zstd')
+        tmp_path.replace(path)
+        written.append({'exam': exam, 'year': int(year), 'district': str(district),
+                        'rows': len(group), 'bytes': path.stat().st_size})
+
+    # Rewriting the manifest last bumps the store's data version in one step
+    manifest_path = root / MANIFEST_PATH.name
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (OSError, ValueError):
+        manifest = {'partitions': []}
+    kept = [p for p in manifest['partitions'] if (p['exam'], p['year']) != (exam, int(year))]
+    manifest['partitions'] = kept + written
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+    if root == PARTITION_ROOT:
+        from utils.data_version import get_watcher
+
+        get_watcher(MANIFEST_PATH).check_now()  # Seen by this process without waiting for a poll
+    return written
+
+
+def build_from_csv(csv_path, exam, year, root=PARTITION_ROOT):
+    """Parse, validate and clean one results CSV and write it into the store.
+
+    Rows failing the quality rules are left out; see the returned report.
+    """
+    rows, report = validate_frame(pd.read_csv(csv_path))
+    return write_partitions(clean_frame(rows), exam, year, root), report
+
+
+def read_partitions(year=None, exam=None, districts=None, columns=None, root=PARTITION_ROOT):
+    """Read only the matching partitions, and only `columns` from each"""
+    parts = catalog(root)
+    if exam is not None:
+        parts = parts[parts['Exam'] == exam]
+    if year is not None:
+        parts = parts[parts['Year'] == int(year)]
+    if districts is not None:
+        parts = parts[parts['DistrictName'].isin(list(districts))]
+
+    file_columns = None if columns is None else [c for c in columns if c not in PARTITION_COLUMNS]
+    tables = []
+    for part in parts.itertuples(index=False):
+        table = pq.read_table(part.path, columns=file_columns)
+        if columns is None or 'Exam' in columns:
+            table = table.append_column('Exam', pa.array([part.Exam] * table.num_rows, pa.string()))
+        if columns is None or 'Year' in columns:
+            table = table.append_column('Year', pa.array([part.Year] * table.num_rows, pa.int16()))
+        tables.append(table)
+
+    if not tables:
+        return pd.DataFrame(columns=columns if columns is not None else [])
+    # Dictionary index widths differ between files (int8 for small districts)
+    df = pa.concat_tables(tables, promote_options='permissive').to_pandas()
+    return df[list(columns)] if columns is not None else df
+
+
+def selection_options(root=PARTITION_ROOT):
+    """(exam, year) -> sorted district list, for the sidebar filters.
+
+    Falls back to the bundled CSV when no partitioned store has been built.
+    """
+    if not has_partitions(root):
+        from utils.aggregates import get_summary  # Deferred: only needed without a store
+
+        return {(DATA_EXAM, DATA_YEAR): list(get_summary().districts.index)}
+    parts = catalog(root)
+    return {
+        (exam, int(year)): sorted(group['DistrictName'])
+        for (exam, year), group in parts.groupby(['Exam', 'Year'])
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add a results CSV to the partitioned store")
+    parser.add_argument("csv", type=Path)
+    parser.add_argument("--exam", choices=EXAMS, default=DATA_EXAM)
+    parser.add_argument("--year", type=int, default=DATA_YEAR)
+    parser.add_argument("--root", type=Path, default=PARTITION_ROOT)
+    args = parser.parse_args(argv)
+
+    written, report = build_from_csv(args.csv, args.exam, args.year, args.root)
+    print(f"Wrote {len(written)} district partitions "
+          f"({sum(p['rows'] for p in written)} rows) for {args.exam} {args.year} under {args.root}")
+    if report['rows_quarantined']:
+        print(f"Quarantined {report['rows_quarantined']} of {report['rows_read']} rows: " + ", ".join(
+            f"{name} {rule['rows']}" for name, rule in report['rules'].items() if rule['rows']))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compact dataset profile for the Overview page.
+
+`profile_frame` makes one vectorised pass over a frame and keeps only
+fixed-size results: null counts, a column x column null co-occurrence
+matrix, null density per block of rows (the scalable stand-in for a
+per-row missing-values matrix), summary statistics and a histogram per
+numeric column. Rendering works from the profile, so Overview's cost no
+longer depends on the number of rows.
+"""
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from utils import partitions
+from utils.data_version import dataset_version
+from utils.instrumentation import cache_resource, timed
+from utils.query import get_index
+
+HIST_BINS = 20
+NULL_BLOCKS = 100  # Row blocks in the missing-values pattern
+SUMMARY_INDEX = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+
+@dataclass(frozen=True)
+class DatasetProfile:
+    n_rows: int
+    null_counts: pd.Series  # Per column
+    null_cooccurrence: pd.DataFrame  # Rows where both columns are null
+    null_blocks: pd.DataFrame  # Share of nulls per column (columns) in each block of rows (index)
+    summary: pd.DataFrame  # describe()-style table of the numeric columns
+    distinct: pd.Series  # Distinct values per non-numeric column
+    histograms: dict  # Numeric column -> (counts, bin edges)
+
+    @property
+    def complete_pct(self):
+        """Percentage of cells that are not null"""
+        cells = self.n_rows * len(self.null_counts)
+        return 100 * (1 - self.null_counts.sum() / cells) if cells else 100.0
+
+
+@timed('aggregate.profile')
+def profile_frame(df, bins=HIST_BINS, blocks=NULL_BLOCKS):
+    """Profile every column of `df` in one pass over the data"""
+    columns = list(df.columns)
+    n = len(df)
+    nulls = df.isna().to_numpy()
+    null_counts = pd.Series(nulls.sum(axis=0), index=columns)
+    as_int = nulls.astype(np.int32)
+    cooccurrence = pd.DataFrame(as_int.T @ as_int, index=columns, columns=columns)
+
+    # Null share per block of consecutive rows
+    starts = np.unique(np.linspace(0, n, min(blocks, n) + 1).astype(int)[:-1])
+    sums = np.add.reduceat(as_int, starts, axis=0) if n else np.zeros((0, len(columns)))
+    sizes = np.diff(np.append(starts, n))
+    null_blocks = pd.DataFrame(sums / sizes[:, None], index=starts, columns=columns)
+
+    numeric = [col for col in columns if pd.api.types.is_numeric_dtype(df[col])
+               and not pd.api.types.is_bool_dtype(df[col])]
+    values = df[numeric].to_numpy(dtype=np.float64, na_value=np.nan)
+    counts = (~np.isnan(values)).sum(axis=0)
+    if not n:
+        values = np.full((1, len(numeric)), np.nan)  # Keeps the per-column shapes below
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # All-null or single-row columns give NaN
+        quantiles = np.nanpercentile(values, [0, 25, 50, 75, 100], axis=0)
+        mean = np.nanmean(values, axis=0)
+        std = np.nanstd(values, axis=0, ddof=1)
+    summary = pd.DataFrame([counts, mean, std, *quantiles], index=SUMMARY_INDEX, columns=numeric)
+
+    histograms = {}
+    for i, col in enumerate(numeric):
+        finite = values[:, i][~np.isnan(values[:, i])]
+        histograms[col] = np.histogram(finite, bins=bins) if len(finite) else (np.zeros(bins), np.zeros(bins + 1))
+
+    other = [col for col in columns if col not in numeric]
+    distinct = pd.Series({col: df[col].nunique() for col in other}, dtype='int64')
+
+    return DatasetProfile(
+        n_rows=n,
+        null_counts=null_counts,
+        null_cooccurrence=cooccurrence,
+        null_blocks=null_blocks,
+        summary=summary,
+        distinct=distinct,
+        histograms=histograms,
+    )
+
+
+@cache_resource('profile', max_entries=16, show_spinner=False)
+def _profile_for(version, year, exam, districts):
+    return profile_frame(get_index(year, exam).select(districts))
+
+
+def get_profile(year=None, exam=None, districts=None):
+    """Cached DatasetProfile of the selected districts for the current dataset version"""
+    if not partitions.has_partitions():
+        year = exam = None  # Only the bundled dataset exists
+    districts = None if districts is None else tuple(sorted(districts))
+    return _profile_for(dataset_version(year, exam), year, exam, districts)
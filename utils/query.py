@@ -0,0 +1,202 @@
+"""District-indexed query layer shared by every page.
+
+The dataset is sorted once per version by district, and each district's
+rows are recorded as a contiguous (start, stop) slice computed from the
+categorical codes. A district, or a run of neighbouring districts, is then
+a zero-copy slice of the sorted frame, and each filter set is memoized.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils import partitions
+from utils.data_loader import get_dataset
+from utils.data_version import current_version, dataset_version
+from utils.instrumentation import cache_resource, count_cache, timed
+
+FILTER_KEY = 'selected_districts'  # Session key shared by every page
+SITTING_KEY = 'selected_sitting'  # (exam, year), shared the same way
+MEMO_SIZE = 32  # Filter sets remembered per index
+# Column projections the Enrollment and Performance pages index (warmed by utils.refresh)
+ENROLLMENT_COLUMNS = ['CentreName', 'DistrictName', 'Total']
+PERFORMANCE_COLUMNS = ['CentreName', 'DistrictName', 'A_Percentage', 'Absenteeism_Rate', 'Total']
+
+
+class DistrictIndex:
+    """A frame sorted by DistrictName plus a district -> row-slice index"""
+
+    @timed('filter.index_build')
+    def __init__(self, df):
+        districts = pd.Categorical(df['DistrictName'])
+        order = np.argsort(districts.codes, kind='stable')
+        self.frame = df.iloc[order].reset_index(drop=True)
+        counts = np.bincount(districts.codes[order], minlength=len(districts.categories))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.districts = list(districts.categories)
+        self.offsets = offsets
+        self._position = {name: i for i, name in enumerate(self.districts)}
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.frame)
+
+    def district(self, name):
+        """All rows of one district, as a view of the sorted frame"""
+        i = self._position[name]
+        return self.frame.iloc[self.offsets[i]:self.offsets[i + 1]]
+
+    def _runs(self, districts):
+        """Row ranges covering the districts, with neighbours merged"""
+        positions = sorted(self._position[d] for d in set(districts) if d in self._position)
+        runs = []
+        for i in positions:
+            start, stop = self.offsets[i], self.offsets[i + 1]
+            if runs and runs[-1][1] == start:
+                runs[-1] = (runs[-1][0], stop)
+            else:
+                runs.append((start, stop))
+        return runs
+
+    @timed('filter.select')
+    def select(self, districts=None, columns=None):
+        """Rows for a set of districts (None means all), memoized per set.
+
+        A selection that forms one contiguous run, such as a single district
+        or every district, is a view; otherwise the runs are concatenated.
+        Callers get a copy-on-write view, so they may modify it freely.
+        """
+        key = (None if districts is None else frozenset(districts),
+               None if columns is None else tuple(columns))
+        with self._lock:
+            hit = key in self._memo
+            if hit:
+                self._memo.move_to_end(key)
+                result = self._memo[key]
+        count_cache('selection_memo', hit)
+        if hit:
+            return result.copy(deep=False)  # Copy-on-write view
+
+        if districts is None:
+            result = self.frame
+        else:
+            runs = self._runs(districts)
+            if not runs:
+                result = self.frame.iloc[0:0]
+            elif len(runs) == 1:
+                result = self.frame.iloc[runs[0][0]:runs[0][1]]
+            else:
+                result = pd.concat([self.frame.iloc[start:stop] for start, stop in runs],
+                                   ignore_index=True)
+        if columns is not None:
+            result = result[list(columns)]
+
+        with self._lock:
+            self._memo[key] = result
+            if len(self._memo) > MEMO_SIZE:
+                self._memo.popitem(last=False)
+        return result.copy(deep=False)
+
+
+@cache_resource('district_index', max_entries=8, show_spinner=False)
+def _index_for(version, year, exam, columns):
+    if columns is not None and 'DistrictName' not in columns:
+        columns = ('DistrictName', *columns)
+    if year is None and exam is None:
+        # The bundled dataset, as keyed by dataset_version(None, None)
+        return DistrictIndex(get_dataset().view(columns))
+    return DistrictIndex(get_dataset(year=year, exam=exam, columns=columns).view())
+
+
+def get_index(year=None, exam=None, columns=None):
+    """Shared DistrictIndex for the current version of a dataset.
+
+    Without arguments this indexes the bundled dataset; `year`/`exam` pick a
+    sitting from the partitioned store and `columns` narrows what is loaded.
+    """
+    if not partitions.has_partitions():
+        year = exam = None  # Only the bundled dataset exists
+    columns = None if columns is None else tuple(columns)
+    return _index_for(dataset_version(year, exam), year, exam, columns)
+
+
+def selected_districts(options):
+    """The shared district filter, restricted to the districts on offer"""
+    stored = st.session_state.get(FILTER_KEY)
+    if stored is None:
+        return list(options)
+    return [d for d in options if d in set(stored)]
+
+
+def district_filter(options):
+    """Sidebar district multiselect whose selection follows the user across pages.
+
+    Streamlit drops a widget's state when a page that doesn't render it
+    runs, so the selection is kept under FILTER_KEY and copied back into the
+    widget on every page.
+    """
+    widget_key = f"_{FILTER_KEY}_widget"
+    st.session_state[widget_key] = selected_districts(options)
+
+    def _store():
+        st.session_state[FILTER_KEY] = st.session_state[widget_key]
+
+    st.sidebar.multiselect(
+        "Select Districts",
+        options=list(options),
+        key=widget_key,
+        on_change=_store,
+        help="Filter schools by district (applies to every page)"
+    )
+    return st.session_state[widget_key]
+
+
+@cache_resource('sittings', max_entries=2, show_spinner=False)
+def _sittings_for(version):
+    return partitions.selection_options()
+
+
+def sitting_options():
+    """(exam, year) -> districts for every sitting on offer, listed once per version"""
+    if partitions.has_partitions():
+        return _sittings_for(current_version(partitions.MANIFEST_PATH))
+    return _sittings_for(current_version())
+
+
+def sitting_filter():
+    """Sidebar exam-sitting picker that follows the user across pages, like district_filter.
+
+    Returns (year, exam) for the data getters: (None, None) without a
+    partitioned store, where the bundled CSV is the only sitting.
+    """
+    options = sitting_options()
+    sittings = sorted(options, key=lambda sitting: (sitting[1], sitting[0]), reverse=True)
+    widget_key = f"_{SITTING_KEY}_widget"
+    stored = st.session_state.get(SITTING_KEY)
+    st.session_state[widget_key] = stored if stored in options else sittings[0]
+
+    def _store():
+        st.session_state[SITTING_KEY] = st.session_state[widget_key]
+
+    st.sidebar.selectbox(
+        "Exam Sitting",
+        options=sittings,
+        key=widget_key,
+        on_change=_store,
+        format_func=lambda sitting: f"{sitting[0]} {sitting[1]}",
+        help="Results release to analyse (applies to every page)"
+    )
+    if not partitions.has_partitions():
+        return None, None
+    exam, year = st.session_state[widget_key]
+    return year, exam
+
+
+def require_selection(districts):
+    """Stop the page with a hint when the district filter is empty"""
+    if not districts:
+        st.warning("⚠️ No districts selected. Pick at least one in the sidebar filter.")
+        st.stop()
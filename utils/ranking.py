@@ -0,0 +1,144 @@
+"""Vectorised school rankings over the grade distribution.
+
+`SchoolRanking` builds the (schools x grades) count matrix once and scores
+every school in one NumPy pass:
+
+    A_Percentage  As / Total, as on the other pages
+    grade_points  mean points per graded candidate (A=5 ... E=1)
+    pass_rate     share of graded candidates with A-D
+    composite     weighted blend of the three, on a 0-100 scale
+
+For each score it keeps a descending order, an ascending sorted copy for
+binary search and per-district orders and percentile ranks, so top-N,
+rank-of-school and percentile queries never re-sort the table.
+"""
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from utils import partitions
+from utils.data_loader import GRADE_COLUMNS
+from utils.data_version import dataset_version
+from utils.instrumentation import cache_resource, timed
+from utils.query import get_index
+
+GRADE_POINTS = np.array([5, 4, 3, 2, 1], dtype=np.float64)  # As..Es
+PASS_GRADES = np.array([1, 1, 1, 1, 0], dtype=np.float64)  # E is a fail
+COMPOSITE_WEIGHTS = {'grade_points': 0.5, 'pass_rate': 0.3, 'A_Percentage': 0.2}
+
+METRICS = {
+    'A_Percentage': 'Grade "A" %',
+    'composite': 'Composite score',
+    'grade_points': 'Mean grade points',
+    'pass_rate': 'Pass rate %',
+}
+RANKING_COLUMNS = ['CentreName', 'DistrictName', *GRADE_COLUMNS, 'Total', 'A_Percentage']
+
+
+def score_matrix(grades, total):
+    """Every score for every school, from an (n, 5) As..Es count matrix"""
+    grades = np.asarray(grades, dtype=np.float64)
+    total = np.asarray(total, dtype=np.float64)
+    graded = grades.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        points = (grades @ GRADE_POINTS) / graded
+        passed = (grades @ PASS_GRADES) / graded * 100
+        a_pct = grades[:, 0] / total * 100
+    scores = {'A_Percentage': a_pct, 'grade_points': points, 'pass_rate': passed}
+    # Scale mean points (1-5) to 0-100 so the composite blends like with like
+    scaled = {**scores, 'grade_points': (points - 1) / 4 * 100}
+    scores['composite'] = sum(w * scaled[m] for m, w in COMPOSITE_WEIGHTS.items())
+    return scores
+
+
+class SchoolRanking:
+    """Scores, sorted orders and district percentiles for a school-level frame"""
+
+    @timed('rank.build')
+    def __init__(self, df):
+        self.frame = df[RANKING_COLUMNS].reset_index(drop=True)
+        self.scores = score_matrix(self.frame[GRADE_COLUMNS].to_numpy(), self.frame['Total'].to_numpy())
+        districts = pd.Categorical(self.frame['DistrictName'])
+        self._codes = districts.codes
+        self._district_position = {d: i for i, d in enumerate(districts.categories)}
+        self._school_position = {}  # (district, centre) -> row; names repeat across districts
+        for i, key in enumerate(zip(self.frame['DistrictName'], self.frame['CentreName'])):
+            self._school_position.setdefault(key, i)
+
+        self._order = {}  # metric -> row positions, best first, NaN scores last
+        self._sorted = {}  # metric -> non-NaN scores, ascending
+        self._district_order = {}  # metric -> {district code: row positions, best first}
+        self._district_sorted = {}  # metric -> {district code: non-NaN scores, ascending}
+        self.percentiles = {}  # metric -> percentile of each school within its district
+        for metric, values in self.scores.items():
+            keyed = np.where(np.isnan(values), -np.inf, values)
+            order = np.argsort(-keyed, kind='stable')  # Ties keep file order
+            self._order[metric] = order
+            self._sorted[metric] = np.sort(values[~np.isnan(values)])
+
+            by_district = order[np.argsort(self._codes[order], kind='stable')]
+            bounds = np.searchsorted(self._codes[by_district], np.arange(len(districts.categories) + 1))
+            groups = {c: by_district[bounds[c]:bounds[c + 1]] for c in range(len(districts.categories))}
+            self._district_order[metric] = groups
+            self._district_sorted[metric] = {
+                c: np.sort(values[rows][~np.isnan(values[rows])]) for c, rows in groups.items()}
+            self.percentiles[metric] = (pd.Series(values).groupby(self._codes)
+                                        .rank(pct=True).to_numpy() * 100)
+
+    def __len__(self):
+        return len(self.frame)
+
+    @timed('rank.top')
+    def top(self, n=10, metric='A_Percentage', districts=None):
+        """Best `n` schools by `metric`, optionally within a set of districts"""
+        if districts is None:
+            rows = self._order[metric][:n]
+        else:
+            # Each district's list is already sorted; merge their heads
+            values = self.scores[metric]
+            groups = self._district_order[metric]
+            heads = [groups[self._district_position[d]][:n]
+                     for d in set(districts) if d in self._district_position]
+            keyed = lambda i: -np.inf if np.isnan(values[i]) else values[i]
+            rows = heapq.nlargest(n, (i for head in heads for i in head), key=keyed)
+        return self._table(np.asarray(rows, dtype=np.intp), metric)
+
+    def _table(self, rows, metric):
+        table = self.frame.iloc[rows][['CentreName', 'DistrictName', 'Total']].copy()
+        table.insert(2, metric, self.scores[metric][rows])
+        table['District_Percentile'] = self.percentiles[metric][rows]
+        return table.reset_index(drop=True)
+
+    def score_of(self, school, district, metric='A_Percentage'):
+        return self.scores[metric][self._school_position[(district, school)]]
+
+    def rank_of(self, school, district, metric='A_Percentage'):
+        """1-based rank of a school across the whole dataset (ties share the best rank)"""
+        score = self.score_of(school, district, metric)
+        if np.isnan(score):
+            return None
+        ranked = self._sorted[metric]
+        return len(ranked) - np.searchsorted(ranked, score, side='right') + 1
+
+    def percentile_of(self, score, metric='A_Percentage', district=None):
+        """Percentage of schools (in the whole dataset or in `district`) scoring at or below `score`"""
+        if district is None:
+            ranked = self._sorted[metric]
+        else:
+            ranked = self._district_sorted[metric][self._district_position[district]]
+        if not len(ranked):
+            return float('nan')
+        return np.searchsorted(ranked, score, side='right') / len(ranked) * 100
+
+
+@cache_resource('ranking', max_entries=4, show_spinner=False)
+def _ranking_for(version, year, exam):
+    return SchoolRanking(get_index(year, exam).select())
+
+
+def get_ranking(year=None, exam=None):
+    """Shared SchoolRanking for the current dataset version"""
+    if not partitions.has_partitions():
+        year = exam = None  # Only the bundled dataset exists
+    return _ranking_for(dataset_version(year, exam), year, exam)
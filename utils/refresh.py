@@ -0,0 +1,159 @@
+"""Background refresh: build a new dataset version before anyone reads it.
+
+One RefreshWorker thread per watched source subscribes to its DataWatcher.
+When the watcher detects new content the worker builds, for the new version
+and off the request path, everything the pages read on their default
+(all-district) view: the cleaned frame, the district index and the
+column-projected indexes of Enrollment and Performance, summaries,
+rankings, the search index, the year-over-year trends, subregion summaries,
+the dataset profile, the inference results and the charts from Enrollment
+and Overview. Only then is the version published. Publishing is a single
+assignment on the watcher, so every session moves from the old snapshot to
+the new one at once. Until then the
+previous snapshot stays in the caches (each keeps at least two versions)
+and pages show a "data updating" badge instead of blocking.
+
+A failed build leaves the previous snapshot published and is reported in
+the badge; the next change to the source triggers a new attempt.
+"""
+import threading
+import time
+from pathlib import Path
+
+import streamlit as st
+
+from utils import partitions
+from utils.data_loader import DATA_PATH
+from utils.data_version import building, get_watcher
+from utils.instrumentation import metrics, span
+
+
+def _warm_bundled():
+    from utils.aggregates import get_summary
+    from utils.analytics import enrollment_metrics
+    from utils.inference import get_inference
+    from utils.profile import get_profile
+    from utils.query import ENROLLMENT_COLUMNS, PERFORMANCE_COLUMNS, get_index
+    from utils.ranking import get_ranking
+    from utils.render_cache import cached_chart, render_cache
+    from utils.search import get_search
+    from utils.subregions import get_subregion_summaries
+    from utils.trends import get_trends
+    from utils.visualizations import (plot_district_enrollment, plot_missing_values,
+                                      plot_school_size_distribution)
+
+    summary = get_summary()
+    districts = list(summary.districts.index)  # The default sidebar selection
+    get_index().select(districts)
+    frame = get_index(columns=ENROLLMENT_COLUMNS).select(districts)  # As the pages select them
+    get_index(columns=PERFORMANCE_COLUMNS).select(districts, columns=PERFORMANCE_COLUMNS)
+    get_ranking()
+    get_search()
+    if not partitions.has_partitions():
+        get_trends()  # Otherwise built from the partitioned store
+    get_subregion_summaries()
+    profile = get_profile(districts=districts)
+    get_inference(districts=districts)
+
+    theme = render_cache.last_theme
+    enrollment = enrollment_metrics(summary)
+    cached_chart(plot_district_enrollment, enrollment['district_enrollment'], filters=districts, theme=theme)
+    cached_chart(plot_school_size_distribution, frame, enrollment['size_stats']['50%'],
+                 filters=districts, theme=theme)
+    cached_chart(plot_missing_values, profile, filters=districts, theme=theme)
+
+
+def _warm_partitions():
+    from utils.aggregates import get_summary
+    from utils.query import get_index
+    from utils.trends import get_trends
+
+    options = partitions.selection_options()
+    for exam, year in options:
+        get_summary(year, exam)
+        get_index(year, exam)
+    for exam in {exam for exam, _ in options}:
+        get_trends(exam)
+
+
+class RefreshWorker:
+    """Builds each newly detected version of one source, then publishes it"""
+
+    def __init__(self, watcher, warm):
+        self.watcher = watcher
+        self.warm = warm
+        self.building = None  # Version being built, if any
+        self.error = None  # Why the last build failed, if it did
+        self.build_seconds = None
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"refresh-{watcher.path.name}",
+                                        daemon=True)
+
+    def start(self):
+        self.watcher.subscribe(lambda version: self._wake.set())
+        self._thread.start()
+        if self.watcher.updating:
+            self._wake.set()  # Changed before we subscribed
+        return self
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            version = self.watcher.latest
+            if version == self.watcher.version:
+                continue
+            self.build(version)
+
+    def build(self, version):
+        """Build every cache for `version` and publish it; False if that failed"""
+        self.building = version
+        start = time.perf_counter()
+        try:
+            with span('refresh.build'), building(self.watcher.path, version):
+                self.warm()
+        except Exception as e:  # Keep serving the previous snapshot
+            self.error = f"{type(e).__name__}: {e}"
+            metrics.record_cache('refresh', False)
+            return False
+        finally:
+            self.building = None
+            self.build_seconds = time.perf_counter() - start
+        self.error = None
+        self.watcher.publish(version)
+        metrics.record_cache('refresh', True)
+        return True
+
+
+WARMERS = {
+    str(DATA_PATH.resolve()): _warm_bundled,
+    str(partitions.MANIFEST_PATH.resolve()): _warm_partitions,
+}
+_workers = {}  # Keyed like utils.data_version's watchers
+_workers_lock = threading.Lock()
+
+
+def get_refresher(path=DATA_PATH):
+    """Return the process-wide refresh worker for a source file, starting it once"""
+    worker = _workers.get(str(path))  # No resolve() (a stat) on the rerun path
+    if worker is not None:
+        return worker
+    key = str(Path(path).resolve())
+    with _workers_lock:
+        if key not in _workers:
+            _workers[key] = RefreshWorker(get_watcher(path), WARMERS[key]).start()
+        _workers[str(path)] = _workers[key]
+        return _workers[key]
+
+
+def update_badge():
+    """Sidebar notice while a newer dataset version is being prepared"""
+    sources = [DATA_PATH] + ([partitions.MANIFEST_PATH] if partitions.has_partitions() else [])
+    for path in sources:
+        worker = get_refresher(path)
+        if worker.error and worker.watcher.updating:
+            st.sidebar.warning(f"⚠️ New data could not be loaded ({worker.error}). "
+                               f"Showing the version from {worker.watcher.changed_at:%Y-%m-%d %H:%M}.")
+        elif worker.watcher.updating:
+            st.sidebar.info(f"🔄 Data updating. Showing the version from "
+                            f"{worker.watcher.changed_at:%Y-%m-%d %H:%M} until the new one is ready.")
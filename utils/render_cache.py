@@ -0,0 +1,134 @@
+"""Process-wide cache of rendered charts.
+
+Charts are keyed by (chart function, dataset version, filter set, theme,
+extra key) and stored as serialised output: PNG bytes for matplotlib
+figures and Plotly JSON for Plotly figures. Entries are evicted least
+recently used first once the total size passes a byte budget. Matplotlib
+figures are closed as soon as they are rendered, so repeat views serve
+bytes and pyplot's figure registry doesn't grow.
+"""
+import io
+import json
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from utils.data_version import dataset_version
+from utils.instrumentation import count_cache, span
+
+RENDER_BUDGET = 64 * 1024 * 1024  # Bytes of rendered output kept in memory
+PNG_DPI = 110
+
+
+class RenderCache:
+    """LRU mapping of chart keys to rendered payloads, bounded by total bytes"""
+
+    def __init__(self, budget=RENDER_BUDGET):
+        self.budget = budget
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.last_theme = None  # Theme of the latest session; the background refresher renders for it
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, kind, payload):
+        size = len(payload)
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= len(self._entries.pop(key)[1])
+            if size > self.budget:
+                return  # Too big to keep; serve it once
+            self._entries[key] = (kind, payload)
+            self.nbytes += size
+            while self.nbytes > self.budget:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+
+render_cache = RenderCache()
+
+
+def serialise_figure(fig):
+    """Render a figure to ('png', bytes) or ('plotly', json), closing matplotlib figures"""
+    if hasattr(fig, 'to_plotly_json'):
+        return 'plotly', fig.to_json().encode('utf-8')
+
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format='png', dpi=PNG_DPI, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    return 'png', buffer.getvalue()
+
+
+def current_theme():
+    """'light' or 'dark' where Streamlit exposes it, else None"""
+    theme = getattr(getattr(st, 'context', None), 'theme', None)
+    return getattr(theme, 'type', None)
+
+
+def _filter_key(filters):
+    if filters is None:
+        return None
+    if isinstance(filters, (list, tuple, set, frozenset)):
+        return tuple(sorted(map(str, filters)))
+    return str(filters)
+
+
+def cached_chart(chart_fn, *args, filters=None, version=None, key=None, theme=None, **kwargs):
+    """Rendered (kind, payload) for chart_fn(*args, **kwargs), built at most once per key.
+
+    `filters` and `key` must identify everything that changes the chart
+    besides the dataset version; the arguments themselves are not hashed.
+    `theme` defaults to the current session's.
+    """
+    if theme is None:
+        theme = render_cache.last_theme = current_theme()
+    cache_key = (
+        f"{chart_fn.__module__}.{chart_fn.__qualname__}",
+        dataset_version() if version is None else version,
+        _filter_key(filters),
+        theme,
+        key,
+    )
+    entry = render_cache.get(cache_key)
+    count_cache('render', entry is not None)
+    if entry is None:
+        with span(f"chart.{chart_fn.__name__}.build"):
+            fig = chart_fn(*args, **kwargs)
+        with span(f"chart.{chart_fn.__name__}.serialise"):
+            entry = serialise_figure(fig)
+        render_cache.put(cache_key, *entry)
+    return entry
+
+
+def render_chart(chart_fn, *args, filters=None, version=None, key=None, **kwargs):
+    """Draw a chart in the page from the render cache"""
+    kind, payload = cached_chart(chart_fn, *args, filters=filters, version=version, key=key, **kwargs)
+    with span(f"chart.{chart_fn.__name__}.draw"):
+        if kind == 'png':
+            st.image(payload)
+        else:
+            st.plotly_chart(json.loads(payload), use_container_width=True)
@@ -0,0 +1,148 @@
+"""Headless batch reports: the dashboard's findings for every district and subregion.
+
+The dataset is loaded once, sorted into a DistrictIndex and then shared
+with a pool of worker processes (inherited by fork where the platform
+supports it, otherwise memory-mapped from the Feather cache by each
+worker). Each worker builds the report for one scope through
+utils.analytics, so the numbers match the pages, and writes it as
+Markdown, HTML and CSV. Nothing here touches the Streamlit runtime.
+
+    python -m utils.reports --out reports
+    python -m utils.reports --out reports --format md csv --workers 4
+
+Output layout:
+
+    reports/summary.csv                  one row of headline metrics per scope
+    reports/<kind>/<name>.md|.html|.csv  kind is all, subregion or district
+"""
+import argparse
+import html
+import multiprocessing
+import os
+import re
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from utils import partitions
+from utils.analytics import build_report
+from utils.data_loader import DATA_EXAM, DATA_YEAR, DistrictRunningStats, read_dataset
+from utils.query import DistrictIndex
+from utils.subregions import load_registry
+
+FORMATS = ('md', 'html', 'csv')
+ALL_SCOPE = "Northern Uganda"
+
+_index = None  # DistrictIndex shared by the workers of one run
+
+
+def _load_index(year=None, exam=None):
+    if (year is None and exam is None) or not partitions.has_partitions():
+        return DistrictIndex(read_dataset())
+    return DistrictIndex(partitions.read_partitions(year=year, exam=exam))
+
+
+def _init_worker(year, exam):
+    global _index
+    if _index is None:  # Not inherited from the parent (spawn start method)
+        _index = _load_index(year, exam)
+
+
+def scopes(districts):
+    """(kind, name, districts) for the whole dataset, each subregion and each district"""
+    available = set(districts)
+    result = [('all', ALL_SCOPE, None)]
+    for name, members in load_registry().items():
+        present = [d for d in members if d in available]
+        if present:
+            result.append(('subregion', name, present))
+    result.extend(('district', d, [d]) for d in districts)
+    return result
+
+
+def slugify(name):
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def render_markdown(report):
+    lines = [f"# {report.name} ({report.kind})", ""]
+    for heading, bullets in report.sections:
+        lines += [f"## {heading}", "", *(f"- {b}" for b in bullets), ""]
+    return "\n".join(lines)
+
+
+def render_html(report):
+    parts = [
+        "<!DOCTYPE html>",
+        "<html><head><meta charset=\"utf-8\">",
+        f"<title>{html.escape(report.name)}</title></head><body>",
+        f"<h1>{html.escape(report.name)} ({html.escape(report.kind)})</h1>",
+    ]
+    for heading, bullets in report.sections:
+        parts.append(f"<h2>{html.escape(heading)}</h2>")
+        parts.append("<ul>" + "".join(f"<li>{html.escape(b)}</li>" for b in bullets) + "</ul>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def _write_scope(task):
+    """Build and write one scope's report; runs in a worker process"""
+    (kind, name, districts), out_dir, formats = task
+    df = _index.select(districts)
+    with warnings.catch_warnings():
+        # Single-school districts have no spread or correlation; they report NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        report = build_report(kind, name, df)
+
+    base = Path(out_dir) / kind / slugify(name)
+    base.parent.mkdir(parents=True, exist_ok=True)
+    if 'md' in formats:
+        base.with_suffix('.md').write_text(render_markdown(report), encoding='utf-8')
+    if 'html' in formats:
+        base.with_suffix('.html').write_text(render_html(report), encoding='utf-8')
+    if 'csv' in formats:
+        table = DistrictRunningStats.from_frame(df).district_table()
+        table.rename_axis('DistrictName').to_csv(base.with_suffix('.csv'))
+    return {'kind': kind, 'name': name, **report.metrics}
+
+
+def write_reports(out_dir, formats=FORMATS, workers=None, year=None, exam=None):
+    """Write every scope's report under `out_dir` and return the summary table"""
+    global _index
+    _index = _load_index(year, exam)
+    present = [d for i, d in enumerate(_index.districts) if _index.offsets[i + 1] > _index.offsets[i]]
+    tasks = [(scope, str(out_dir), tuple(formats)) for scope in scopes(present)]
+
+    # Fork shares the loaded index with the workers; spawn reloads it from the cache
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    workers = workers or min(len(tasks), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(year, exam)) as pool:
+        rows = list(pool.map(_write_scope, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+    summary = pd.DataFrame(rows)
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    summary.to_csv(Path(out_dir) / "summary.csv", index=False)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write dashboard findings for every district and subregion")
+    parser.add_argument("--out", type=Path, default=Path("reports"))
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=list(FORMATS), dest="formats")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--exam", choices=partitions.EXAMS, default=None,
+                        help=f"Exam sitting from the partitioned store (default: bundled {DATA_EXAM})")
+    parser.add_argument("--year", type=int, default=None,
+                        help=f"Year from the partitioned store (default: bundled {DATA_YEAR})")
+    args = parser.parse_args(argv)
+
+    summary = write_reports(args.out, args.formats, args.workers, args.year, args.exam)
+    print(f"Wrote {len(summary)} reports ({', '.join(args.formats)}) under {args.out}")
+
+
+if __name__ == "__main__":
+    main()
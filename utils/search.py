@@ -0,0 +1,213 @@
+"""Typo-tolerant search over centre and district names.
+
+Names are normalised (upper case, punctuation and runs of spaces collapsed
+to one space), so "ST.GRACIOUS SECONDARY SCHOOL,LIRA" and "st gracious
+secondary school lira" are the same text. Each name is indexed once per
+dataset version in two ways:
+
+    trigrams  every space-padded 3-character gram of every word, as
+              posting lists (entry ids per gram) in one flat array
+    prefixes  every word, sorted, for binary-search prefix lookups
+
+Candidates come from the posting lists of the query's rarer grams (those
+in most names, such as "SEC" and "SCH", would return everything) and from
+words starting with the last word typed. Each candidate is then scored
+exactly against its own grams: the share of the query's trigrams it
+contains, plus a bonus for the prefix match. A query reads a few short
+posting lists and at most a few thousand candidates' grams, however large
+the dataset.
+"""
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+from utils import partitions
+from utils.data_version import dataset_version
+from utils.instrumentation import cache_resource, timed
+from utils.query import get_index
+
+SEARCH_COLUMNS = ['No', 'CentreName', 'DistrictName']
+MIN_OVERLAP = 0.5  # Share of the query's trigrams a fuzzy match must contain
+PREFIX_BONUS = 0.5  # Added to the score when the last query word is a word prefix
+COMMON_GRAM = 0.2  # Grams in more than this share of names are skipped when rarer ones exist
+PREFIX_CAP = 1000  # Prefix matches (and fallback candidates) considered per query
+CANDIDATE_CAP = 2000  # Fuzzy candidates scored per query, most shared rare grams first
+TIE_STEP = 1e-6  # Per-trigram penalty so shorter names win ties; well below any score step
+LIMIT = 10
+
+
+def normalise_text(text):
+    """'St.Gracious  Secondary School,Lira' -> 'ST GRACIOUS SECONDARY SCHOOL LIRA'"""
+    return re.sub(r'[^A-Z0-9]+', ' ', str(text).upper()).strip()
+
+
+def word_trigrams(word):
+    padded = f" {word} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    kind: str  # 'centre' or 'district'
+    name: str  # CentreName, or DistrictName for districts
+    district: str
+    row: int  # Position in the search frame; -1 for districts
+    score: float
+
+    @property
+    def label(self):
+        return self.name if self.kind == 'district' else f"{self.name} ({self.district})"
+
+
+def _postings(keys, values, n_keys):
+    """CSR lists: `values` grouped by key, and each key's (start, stop) offsets"""
+    order = np.argsort(keys, kind='stable')  # Values stay ascending within a key
+    return values[order], np.concatenate([[0], np.cumsum(np.bincount(keys, minlength=n_keys))])
+
+
+def _gather(flat, offsets, rows):
+    """Concatenated CSR lists of `rows`, and the position in `rows` each item came from"""
+    lengths = offsets[rows + 1] - offsets[rows]
+    starts = np.repeat(offsets[rows] - np.cumsum(lengths) + lengths, lengths)
+    return flat[starts + np.arange(lengths.sum())], np.repeat(np.arange(len(rows)), lengths)
+
+
+class SearchIndex:
+    """Trigram and word postings, plus forward lists, over centre and district names"""
+
+    @timed('search.build')
+    def __init__(self, df):
+        self.frame = df[SEARCH_COLUMNS].reset_index(drop=True)
+        districts = sorted(map(str, self.frame['DistrictName'].dropna().unique()))
+        names = [*map(str, self.frame['CentreName']), *districts]
+        self.names = np.asarray(names, dtype=object)
+        self.kinds = np.asarray(['centre'] * len(self.frame) + ['district'] * len(districts), dtype=object)
+        self.entry_district = np.asarray([*map(str, self.frame['DistrictName']), *districts], dtype=object)
+
+        # Names -> word ids is the only per-name Python loop; the rest works on arrays
+        word_id = {}
+        entry_words = []
+        n_words = np.zeros(len(names), dtype=np.int32)
+        for entry, name in enumerate(names):
+            words = dict.fromkeys(normalise_text(name).split())
+            entry_words.extend(word_id.setdefault(word, len(word_id)) for word in words)
+            n_words[entry] = len(words)
+
+        # Word ids follow alphabetical order, so a prefix is one contiguous id range
+        vocabulary = np.asarray(list(word_id), dtype=str)
+        order = np.argsort(vocabulary)
+        alphabetical = np.empty(len(order), dtype=np.int32)
+        alphabetical[order] = np.arange(len(order))
+        self._vocabulary = vocabulary[order]
+        self._entry_words = alphabetical[np.asarray(entry_words, dtype=np.int32)]
+        self._entry_word_offsets = np.concatenate([[0], np.cumsum(n_words)])
+        word_owner = np.repeat(np.arange(len(names), dtype=np.int32), n_words)
+        self._word_postings, self._word_offsets = _postings(self._entry_words, word_owner, len(self._vocabulary))
+
+        # Each distinct word is gram-split once; a name's grams are the union of its words'
+        self._grams = {}
+        word_grams = [[self._grams.setdefault(g, len(self._grams)) for g in word_trigrams(word)]
+                      for word in self._vocabulary]
+        word_gram_offsets = np.concatenate([[0], np.cumsum([len(grams) for grams in word_grams])])
+        word_gram_ids = np.asarray([g for grams in word_grams for g in grams], dtype=np.int64)
+        grams, position = _gather(word_gram_ids, word_gram_offsets, self._entry_words)
+        keys = np.sort(word_owner[position].astype(np.int64) * len(self._grams) + grams)
+        keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]  # Grams shared by two words
+        gram_owner = (keys // len(self._grams)).astype(np.int32)
+
+        # Forward list (entry -> grams, sorted) and inverted postings (gram -> entries)
+        self._entry_grams = (keys % len(self._grams)).astype(np.int32)
+        self.n_grams = np.bincount(gram_owner, minlength=len(names)).astype(np.int32)
+        self._entry_gram_offsets = np.concatenate([[0], np.cumsum(self.n_grams)])
+        self._gram_postings, self._gram_offsets = _postings(self._entry_grams, gram_owner, len(self._grams))
+
+    def __len__(self):
+        return len(self.names)
+
+    def _posting(self, gram_id):
+        return self._gram_postings[self._gram_offsets[gram_id]:self._gram_offsets[gram_id + 1]]
+
+    def prefix_range(self, prefix):
+        """Word ids [lo, hi) of the words starting with `prefix` (already normalised)"""
+        lo = np.searchsorted(self._vocabulary, prefix, side='left')
+        hi = np.searchsorted(self._vocabulary, prefix + '~', side='left')  # '~' sorts after A-Z0-9
+        return lo, hi
+
+    def prefix_entries(self, lo, hi, cap=PREFIX_CAP):
+        """Up to `cap` entries with a word in [lo, hi), shortest completions first"""
+        start, stop = self._word_offsets[lo], self._word_offsets[hi]
+        return np.unique(self._word_postings[start:min(stop, start + cap)])
+
+    def _overlap(self, entries, gram_ids):
+        """How many of `gram_ids` each entry contains"""
+        grams, segment = _gather(self._entry_grams, self._entry_gram_offsets, entries)
+        return np.bincount(segment, weights=np.isin(grams, gram_ids), minlength=len(entries))
+
+    def _has_word_in(self, entries, lo, hi):
+        """Whether each entry has a word with an id in [lo, hi)"""
+        words, segment = _gather(self._entry_words, self._entry_word_offsets, entries)
+        return np.bincount(segment, weights=(words >= lo) & (words < hi), minlength=len(entries)) > 0
+
+    def _candidates(self, known, wanted):
+        """Entries that could reach MIN_OVERLAP, from the rarer grams' postings"""
+        postings = sorted((self._posting(g) for g in known), key=len)
+        rare = [p for p in postings if len(p) <= COMMON_GRAM * len(self)]
+        if not rare:
+            return postings[0][:PREFIX_CAP] if postings else np.zeros(0, dtype=np.int32)
+        pooled = np.concatenate(rare)
+        if len(pooled) > len(self) // 16:
+            counts = np.bincount(pooled, minlength=len(self))
+            entries = np.flatnonzero(counts)
+            counts = counts[entries]
+        else:
+            entries, counts = np.unique(pooled, return_counts=True)
+        common = len(postings) - len(rare)  # A candidate may contain every common gram
+        viable = counts + common >= MIN_OVERLAP * wanted
+        entries, counts = entries[viable], counts[viable]
+        if len(entries) > CANDIDATE_CAP:
+            entries = np.sort(entries[np.argpartition(-counts, CANDIDATE_CAP - 1)[:CANDIDATE_CAP]])
+        return entries
+
+    @timed('search.query')
+    def search(self, query, limit=LIMIT, kind=None):
+        """Best matches for `query`, best first; `kind` limits to 'centre' or 'district'"""
+        words = normalise_text(query).split()
+        if not words:
+            return []
+        grams = {g for word in words for g in word_trigrams(word)}
+        known = np.asarray([self._grams[g] for g in grams if g in self._grams], dtype=np.int32)
+        lo, hi = self.prefix_range(words[-1])
+        candidates = np.union1d(self._candidates(known, len(grams)), self.prefix_entries(lo, hi))
+
+        scores = self._overlap(candidates, known) / len(grams)
+        scores += PREFIX_BONUS * self._has_word_in(candidates, lo, hi)
+        keep = scores >= MIN_OVERLAP
+        if kind is not None:
+            keep &= self.kinds[candidates] == kind
+        candidates, scores = candidates[keep], scores[keep]
+
+        ranked = scores - self.n_grams[candidates] * TIE_STEP  # Shorter names win ties
+        if len(candidates) > limit:
+            best = np.argpartition(-ranked, limit - 1)[:limit]
+            candidates, scores, ranked = candidates[best], scores[best], ranked[best]
+        order = np.argsort(-ranked, kind='stable')
+        return [SearchResult(kind=self.kinds[i], name=self.names[i], district=self.entry_district[i],
+                             row=int(i) if self.kinds[i] == 'centre' else -1, score=float(s))
+                for i, s in zip(candidates[order], scores[order])]
+
+    def centre(self, row):
+        """Search-frame row (No, CentreName, DistrictName) of a centre result"""
+        return self.frame.iloc[row]
+
+
+@cache_resource('search', max_entries=4, show_spinner=False)
+def _search_for(version, year, exam):
+    return SearchIndex(get_index(year, exam, columns=SEARCH_COLUMNS).select(columns=SEARCH_COLUMNS))
+
+
+def get_search(year=None, exam=None):
+    """Shared SearchIndex for the current dataset version"""
+    if not partitions.has_partitions():
+        year = exam = None  # Only the bundled dataset exists
+    return _search_for(dataset_version(year, exam), year, exam)
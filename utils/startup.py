@@ -0,0 +1,120 @@
+"""Cold-start import timing.
+
+`measure_imports` imports modules in a fresh interpreter under
+`python -X importtime` and returns the self and cumulative time of every
+module that got loaded, so the cost of each dependency is visible without
+the current process's already-imported modules hiding it. The CLI prints
+the slowest modules and appends one JSON record per run to a log that can
+be tracked across deployments:
+
+    python -m utils.startup
+    python -m utils.startup --top 30 pages/Performance.py
+
+The app itself records, once per process, how long its own imports took
+and which plotting backends were already loaded (`record_cold_start`).
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from utils.data_loader import CACHE_DIR
+
+LOG_PATH = CACHE_DIR / "startup.jsonl"
+APP_PATH = Path(__file__).resolve().parent.parent / "app.py"
+HEAVY_MODULES = ['plotly', 'matplotlib', 'seaborn']
+_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+_cold_start_recorded = False
+
+
+def parse_importtime(stderr):
+    """Table of module, self_ms, cumulative_ms and depth from -X importtime output"""
+    rows = [(name, int(own) / 1000, int(cumulative) / 1000, len(indent) // 2)
+            for own, cumulative, indent, name in _IMPORTTIME.findall(stderr)]
+    return pd.DataFrame(rows, columns=['module', 'self_ms', 'cumulative_ms', 'depth'])
+
+
+def measure_imports(modules=None, cwd=None):
+    """Import `modules` (default: app.py's) in a fresh interpreter and time every module it loads"""
+    modules = page_modules(APP_PATH) if modules is None else modules
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=cwd or Path(__file__).resolve().parent.parent,
+                            capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f"Importing {', '.join(modules)} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def page_modules(path):
+    """Modules a page script imports at top level"""
+    source = Path(path).read_text(encoding='utf-8')
+    found = re.findall(r"^(?:from\s+(\S+)\s+import|import\s+(\S+))", source, flags=re.MULTILINE)
+    return list(dict.fromkeys(a or b for a, b in found))
+
+
+def by_package(table):
+    """Self time per top-level package, slowest first"""
+    package = table['module'].str.split('.').str[0]
+    return (table.groupby(package)['self_ms'].sum()
+            .sort_values(ascending=False).rename('ms'))
+
+
+def append_record(record, path=LOG_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def record_cold_start(seconds, path=LOG_PATH):
+    """Log the app's import time once per process (later reruns reuse sys.modules)"""
+    global _cold_start_recorded
+    if _cold_start_recorded:
+        return
+    _cold_start_recorded = True
+    try:
+        append_record({
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'kind': 'app',
+            'total_ms': round(seconds * 1000, 1),
+            'loaded': [m for m in HEAVY_MODULES if m in sys.modules],
+        }, path)
+    except OSError:
+        pass  # Timing is best effort; a read-only disk must not break the app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report import time per module for a cold start")
+    parser.add_argument("pages", nargs="*", type=Path, help="Page scripts to measure (default: the app's imports)")
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to print")
+    parser.add_argument("--log", type=Path, default=LOG_PATH)
+    args = parser.parse_args(argv)
+
+    targets = {str(page): page_modules(page) for page in args.pages} or {APP_PATH.name: page_modules(APP_PATH)}
+    for target, modules in targets.items():
+        table = measure_imports(modules)
+        total_ms = table.loc[table['depth'] == 0, 'cumulative_ms'].sum()
+        packages = by_package(table)
+        print(f"{target}: {total_ms:,.0f} ms, {len(table)} modules")
+        print(table.nlargest(args.top, 'self_ms').to_string(index=False))
+        print(packages.head(args.top).to_string())
+        print()
+        append_record({
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'kind': 'imports',
+            'target': target,
+            'total_ms': round(total_ms, 1),
+            'modules': len(table),
+            'packages': packages.head(args.top).round(1).to_dict(),
+        }, args.log)
+
+
+if __name__ == "__main__":
+    main()
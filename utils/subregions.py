@@ -0,0 +1,139 @@
+"""Subregion registry and cached per-subregion summaries.
+
+Subregions (Acholi, Lango, West Nile, ...) are named groups of districts
+listed in config/subregions.json. Every subregion's summary is computed
+in one grouped pass over the precomputed district table and cached per
+dataset version, so the Sub-Regions page renders any of them without
+touching school rows. The registry file has its own DataWatcher, so an
+edited config is picked up without a stat() per rerun.
+"""
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+from utils.aggregates import get_summary
+from utils.data_loader import GRADE_COLUMNS
+from utils.data_version import current_version, dataset_version
+from utils.instrumentation import cache_resource, timed
+
+REGISTRY_PATH = Path(__file__).resolve().parent.parent / "config" / "subregions.json"
+
+
+def load_registry(path=REGISTRY_PATH):
+    """Subregion name -> district names, in the order the config lists them"""
+    raw = json.loads(Path(path).read_text(encoding='utf-8'))
+    registry, owner = {}, {}
+    for name, districts in raw['subregions'].items():
+        members = [d.strip().upper() for d in districts]
+        for district in members:
+            if district in owner:
+                raise ValueError(f"District {district} is listed in both {owner[district]} and {name}")
+            owner[district] = name
+        registry[name] = members
+    return registry
+
+
+@dataclass(frozen=True)
+class SubregionSummary:
+    """Headline numbers and an N-way district comparison for one subregion"""
+    name: str
+    districts: pd.DataFrame  # District table rows plus share/A_gap, largest enrollment first
+    schools: int
+    students: int
+    mean_size: float
+    min_size: int
+    max_size: int
+    avg_performance: float
+    grade_counts: pd.Series  # Total As..Es across the subregion
+    top_school: pd.Series  # CentreName, DistrictName, A_Percentage
+
+    @property
+    def district_names(self):
+        return list(self.districts.index)
+
+    @property
+    def grade_shares(self):
+        """Percentage of all graded candidates in each grade"""
+        return self.grade_counts / self.grade_counts.sum() * 100
+
+    @property
+    def best_district(self):
+        return self.districts['A_mean'].idxmax()
+
+    @property
+    def weakest_district(self):
+        return self.districts['A_mean'].idxmin()
+
+    @property
+    def performance_gap(self):
+        """Spread of district mean Grade "A" rates, in percentage points"""
+        return self.districts['A_mean'].max() - self.districts['A_mean'].min()
+
+    @property
+    def size_gap(self):
+        """Spread of district mean school sizes, in students"""
+        return self.districts['mean_size'].max() - self.districts['mean_size'].min()
+
+    def restrict(self, districts):
+        """The same subregion limited to some of its districts (e.g. the sidebar filter)"""
+        keep = [d for d in self.district_names if d in set(districts)]
+        if keep == self.district_names:
+            return self
+        return summarize_subregions(self.districts.loc[keep], {self.name: keep}).get(self.name)
+
+
+@timed('aggregate.subregions')
+def summarize_subregions(district_table, registry):
+    """SubregionSummary for every subregion with data, from one grouped pass.
+
+    `district_table` is the per-district table of a DatasetSummary. Districts
+    the registry doesn't place in any subregion are ignored.
+    """
+    owner = {d: name for name, members in registry.items() for d in members}
+    region = district_table.index.map(owner)
+    rows = district_table[region.notna()]
+    region = pd.Series(region[region.notna()], index=rows.index)
+
+    grouped = rows.groupby(region, sort=False)
+    totals = grouped[['schools', 'Total', 'A_sum', *GRADE_COLUMNS]].sum()
+    min_size = grouped['min_size'].min()
+    max_size = grouped['max_size'].max()
+    best = grouped['top_school_A'].idxmax()
+
+    summaries = {}
+    for name, members in grouped:
+        t = totals.loc[name]
+        schools, students = int(t['schools']), int(t['Total'])
+        avg_performance = t['A_sum'] / schools
+        comparison = members.assign(
+            share=members['Total'] / students * 100,
+            A_gap=members['A_mean'] - avg_performance,
+        ).sort_values('Total', ascending=False)
+        summaries[name] = SubregionSummary(
+            name=name,
+            districts=comparison,
+            schools=schools,
+            students=students,
+            mean_size=students / schools,
+            min_size=int(min_size[name]),
+            max_size=int(max_size[name]),
+            avg_performance=avg_performance,
+            grade_counts=t[GRADE_COLUMNS].astype('int64'),
+            top_school=pd.Series({'CentreName': members.loc[best[name], 'top_school'],
+                                  'DistrictName': best[name],
+                                  'A_Percentage': members.loc[best[name], 'top_school_A']}),
+        )
+    # Registry order, not data order
+    return {name: summaries[name] for name in registry if name in summaries}
+
+
+@cache_resource('subregions', max_entries=8, show_spinner=False)
+def _summaries_for(version, year, exam, registry_version):
+    return summarize_subregions(get_summary(year, exam).districts, load_registry())
+
+
+def get_subregion_summaries(year=None, exam=None):
+    """Cached name -> SubregionSummary for the current dataset version and registry"""
+    return _summaries_for(dataset_version(year, exam), year, exam, current_version(REGISTRY_PATH))
@@ -0,0 +1,330 @@
+"""Year-over-year results per centre, district and subregion.
+
+Every sitting of one exam is read once per dataset version and folded into
+a cube of counts:
+
+    counts[centre, year, :]  As, Bs, Cs, Ds, Es, Absent, Total (uint32)
+    present[centre, year]    whether the centre sat that year
+
+Centres are matched across years, oldest first, in three steps:
+- By centre number (`No`), when the district or the normalised name
+  agrees too. Numbers are sometimes reassigned.
+- By exact normalised name within the district.
+- By the closest similar name among the district's still-unmatched
+  centres with the same digits (difflib ratio >= NAME_CUTOFF). "SCHOOL 12"
+  and "SCHOOL 21" are different centres however close the names are.
+Rows matching none of these are new centres. A centre is labelled with the
+name, number and district from its latest year.
+
+Scores are computed from the counts with the same formulas as the rankings
+(see utils.ranking.score_matrix). District and subregion values are
+computed from summed counts, so they are candidate-weighted. Trends,
+deltas, slopes and "most improved" tables are array operations over the
+cube; nothing is re-joined per request.
+"""
+import difflib
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils import partitions
+from utils.data_loader import DATA_EXAM, DATA_YEAR, GRADE_COLUMNS, get_dataset
+from utils.data_version import current_version
+from utils.instrumentation import cache_resource, timed
+from utils.ranking import METRICS, score_matrix
+from utils.search import normalise_text
+from utils.subregions import REGISTRY_PATH, load_registry
+
+COUNT_COLUMNS = [*GRADE_COLUMNS, 'Absent', 'Total']
+TREND_COLUMNS = ['No', 'CentreName', 'DistrictName', *COUNT_COLUMNS]
+TREND_METRICS = {**METRICS, 'Absenteeism_Rate': 'Absenteeism rate %', 'Total': 'Candidates'}
+MATCH_METHODS = ('number', 'name', 'fuzzy', 'new')
+NAME_CUTOFF = 0.85  # difflib ratio for the fuzzy name fallback
+MIN_CANDIDATES = 20  # Centres smaller than this in either year are left out of "most improved"
+
+
+def _digits(name):
+    return tuple(re.findall(r'\d+', name))
+
+
+def _match_year(registry, rows):
+    """Centre id for each row of one year, registering new centres; and method counts"""
+    names = rows['name'].to_numpy()
+    districts = rows['DistrictName'].to_numpy()
+    numbers = rows['No'].to_numpy(dtype=np.float64, na_value=np.nan)
+    ids = np.full(len(rows), -1, dtype=np.int64)
+    claimed = set()
+    methods = dict.fromkeys(MATCH_METHODS, 0)
+
+    def claim(row, centre, method):
+        ids[row] = centre
+        claimed.add(centre)
+        methods[method] += 1
+
+    # Centre number, confirmed by district or name
+    if registry.numbers:
+        hit = np.fromiter((registry.numbers.get(no, -1) for no in numbers), dtype=np.int64, count=len(rows))
+        found = np.flatnonzero(hit >= 0)
+        agrees = found[(registry.district[hit[found]] == districts[found])
+                       | (registry.name[hit[found]] == names[found])]
+        for row in agrees:
+            claim(row, hit[row], 'number')
+
+    # Exact normalised name within the district
+    for row in np.flatnonzero(ids < 0):
+        for centre in registry.named.get((districts[row], names[row]), ()):
+            if centre not in claimed and registry.current(centre, districts[row], names[row]):
+                claim(row, centre, 'name')
+                break
+
+    # Closest similar name, with the same digits, among the district's centres not matched this year
+    open_rows = np.flatnonzero(ids < 0)
+    for district in dict.fromkeys(districts[open_rows]):
+        pools = {}
+        for c in registry.located.get(district, ()):
+            if c not in claimed and registry.district[c] == district:
+                pools.setdefault(_digits(registry.name[c]), {})[c] = registry.name[c]
+        for row in open_rows[districts[open_rows] == district]:
+            pool = pools.get(_digits(names[row]))
+            if not pool:
+                continue
+            close = difflib.get_close_matches(names[row], list(pool.values()), n=1, cutoff=NAME_CUTOFF)
+            if close:
+                centre = next(c for c, name in pool.items() if name == close[0])
+                claim(row, centre, 'fuzzy')
+                del pool[centre]
+
+    new = ids < 0
+    ids[new] = registry.add(int(new.sum()))
+    methods['new'] = int(new.sum())
+    registry.update(ids, numbers, names, districts, rows['CentreName'].to_numpy())
+    return ids, methods
+
+
+class _Registry:
+    """Every centre seen so far, with the number, name and district of its latest year"""
+
+    def __init__(self):
+        self.number = np.zeros(0, dtype=np.float64)
+        self.name = np.zeros(0, dtype=object)
+        self.district = np.zeros(0, dtype=object)
+        self.label = np.zeros(0, dtype=object)  # CentreName as published
+        self.numbers = {}  # Centre number -> centre id
+        self.named = {}  # (district, normalised name) -> centre ids, including stale entries
+        self.located = {}  # District -> centre ids, including stale entries
+
+    def current(self, centre, district, name):
+        return self.district[centre] == district and self.name[centre] == name
+
+    def add(self, n):
+        start = len(self.name)
+        self.number = np.concatenate([self.number, np.full(n, np.nan)])
+        for field in ('name', 'district', 'label'):
+            setattr(self, field, np.concatenate([getattr(self, field), np.full(n, None, dtype=object)]))
+        return np.arange(start, start + n)
+
+    def update(self, ids, numbers, names, districts, labels):
+        moved = self.district[ids] != districts
+        renamed = moved | (self.name[ids] != names)
+        self.number[ids], self.name[ids], self.district[ids], self.label[ids] = numbers, names, districts, labels
+        self.numbers.update((no, c) for no, c in zip(numbers.tolist(), ids.tolist()) if no == no)
+        for c, name, district in zip(ids[renamed].tolist(), names[renamed], districts[renamed]):
+            self.named.setdefault((district, name), []).append(c)
+        for c, district in zip(ids[moved].tolist(), districts[moved]):
+            self.located.setdefault(district, []).append(c)
+
+
+def _weighted_slope(years, values):
+    """Least-squares change per year of each row of `values`, skipping NaN"""
+    present = ~np.isnan(values)
+    x = np.where(present, years, 0.0)
+    y = np.where(present, values, 0.0)
+    n = present.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_mean = x.sum(axis=1) / n
+        y_mean = y.sum(axis=1) / n
+        dx = np.where(present, years - x_mean[:, None], 0.0)
+        slope = (dx * (y - y_mean[:, None])).sum(axis=1) / (dx ** 2).sum(axis=1)
+    return np.where(n >= 2, slope, np.nan)
+
+
+class TrendCube:
+    """Centre x year x count cube, plus district and subregion roll-ups"""
+
+    @timed('trends.build')
+    def __init__(self, df, subregions=None):
+        df = df[[*TREND_COLUMNS, 'Year']].reset_index(drop=True)
+        df['DistrictName'] = df['DistrictName'].astype(str)
+        codes, spellings = pd.factorize(df['CentreName'].astype(str))  # Most names recur every year
+        df['name'] = np.asarray([normalise_text(name) for name in spellings], dtype=object)[codes]
+        self.years = np.asarray(sorted(df['Year'].unique()), dtype=np.int64)
+
+        registry = _Registry()
+        rows, ids, positions, matches = [], [], [], {}
+        for position, year in enumerate(self.years):
+            year_rows = df[df['Year'] == year]
+            year_ids, matches[int(year)] = _match_year(registry, year_rows)
+            rows.append(year_rows.index.to_numpy())
+            ids.append(year_ids)
+            positions.append(np.full(len(year_rows), position))
+        rows, ids, positions = np.concatenate(rows), np.concatenate(ids), np.concatenate(positions)
+
+        n = len(registry.name)
+        self.counts = np.zeros((n, len(self.years), len(COUNT_COLUMNS)), dtype=np.uint32)
+        self.counts[ids, positions] = df[COUNT_COLUMNS].to_numpy(dtype=np.uint32)[rows]
+        self.present = np.zeros((n, len(self.years)), dtype=bool)
+        self.present[ids, positions] = True
+        self.centres = pd.DataFrame({'No': registry.number, 'CentreName': registry.label,
+                                     'DistrictName': registry.district})
+        self.matches = pd.DataFrame.from_dict(matches, orient='index', columns=list(MATCH_METHODS))
+
+        subregion_of = {d: name for name, members in (subregions or {}).items() for d in members}
+        self.centres['Subregion'] = self.centres['DistrictName'].map(subregion_of)
+        self.version = None  # Source version, set by get_trends; keys charts drawn from the cube
+        self._rollups = {}
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.centres)
+
+    @property
+    def n_years(self):
+        return len(self.years)
+
+    def _year(self, year, default):
+        """Position of `year` in the cube; `default` (0 = first, -1 = last) if None"""
+        if year is None:
+            return default % self.n_years
+        position = int(np.searchsorted(self.years, int(year)))
+        if position == self.n_years or self.years[position] != int(year):
+            raise KeyError(f"No results for {year}; years held: {', '.join(map(str, self.years))}")
+        return position
+
+    def rollup(self, level):
+        """(labels, counts, present) for one level; groups sum their centres' counts"""
+        if level == 'centre':
+            return self.centres['CentreName'], self.counts, self.present
+        with self._lock:
+            if level not in self._rollups:
+                column = {'district': 'DistrictName', 'subregion': 'Subregion'}[level]
+                codes, labels = pd.factorize(self.centres[column], sort=True)
+                keep = codes >= 0  # Districts outside every subregion
+                order = np.argsort(codes[keep], kind='stable')
+                starts = np.searchsorted(codes[keep][order], np.arange(len(labels)))
+                counts = np.add.reduceat(self.counts[keep][order].astype(np.uint64), starts, axis=0)
+                self._rollups[level] = (pd.Index(labels, name=column), counts, counts[..., -1] > 0)
+            return self._rollups[level]
+
+    def values(self, metric='A_Percentage', level='centre'):
+        """(labels, array of metric per entity and year, NaN where absent); computed once"""
+        key = (metric, level)
+        if key not in self._values:
+            values = self._compute(metric, level)
+            with self._lock:
+                self._values[key] = values
+        return self.rollup(level)[0], self._values[key]
+
+    def _compute(self, metric, level):
+        _, counts, present = self.rollup(level)
+        flat = counts.reshape(-1, len(COUNT_COLUMNS)).astype(np.float64)
+        if metric == 'Total':
+            values = flat[:, -1]
+        elif metric == 'Absenteeism_Rate':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values = flat[:, -2] / flat[:, -1] * 100
+        else:
+            values = score_matrix(flat[:, :len(GRADE_COLUMNS)], flat[:, -1])[metric]
+        values = np.where(present, values.reshape(present.shape), np.nan)
+        values.flags.writeable = False  # Shared between sessions
+        return values
+
+    def _scope(self, level, districts):
+        """Row mask of the entities belonging to `districts` (None means all)"""
+        labels, _, _ = self.rollup(level)
+        if districts is None:
+            return np.ones(len(labels), dtype=bool)
+        districts = set(districts)
+        if level == 'centre':
+            return self.centres['DistrictName'].isin(districts).to_numpy()
+        if level == 'district':
+            return labels.isin(districts)
+        return labels.isin(set(self.centres.loc[self.centres['DistrictName'].isin(districts), 'Subregion']))
+
+    def trend(self, metric='A_Percentage', level='district', districts=None):
+        """Entities x years table of a metric"""
+        labels, values = self.values(metric, level)
+        scope = self._scope(level, districts)
+        table = pd.DataFrame(values[scope], columns=self.years, index=np.asarray(labels)[scope])
+        table.index.name = labels.name if level != 'centre' else 'CentreName'
+        return table
+
+    def delta(self, metric='A_Percentage', level='district', start=None, end=None):
+        """Change in a metric between two years (default: first and last) per entity"""
+        _, values = self.values(metric, level)
+        return values[:, self._year(end, -1)] - values[:, self._year(start, 0)]
+
+    def slope(self, metric='A_Percentage', level='district'):
+        """Least-squares change per year over every year an entity sat"""
+        _, values = self.values(metric, level)
+        return _weighted_slope(self.years.astype(np.float64), values)
+
+    def most_improved(self, metric='A_Percentage', level='centre', n=10, start=None, end=None,
+                      districts=None, min_candidates=MIN_CANDIDATES):
+        """Entities with the largest rise in `metric` between two years, largest first"""
+        labels, values = self.values(metric, level)
+        first, last = self._year(start, 0), self._year(end, -1)
+        _, counts, _ = self.rollup(level)
+        totals = counts[..., -1]
+        eligible = (np.full(len(labels), first < last) & self._scope(level, districts) & ~np.isnan(values[:, first]) & ~np.isnan(values[:, last])
+                    & (totals[:, first] >= min_candidates) & (totals[:, last] >= min_candidates))
+        change = values[:, last] - values[:, first]
+        rows = np.flatnonzero(eligible)
+        if len(rows) > n:
+            rows = rows[np.argpartition(-change[rows], n - 1)[:n]]
+        rows = rows[np.argsort(-change[rows], kind='stable')]
+        table = pd.DataFrame({
+            labels.name if level != 'centre' else 'CentreName': np.asarray(labels)[rows],
+            str(self.years[first]): values[rows, first],
+            str(self.years[last]): values[rows, last],
+            'Change': change[rows],
+            'Per_Year': _weighted_slope(self.years.astype(np.float64), values[rows]),
+        })
+        if level == 'centre':
+            table.insert(1, 'DistrictName', self.centres['DistrictName'].to_numpy()[rows])
+        return table
+
+    def centre_trend(self, name, district):
+        """Year x metric table for one centre (by its latest name and district)"""
+        match = np.flatnonzero((self.centres['CentreName'] == name).to_numpy()
+                               & (self.centres['DistrictName'] == district).to_numpy())
+        if not len(match):
+            return None
+        row = match[0]
+        table = pd.DataFrame({metric: self.values(metric)[1][row] for metric in TREND_METRICS},
+                             index=pd.Index(self.years, name='Year'))
+        return table[self.present[row]]
+
+
+def _read_years(exam):
+    """Every sitting of `exam`: the partitioned store if built, else the bundled year"""
+    if partitions.has_partitions():
+        return partitions.read_partitions(exam=exam, columns=[*TREND_COLUMNS, 'Year'])
+    return get_dataset().view()[TREND_COLUMNS].assign(Year=DATA_YEAR)
+
+
+@cache_resource('trends', max_entries=4, show_spinner=False)
+def _trends_for(version, exam, registry_version):
+    cube = TrendCube(_read_years(exam), load_registry())
+    cube.version = version
+    return cube
+
+
+def get_trends(exam=None):
+    """Shared TrendCube for every year of an exam (default: the bundled one), per dataset version"""
+    exam = DATA_EXAM if exam is None else exam
+    source = partitions.MANIFEST_PATH if partitions.has_partitions() else None
+    version = current_version(source) if source else current_version()
+    return _trends_for(version, exam, current_version(REGISTRY_PATH))
@@ -1,11 +1,50 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import missingno as msno
-
-def plot_district_enrollment(df):
-    """Plot student enrollment by district"""
-    district_totals = df.groupby('DistrictName')['Total'].sum().sort_values()
+"""Chart builders for the pages.
+
+Plotting backends are imported inside the functions that use them, so
+importing this module (every page does) loads neither plotly nor
+matplotlib/seaborn; each backend is paid for on the first chart that
+needs it, and charts served from the render cache never load it.
+"""
+import numpy as np
+
+# Level-of-detail thresholds, so chart payloads stay bounded at any row count
+WEBGL_THRESHOLD = 1_000  # Scatter points above which traces switch to WebGL
+DENSITY_THRESHOLD = 10_000  # Scatter points above which a binned 2D density is drawn
+RAW_POINTS_THRESHOLD = 500  # Rows up to which box plots also show every school
+HIST_BINS = 20
+DENSITY_BINS = 60
+
+PERFORMANCE_LABELS = {'A_Percentage': 'Grade "A" Percentage (%)',
+                      'Absenteeism_Rate': 'Absenteeism Rate (%)'}
+
+
+def _bin_centres(edges):
+    return (edges[:-1] + edges[1:]) / 2
+
+
+def box_statistics(df, by, value):
+    """Tukey box statistics of `value` per group, computed server-side"""
+    grouped = df.groupby(by, observed=True)[value]
+    stats = grouped.quantile([.25, .5, .75]).unstack()
+    stats.columns = ['q1', 'median', 'q3']
+    stats['mean'] = grouped.mean()
+    stats['count'] = grouped.size()
+    iqr = stats['q3'] - stats['q1']
+    values = df[[by, value]].join(stats[['q1', 'q3']], on=by)
+    low = values[value] >= values['q1'] - 1.5 * (values['q3'] - values['q1'])
+    high = values[value] <= values['q3'] + 1.5 * (values['q3'] - values['q1'])
+    stats['lowerfence'] = values[low].groupby(by, observed=True)[value].min()
+    stats['upperfence'] = values[high].groupby(by, observed=True)[value].max()
+    stats['lowerfence'] = stats['lowerfence'].fillna(stats['q1'] - 1.5 * iqr)
+    stats['upperfence'] = stats['upperfence'].fillna(stats['q3'] + 1.5 * iqr)
+    return stats
+
+def plot_district_enrollment(district_totals):
+    """Plot student enrollment by district from precomputed district totals"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    district_totals = district_totals.sort_values()
     
     fig, ax = plt.subplots(figsize=(10, 6))
     sns.barplot(x=district_totals.values, y=district_totals.index,hue=district_totals.index, palette='viridis', legend=False)
@@ -15,17 +54,149 @@ def plot_district_enrollment(df):
     return fig
 
 def plot_performance_vs_attendance(df):
-    """Scatter plot of academic performance vs absenteeism"""
+    """Scatter plot of academic performance vs absenteeism.
+
+    Large selections are drawn with WebGL, and beyond DENSITY_THRESHOLD
+    schools as a 2D density binned on the server.
+    """
+    import plotly.express as px
+
+    if len(df) > DENSITY_THRESHOLD:
+        return plot_performance_density(df)
     fig = px.scatter(df, x='A_Percentage', y='Absenteeism_Rate',
                      color='DistrictName', size='Total',
+                     render_mode='webgl' if len(df) > WEBGL_THRESHOLD else 'auto',
                      title='Academic Performance vs Absenteeism Rate',
-                     labels={'A_Percentage': 'Grade "A" Percentage (%)',
-                            'Absenteeism_Rate': 'Absenteeism Rate (%)'})
+                     labels=PERFORMANCE_LABELS)
+    return fig
+
+def plot_performance_density(df, bins=DENSITY_BINS):
+    """Binned 2D density of performance vs absenteeism; payload independent of row count"""
+    import plotly.graph_objects as go
+
+    counts, x_edges, y_edges = np.histogram2d(df['A_Percentage'].to_numpy(dtype='float64'),
+                                              df['Absenteeism_Rate'].to_numpy(dtype='float64'),
+                                              bins=bins)
+    fig = go.Figure(go.Heatmap(
+        z=np.where(counts.T > 0, counts.T, np.nan),
+        x=_bin_centres(x_edges), y=_bin_centres(y_edges),
+        colorscale='Viridis', colorbar={'title': 'Schools'},
+        hovertemplate='A: %{x:.1f}%<br>Absent: %{y:.1f}%<br>%{z:.0f} schools<extra></extra>'))
+    fig.update_layout(title=f'Academic Performance vs Absenteeism Rate ({len(df):,} schools, binned)',
+                      xaxis_title=PERFORMANCE_LABELS['A_Percentage'],
+                      yaxis_title=PERFORMANCE_LABELS['Absenteeism_Rate'])
+    return fig
+
+def plot_school_size_distribution(df, median):
+    """Histogram of students per school, binned on the server"""
+    import plotly.graph_objects as go
+
+    counts, edges = np.histogram(df['Total'].to_numpy(dtype='float64'), bins=HIST_BINS)
+    fig = go.Figure(go.Bar(
+        x=_bin_centres(edges), y=counts, width=np.diff(edges),
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        hovertemplate='%{customdata[0]:.0f}-%{customdata[1]:.0f} students: %{y} schools<extra></extra>'))
+    fig.update_layout(title=f'School Size Distribution (Median: {median:.0f} students)',
+                      xaxis_title='Number of Students', yaxis_title='count', bargap=0)
+    return fig
+
+def plot_enrollment_by_district(enrollment_by_district):
+    """Bar chart of total enrollment per district"""
+    import plotly.express as px
+
+    fig = px.bar(enrollment_by_district,
+                 x='DistrictName', y='Total',
+                 color='DistrictName',
+                 title='Total Enrollment by District',
+                 labels={'Total': 'Number of Students'})
     return fig
 
-def plot_missing_values(df):
-    """Visualize missing values in the dataset"""
-    fig, ax = plt.subplots(figsize=(10, 4))
-    msno.matrix(df, color=(0.2, 0.5, 0.7), ax=ax, sparkline=False)
-    plt.title('Missing Values Pattern')
+def plot_grade_distribution(grade_counts):
+    """Bar chart of candidates per grade"""
+    import plotly.express as px
+
+    fig = px.bar(x=[c.rstrip('s') for c in grade_counts.index], y=grade_counts.values,
+                 title='Grade Distribution',
+                 labels={'x': 'Grade', 'y': 'Number of Candidates'})
+    return fig
+
+def plot_performance_distribution(df):
+    """Box plot of Grade "A" percentage per district.
+
+    Small selections show every school; larger ones send only precomputed
+    box statistics per district.
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    if len(df) <= RAW_POINTS_THRESHOLD:
+        return px.box(df,
+                      x='DistrictName', y='A_Percentage',
+                      color='DistrictName',
+                      points="all",
+                      title='Academic Performance Distribution',
+                      labels=PERFORMANCE_LABELS)
+
+    stats = box_statistics(df, 'DistrictName', 'A_Percentage')
+    fig = go.Figure([
+        go.Box(name=str(district), x=[str(district)],
+               q1=[row['q1']], median=[row['median']], q3=[row['q3']], mean=[row['mean']],
+               lowerfence=[row['lowerfence']], upperfence=[row['upperfence']],
+               boxpoints=False, hovertext=f"{int(row['count']):,} schools")
+        for district, row in stats.iterrows()
+    ])
+    fig.update_layout(title=f'Academic Performance Distribution ({len(df):,} schools)',
+                      xaxis_title='DistrictName', yaxis_title=PERFORMANCE_LABELS['A_Percentage'])
+    return fig
+
+def plot_missing_values(profile):
+    """Share of missing values per column in each block of rows, from a DatasetProfile"""
+    import plotly.graph_objects as go
+
+    blocks = profile.null_blocks
+    fig = go.Figure(go.Heatmap(
+        z=blocks.to_numpy(), x=list(blocks.columns), y=[f"rows {start:,}+" for start in blocks.index],
+        zmin=0, zmax=1, colorscale='Blues', colorbar=dict(title='Missing'),
+        hovertemplate='%{x}, %{y}: %{z:.0%} missing<extra></extra>'))
+    fig.update_layout(title=f'Missing Values Pattern ({profile.n_rows:,} rows)',
+                      yaxis=dict(autorange='reversed', showticklabels=False, title='Rows'))
+    return fig
+
+def plot_district_choropleth(values, geojson, title):
+    """Shade districts by a value; `geojson` features are keyed by district name.
+
+    Drawn on a blank geo layout fitted to the districts, so no map tiles
+    are fetched.
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Choropleth(
+        geojson=geojson, locations=list(values.index), z=values.to_numpy(), featureidkey='id',
+        colorscale='Viridis', marker_line_width=0.5, marker_line_color='white',
+        colorbar=dict(title=title), hovertemplate='%{location}: %{z:,.1f}<extra></extra>'))
+    fig.update_geos(fitbounds='locations', visible=False)
+    fig.update_layout(title=f'{title} by District', height=600, margin=dict(l=0, r=0, t=50, b=0))
+    return fig
+
+def plot_trend(trend, label):
+    """One line per row of an entities x years table"""
+    import plotly.graph_objects as go
+
+    fig = go.Figure([go.Scatter(x=list(trend.columns), y=row.to_numpy(), mode='lines+markers', name=str(name),
+                                connectgaps=False)
+                     for name, row in trend.iterrows()])
+    fig.update_layout(title=f'{label} by Year', xaxis=dict(title='Year', tickmode='array',
+                                                          tickvals=list(trend.columns)),
+                      yaxis_title=label, legend_title=trend.index.name)
+    return fig
+
+def plot_column_histogram(profile, column):
+    """Histogram of one numeric column, from a DatasetProfile"""
+    import plotly.graph_objects as go
+
+    counts, edges = profile.histograms[column]
+    fig = go.Figure(go.Bar(x=_bin_centres(edges), y=counts, width=np.diff(edges),
+                           marker_color='#3d85c6'))
+    fig.update_layout(title=f'Distribution of {column}', xaxis_title=column,
+                      yaxis_title='Number of Schools', bargap=0.05)
     return fig
\ No newline at end of file